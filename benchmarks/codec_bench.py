@@ -0,0 +1,77 @@
+"""
+Micro-benchmark of the Kafka record value codecs on typical alert payloads.
+
+Compares the previous stdlib path (decode to str, then json.loads) with
+every codec in utils.codec that is installed, for 2, 8 and 20 KB alerts.
+
+Usage:
+    python -m benchmarks.codec_bench [--number 2000]
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.codec import available_codecs  # noqa: E402
+
+
+def make_alert(size: int) -> dict:
+    """Builds an alert message whose JSON encoding is about `size` bytes."""
+    alert = {
+        "provider": "discord",
+        "template": "error_report",
+        "destination": "https://discord.com/api/webhooks/123456789/abcdefghijklmnop",
+        "data": {
+            "service": "payment-api",
+            "environment": "prod",
+            "error_code": 500,
+            "message": "Unhandled exception while processing the payment callback",
+            "tags": ["payments", "callback", "p1"],
+            "metrics": {"latency_ms": 1234.5, "retries": 3, "success_rate": 0.987},
+            "stack_trace": [],
+        },
+    }
+    frame = 0
+    while len(json.dumps(alert)) < size:
+        alert["data"]["stack_trace"].append(
+            f'  File "/app/services/payment/handlers.py", line {100 + frame}, '
+            f"in handle_callback_{frame}\n    result = processor.capture(order_id, amount)"
+        )
+        frame += 1
+    return alert
+
+
+def bench(number: int) -> None:
+    codecs = available_codecs()
+    print(f"Codecs: {', '.join(codecs)} ({number} runs, microseconds per message)\n")
+    print(f"{'size':>6}  {'codec':<14}{'decode':>10}{'encode':>10}{'speedup':>10}")
+
+    for size in (2_048, 8_192, 20_480):
+        alert = make_alert(size)
+        raw = json.dumps(alert).encode("utf-8")
+        baseline = timeit.timeit(lambda: json.loads(raw.decode("utf-8")), number=number)
+        baseline_encode = timeit.timeit(lambda: json.dumps(alert).encode("utf-8"), number=number)
+        rows = [("json (before)", baseline, baseline_encode)]
+        for name, codec in codecs.items():
+            assert codec.loads(raw) == alert
+            decode = timeit.timeit(lambda: codec.loads(raw), number=number)
+            encode = timeit.timeit(lambda: codec.dumps(alert), number=number)
+            rows.append((name, decode, encode))
+
+        for name, decode, encode in rows:
+            speedup = (baseline + baseline_encode) / (decode + encode)
+            print(
+                f"{len(raw) // 1024:>4}KB  {name:<14}"
+                f"{decode / number * 1e6:>10.1f}{encode / number * 1e6:>10.1f}{speedup:>9.1f}x"
+            )
+        print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000, help="Runs per measurement")
+    bench(parser.parse_args().number)
@@ -2,7 +2,7 @@
 import os
 import importlib
 from pathlib import Path
-from typing import NamedTuple, Callable, Dict, List
+from typing import Any, NamedTuple, Callable, Dict, List, Optional
 
 from utils.logger import LogManager
 
@@ -13,6 +13,11 @@ class Callback(NamedTuple):
     name: str
     func: Callable[..., object]
     z_index: int = 0
+    batch: bool = False
+    # Validates msg.value for every callback of the topic (see KafkaManager)
+    value_parser: Optional[Callable[[Any], Any]] = None
+    # Hands records to the NotificationDispatcher, so its header pre-filter applies
+    dispatch: bool = False
 
 
 callbacks: Dict[str, List[Callback]] = {}
@@ -36,14 +41,24 @@ for dir_path in [
 
         alert_disable = getattr(module, "ALERT_DISABLE", False)
         z_index = getattr(module, "Z_INDEX", 0)
+        batch = getattr(module, "BATCH", False)
+        value_parser = getattr(module, "VALUE_PARSER", None)
+        dispatch = getattr(module, "DISPATCH", False)
         logger.info(
-            f"File: {dir_path.name}.{file_path.stem}: DISABLE: {alert_disable} Z_INDEX: {z_index}"
+            f"File: {dir_path.name}.{file_path.stem}: DISABLE: {alert_disable} Z_INDEX: {z_index} BATCH: {batch}"
         )
         if alert_disable:
             continue
 
         callbacks[dir_path.name].append(
-            Callback(name=file_path.stem, func=module.callback, z_index=z_index)
+            Callback(
+                name=file_path.stem,
+                func=module.callback,
+                z_index=z_index,
+                batch=batch,
+                value_parser=value_parser,
+                dispatch=dispatch,
+            )
         )
 
     # z-index로 정렬
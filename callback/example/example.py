@@ -1,18 +1,24 @@
 from typing import Any, Optional
 from aiokafka import ConsumerRecord
 from core.dispatcher import NotificationDispatcher
+from core.message import AlertMessage, InvalidMessageError
 from utils.logger import LogManager
 
 logger = LogManager.get_logger(__name__)
 
 Z_INDEX = 0
 ALERT_DISABLE = False
+# Invalid alerts on this topic are dead-lettered before any callback runs
+VALUE_PARSER = AlertMessage.from_dict
+# Records are sent through the NotificationDispatcher, so records whose
+# provider header names no configured provider are dropped before decoding
+DISPATCH = True
 
 
 async def callback(msg: ConsumerRecord, context: Optional[Any] = None):
     """
     Callback for processing Kafka messages using the NotificationDispatcher.
-    The message value is expected to be a JSON-deserialized dictionary.
+    The message value is an AlertMessage validated by KafkaManager.
     """
     if not isinstance(context, NotificationDispatcher):
         logger.error(
@@ -25,16 +31,16 @@ async def callback(msg: ConsumerRecord, context: Optional[Any] = None):
     logger.info(
         f"Received message on topic '{msg.topic}'. Processing with NotificationDispatcher..."
     )
-    if msg.value:
-        # Enrich the message with Kafka metadata
-        enriched_message = {
-            **msg.value,
-            "_kafka_meta": {
-                "topic": msg.topic,
-                "partition": msg.partition,
-                "offset": msg.offset,
-            }
-        }
-        await dispatcher.process(enriched_message)
-    else:
+    if not msg.value:
         logger.warning(f"Skipping message with empty value on topic '{msg.topic}'.")
+        return
+
+    try:
+        message = AlertMessage.from_dict(msg.value)
+    except InvalidMessageError as e:
+        logger.error(f"Skipping invalid message on topic '{msg.topic}': {e}")
+        return
+
+    # Attach Kafka metadata in place instead of copying the message
+    message.set_kafka_meta(msg.topic, msg.partition, msg.offset)
+    await dispatcher.process(message)
@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Dict, Literal, Optional, List
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -9,8 +9,16 @@ class AppConfig(BaseModel):
     LOG_DIR: str = "logs"
     LOG_LEVEL: str = "INFO"
     LOG_NOTIFIER_URL: Optional[str] = None
+    LOG_NOTIFIER_QUEUE_SIZE: int = 1000  # Queued error records; more are dropped
+    LOG_NOTIFIER_BATCH_WINDOW: float = 5.0  # seconds to collect errors into one notification
+    LOG_NOTIFIER_BATCH_MAX: int = 50  # Max error records per notification
+    LOG_NOTIFIER_RATE_LIMIT: int = 10  # Max notifications per LOG_NOTIFIER_RATE_WINDOW
+    LOG_NOTIFIER_RATE_WINDOW: float = 60.0  # seconds
     LOG_MAX_BYTES: int = 10 * 1024 * 1024  # 10 MB
     LOG_BACKUP_COUNT: int = 5
+    LOG_JSON: bool = False  # Write per-logger files as JSON lines (<name>.jsonl)
+    # Log to stderr only, without files or notifications (set for render worker processes)
+    LOG_STDERR_ONLY: bool = False
     ENV: str = "prod"
 
 
@@ -31,6 +39,8 @@ class KafkaProducerConfig(BaseModel):
     acks: str = "all"
     retry_backoff_ms: int = 100
     linger_ms: int = 0
+    max_batch_size: int = 16384
+    compression_type: Optional[str] = None
 
 
 class EmailConfig(BaseModel):
@@ -44,6 +54,117 @@ class EmailConfig(BaseModel):
     DEFAULT_FROM_EMAIL: str = "alert-system@example.com"
     DEFAULT_TO_EMAIL: Optional[str] = None
     DEFAULT_SUBJECT: str = "Alert Notification"
+    POOL_SIZE: int = 5  # Max concurrent SMTP connections
+    POOL_IDLE_TIMEOUT: float = 60.0  # seconds before an idle connection is dropped
+    SMTP_TIMEOUT: float = 30.0  # seconds
+    BATCH_ENABLED: bool = False  # Send queued emails in batches over one session
+    BATCH_WINDOW_MS: int = 200  # Max time a message waits for its batch
+    BATCH_MAX_SIZE: int = 50  # Max messages per batch
+
+
+class WebhookConfig(BaseModel):
+    """Shared aiohttp connection pool configurations for webhook providers."""
+
+    POOL_SIZE: int = 100  # Max open connections per provider session
+    POOL_SIZE_PER_HOST: int = 20
+    DNS_CACHE_TTL: int = 300  # seconds
+    KEEPALIVE_TIMEOUT: float = 30.0  # seconds
+    REQUEST_TIMEOUT: float = 10.0  # seconds
+    MAX_CONCURRENCY: int = 50  # Max in-flight requests per provider
+    RATE_LIMIT_DEFAULT_LIMIT: int = 5  # Requests per window until headers say otherwise
+    RATE_LIMIT_DEFAULT_WINDOW: float = 2.0  # seconds
+    RATE_LIMIT_MAX_RETRIES: int = 3  # Retries of a 429 response
+    RATE_LIMIT_MAX_WAIT: float = 60.0  # Give up if Retry-After exceeds this (seconds)
+
+
+class TemplateConfig(BaseModel):
+    """Jinja2 template rendering configurations."""
+
+    DIR: str = "templates"
+    PRECOMPILE: bool = True  # Compile every template at startup and render from memory
+    WATCH: bool = False  # Recompile when files change (requires PRECOMPILE)
+    WATCH_INTERVAL: float = 2.0  # seconds between directory scans
+    RENDER_CACHE_SIZE: int = 0  # Memoized renders of identical alerts (0 disables)
+    RENDER_CACHE_TTL: float = 60.0  # seconds
+    # Render templates that average over OFFLOAD_THRESHOLD_MS off the event loop
+    OFFLOAD_ENABLED: bool = False
+    OFFLOAD_EXECUTOR: Literal["process", "thread"] = "process"
+    OFFLOAD_WORKERS: int = 2
+    OFFLOAD_THRESHOLD_MS: float = 5.0
+    OFFLOAD_TIMEOUT: float = 5.0  # seconds
+
+
+class DedupConfig(BaseModel):
+    """Suppression of repeated alerts."""
+
+    ENABLED: bool = False
+    WINDOW: float = 60.0  # seconds a repeated alert is suppressed after its first occurrence
+    MAX_KEYS: int = 100_000  # Open windows kept in memory; the oldest close early
+    # Dotted message paths identifying an alert, e.g. "data.service"
+    KEYS: List[str] = ["provider", "template", "destination", "data"]
+    TEMPLATE_KEYS: Dict[str, List[str]] = {}  # Per template name, overrides KEYS
+    TOPIC_KEYS: Dict[str, List[str]] = {}  # Per Kafka topic, overrides KEYS
+
+
+class DigestConfig(BaseModel):
+    """Aggregation of alerts into digest notifications."""
+
+    ENABLED: bool = False
+    WINDOW: float = 10.0  # seconds a digest collects alerts after the first one
+    MAX_ITEMS: int = 50  # Send the digest early once it holds this many alerts
+    # Templates to aggregate; empty means every template with a digest template
+    TEMPLATES: List[str] = []
+
+
+class RetryConfig(BaseModel):
+    """Retry of notifications that failed with a transient error."""
+
+    ENABLED: bool = False
+    IN_PROCESS_ATTEMPTS: int = 2  # Retries held in memory before using delay topics
+    BASE_DELAY: float = 1.0  # seconds, doubled per in-process attempt (with jitter)
+    MAX_DELAY: float = 30.0  # seconds
+    MAX_PENDING: int = 1000  # In-process retries waiting at once; overflow goes to topics
+    TOPIC_PREFIX: str = "alert-retry"
+    TOPIC_DELAYS: List[int] = [5, 60, 600]  # seconds; one delay topic per tier
+
+
+class PriorityConfig(BaseModel):
+    """Priority lanes for callback tasks and webhook sends."""
+
+    ENABLED: bool = False
+    DEFAULT: str = "normal"
+    # Max share of a concurrency pool (KAFKA_MAX_CONCURRENT_TASKS, webhook
+    # MAX_CONCURRENCY) each lane may hold. Lower lanes summing below 1.0
+    # keep the remainder free for "critical".
+    LANES: Dict[str, float] = {"critical": 1.0, "high": 0.4, "normal": 0.3, "low": 0.1}
+    WEIGHTS: Dict[str, int] = {"critical": 8, "high": 4, "normal": 2, "low": 1}
+    HEADER: str = "priority"  # Kafka header carrying the lane name
+    FIELD: str = "priority"  # Message field carrying the lane name
+    TOPIC_PRIORITIES: Dict[str, str] = {}  # Lane per topic when header and field are absent
+    MAX_BACKLOG: int = 500  # Records waiting in a lane before its partitions are paused
+
+
+class MetricsConfig(BaseModel):
+    """Prometheus metrics endpoint."""
+
+    ENABLED: bool = True
+    HOST: str = "127.0.0.1"  # Containers scraped from outside set 0.0.0.0
+    PORT: int = 9108
+    PATH: str = "/metrics"
+
+
+class WorkerConfig(BaseModel):
+    """Multi-process mode: a supervisor runs worker processes in one consumer group."""
+
+    PROCESSES: int = 1  # 1 runs without a supervisor; 0 starts one worker per available CPU
+    RESTART_BACKOFF: float = 1.0  # seconds before restarting a dead worker
+    MAX_RESTART_BACKOFF: float = 60.0  # the backoff doubles while a worker keeps crashing
+    STABLE_AFTER: float = 30.0  # seconds a worker must run before its backoff resets
+    SHUTDOWN_TIMEOUT: float = 30.0  # seconds to wait for workers on SIGTERM before killing them
+    HEALTH_ENABLED: bool = True
+    HEALTH_HOST: str = "0.0.0.0"  # nosec B104 - probed from outside the container
+    HEALTH_PORT: int = 9107
+    HEALTH_PATH: str = "/health"
 
 
 class Settings(BaseSettings):
@@ -55,16 +176,47 @@ class Settings(BaseSettings):
     KAFKA_BROKERS: List[str] = ["localhost:9092"]
     KAFKA_CONSUMER_GROUP: str = "alert-group"
     KAFKA_MAX_CONCURRENT_TASKS: int = 100
-    KAFKA_DEAD_LETTER_TOPIC: str = "dead-letter-queue"
+    # "concurrent": every callback runs as its own task (no ordering guarantees)
+    # "partitioned": records are processed in order per (topic, partition)
+    # "batch": records are fetched with getmany() and dispatched per partition batch
+    KAFKA_PROCESSING_MODE: Literal["concurrent", "partitioned", "batch"] = "concurrent"
+    KAFKA_PARTITION_QUEUE_SIZE: int = 100  # Pause fetching a partition beyond this backlog
+    KAFKA_PARTITION_CONCURRENCY: int = 1  # Records started in parallel per partition
+    KAFKA_BATCH_MAX_RECORDS: int = 500  # getmany() max_records in "batch" mode
+    KAFKA_BATCH_TIMEOUT_MS: int = 1000  # getmany() timeout_ms in "batch" mode
+    # Manual commits (KAFKA_CONSUMER_CONFIG__ENABLE_AUTO_COMMIT=False)
+    KAFKA_COMMIT_INTERVAL_MS: int = 5000
+    KAFKA_COMMIT_BATCH_SIZE: int = 1000  # Commit early after this many completed records
+    KAFKA_SHUTDOWN_TIMEOUT_MS: int = 10000  # Max wait for in-flight callbacks on stop
+    KAFKA_DEAD_LETTER_TOPIC: str = "dead-letter-queue"  # Empty string disables the DLQ
+    # JSON codec for record values: "auto" uses orjson or msgspec when installed
+    KAFKA_JSON_CODEC: Literal["auto", "orjson", "msgspec", "json"] = "auto"
+    # Values at least this large are decoded in a thread pool (0 decodes inline)
+    KAFKA_DECODE_OFFLOAD_BYTES: int = 256 * 1024
+    KAFKA_DECODE_WORKERS: int = 2
+    # Cap on compressed values once decompressed (see utils.content, 0 disables)
+    KAFKA_MAX_DECOMPRESSED_BYTES: int = 16 * 1024 * 1024
 
     # Kafka Detailed Configuration
     KAFKA_CONSUMER_CONFIG: KafkaConsumerConfig = KafkaConsumerConfig()
     KAFKA_PRODUCER_CONFIG: KafkaProducerConfig = KafkaProducerConfig()
+    # Dead letters are rare and not latency sensitive: batch them aggressively
+    KAFKA_DEAD_LETTER_PRODUCER_CONFIG: KafkaProducerConfig = KafkaProducerConfig(
+        linger_ms=500, max_batch_size=262144, compression_type="gzip"
+    )
 
     # Provider Configurations
     DISCORD_WEBHOOK_URL: Optional[str] = None
     SLACK_WEBHOOK_URL: Optional[str] = None
+    WEBHOOK_CONFIG: WebhookConfig = WebhookConfig()
     EMAIL_CONFIG: EmailConfig = EmailConfig()
+    RETRY_CONFIG: RetryConfig = RetryConfig()
+    DEDUP_CONFIG: DedupConfig = DedupConfig()
+    DIGEST_CONFIG: DigestConfig = DigestConfig()
+    PRIORITY_CONFIG: PriorityConfig = PriorityConfig()
+    TEMPLATE_CONFIG: TemplateConfig = TemplateConfig()
+    METRICS_CONFIG: MetricsConfig = MetricsConfig()
+    WORKER_CONFIG: WorkerConfig = WorkerConfig()
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -0,0 +1,187 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from core.config import DedupConfig, settings
+from utils.logger import LogManager
+
+logger = LogManager.get_logger(__name__)
+
+
+@dataclass
+class SuppressionWindow:
+    """Duplicates of one alert seen since its first occurrence."""
+
+    message: Dict[str, Any]
+    key: Dict[str, Any]
+    first_seen: float
+    last_seen: float
+    suppressed: int = 0
+
+    def summary(self, window: float) -> Dict[str, Any]:
+        """Returns the context handed to BaseProvider.get_summary_payload."""
+        return {
+            "template": self.message.get("template"),
+            "key": self.key,
+            "count": self.suppressed,
+            "window": window,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "topic": (self.message.get("_kafka_meta") or {}).get("topic"),
+        }
+
+
+# Receives the first message of a window and its summary context
+SummaryHandler = Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[None]]
+
+
+@dataclass
+class _KeySpec:
+    fields: List[str]
+    paths: List[Tuple[str, ...]] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.paths = [tuple(name.split(".")) for name in self.fields]
+
+
+def _lookup(message: Mapping, path: Tuple[str, ...]) -> Any:
+    value: Any = message
+    for part in path:
+        if not isinstance(value, Mapping):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _hashable(value: Any) -> Hashable:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return value
+
+
+class Deduplicator:
+    """
+    Suppresses repeats of the same alert within a time window.
+
+    An alert's identity is the tuple of the configured key fields: dotted
+    paths into the message such as `data.service`. Keys can be set per
+    template (DEDUP_CONFIG.TEMPLATE_KEYS), per topic (TOPIC_KEYS) or
+    globally (KEYS). The first occurrence passes and opens a window of
+    WINDOW seconds. Later occurrences within the window are counted and
+    dropped. When the window closes, a summary is handed to the summary
+    handler if anything was suppressed.
+
+    Windows are kept in first-seen order, so expiry only looks at the
+    oldest entries. At most MAX_KEYS windows are tracked; beyond that the
+    oldest window is closed early.
+    """
+
+    def __init__(self, config: Optional[DedupConfig] = None) -> None:
+        self._config = config or settings.DEDUP_CONFIG
+        self.window = self._config.WINDOW
+        self._default_spec = _KeySpec(self._config.KEYS)
+        self._template_specs = {
+            name: _KeySpec(fields) for name, fields in self._config.TEMPLATE_KEYS.items()
+        }
+        self._topic_specs = {
+            name: _KeySpec(fields) for name, fields in self._config.TOPIC_KEYS.items()
+        }
+        self._windows: "OrderedDict[Hashable, SuppressionWindow]" = OrderedDict()
+        self._on_summary: Optional[SummaryHandler] = None
+        self._sweep_task: Optional[asyncio.Task[None]] = None
+        self._summary_tasks: set[asyncio.Task[None]] = set()
+        self.suppressed_total = 0
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def _spec_for(self, message: Dict[str, Any]) -> _KeySpec:
+        spec = self._template_specs.get(message.get("template"))
+        if spec is None:
+            topic = (message.get("_kafka_meta") or {}).get("topic")
+            spec = self._topic_specs.get(topic, self._default_spec)
+        return spec
+
+    def admit(self, message: Dict[str, Any]) -> bool:
+        """
+        Returns True if the message should be delivered, False if it repeats
+        an alert whose window is still open.
+        """
+        now = time.monotonic()
+        self._expire(now)
+
+        spec = self._spec_for(message)
+        values = tuple(_hashable(_lookup(message, path)) for path in spec.paths)
+        key = (tuple(spec.fields), values)
+        try:
+            current = self._windows.get(key)
+        except TypeError:
+            return True  # Unhashable key values: never deduplicate
+
+        if current is not None:
+            current.suppressed += 1
+            current.last_seen = now
+            self.suppressed_total += 1
+            return False
+
+        self._windows[key] = SuppressionWindow(
+            message=message,
+            key=dict(zip(spec.fields, (_lookup(message, p) for p in spec.paths))),
+            first_seen=now,
+            last_seen=now,
+        )
+        while len(self._windows) > self._config.MAX_KEYS:
+            self._close(self._windows.popitem(last=False)[1])
+        return True
+
+    def start(self, on_summary: SummaryHandler) -> None:
+        """Starts closing expired windows in the background."""
+        self._on_summary = on_summary
+        if self._sweep_task is None:
+            self._sweep_task = asyncio.create_task(self._sweep())
+
+    async def stop(self) -> None:
+        """Closes every open window, emitting pending summaries."""
+        if self._sweep_task is not None:
+            self._sweep_task.cancel()
+            try:
+                await self._sweep_task
+            except asyncio.CancelledError:
+                pass
+            self._sweep_task = None
+        while self._windows:
+            self._close(self._windows.popitem(last=False)[1])
+        if self._summary_tasks:
+            await asyncio.gather(*self._summary_tasks, return_exceptions=True)
+
+    async def _sweep(self) -> None:
+        interval = max(0.05, min(1.0, self.window / 10))
+        while True:
+            await asyncio.sleep(interval)
+            self._expire(time.monotonic())
+
+    def _expire(self, now: float) -> None:
+        deadline = now - self.window
+        while self._windows:
+            oldest = next(iter(self._windows.values()))
+            if oldest.first_seen > deadline:
+                break
+            self._windows.popitem(last=False)
+            self._close(oldest)
+
+    def _close(self, window: SuppressionWindow) -> None:
+        if window.suppressed == 0 or self._on_summary is None:
+            return
+        task = asyncio.create_task(self._emit(window))
+        self._summary_tasks.add(task)
+        task.add_done_callback(self._summary_tasks.discard)
+
+    async def _emit(self, window: SuppressionWindow) -> None:
+        try:
+            await self._on_summary(window.message, window.summary(self.window))
+        except Exception as e:
+            logger.error(f"Failed to send suppression summary: {e}", exc_info=True)
@@ -0,0 +1,97 @@
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from core.config import DigestConfig, settings
+from utils.logger import LogManager
+
+logger = LogManager.get_logger(__name__)
+
+# Marks messages that must not be aggregated (again)
+DIGEST_MARKER_KEY = "_digest"
+
+DigestHandler = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+
+class _Bucket:
+    __slots__ = ("messages", "timer")
+
+    def __init__(self) -> None:
+        self.messages: List[Dict[str, Any]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class DigestAggregator:
+    """
+    Buffers alerts per (provider, destination, template) into digests.
+
+    A bucket opens with its first message and is flushed to the digest
+    handler WINDOW seconds later, or as soon as it holds MAX_ITEMS
+    messages, whichever comes first. Buffered messages only live in memory:
+    `stop` flushes every open bucket, but a crash loses them even though
+    their offsets may already be committed. `main` therefore only enables
+    digests with auto commit, which gives no at-least-once guarantee anyway.
+    """
+
+    def __init__(self, config: Optional[DigestConfig] = None) -> None:
+        self._config = config or settings.DIGEST_CONFIG
+        self.window = self._config.WINDOW
+        self._templates = set(self._config.TEMPLATES)
+        self._buckets: Dict[Hashable, _Bucket] = {}
+        self._on_flush: Optional[DigestHandler] = None
+        self._flush_tasks: set[asyncio.Task[None]] = set()
+
+    @property
+    def buffered(self) -> int:
+        """Returns the number of messages waiting in open buckets."""
+        return sum(len(bucket.messages) for bucket in self._buckets.values())
+
+    def accepts(self, message: Dict[str, Any]) -> bool:
+        """Returns True if the message's template is configured for digests."""
+        if DIGEST_MARKER_KEY in message or self._on_flush is None:
+            return False
+        return not self._templates or message.get("template") in self._templates
+
+    def start(self, on_flush: DigestHandler) -> None:
+        """Sets the coroutine that delivers a flushed bucket."""
+        self._on_flush = on_flush
+
+    def add(self, message: Dict[str, Any]) -> None:
+        """Buffers a message in the bucket of its provider, destination and template."""
+        key = (
+            message.get("provider"),
+            json.dumps(message.get("destination"), sort_keys=True, default=str),
+            message.get("template"),
+        )
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket()
+            bucket.timer = asyncio.get_running_loop().call_later(
+                self.window, self._flush, key
+            )
+        bucket.messages.append(message)
+        if len(bucket.messages) >= self._config.MAX_ITEMS:
+            self._flush(key)
+
+    async def stop(self) -> None:
+        """Flushes every open bucket and waits for the digests to be sent."""
+        for key in list(self._buckets):
+            self._flush(key)
+        if self._flush_tasks:
+            await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+
+    def _flush(self, key: Hashable) -> None:
+        bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            return
+        if bucket.timer is not None:
+            bucket.timer.cancel()
+        task = asyncio.create_task(self._emit(bucket.messages))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _emit(self, messages: List[Dict[str, Any]]) -> None:
+        try:
+            await self._on_flush(messages)
+        except Exception as e:
+            logger.error(f"Failed to send digest of {len(messages)} alerts: {e}", exc_info=True)
@@ -1,63 +1,152 @@
-from typing import Dict, Any, Optional
+import asyncio
+import posixpath
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+from aiokafka import ConsumerRecord
 
 from .renderer import TemplateRenderer
-from .providers.base import BaseProvider
+from .render_offload import RenderOffloader
+from .dedup import Deduplicator
+from .digest import DIGEST_MARKER_KEY, DigestAggregator
+from .message import AlertMessage, InvalidMessageError
+from .retry import RETRY_STATE_KEY, RetryScheduler, is_transient_error
+from .providers.base import BaseProvider, DeliveryReport
+from utils.kafka_manager import BatchCallbackError
 from utils.logger import LogManager
+from utils.metrics import FALLBACKS, RENDER_SECONDS
+from utils.routing import RoutingInfo
 from core.config import settings
 
 logger = LogManager.get_logger(__name__)
 
 
+class DeliveryError(Exception):
+    """Raised when a provider reports that a notification was not delivered."""
+
+    def __init__(
+        self,
+        message: str,
+        destinations: Union[str, List[str]],
+        transient: Optional[List[str]] = None,
+    ) -> None:
+        super().__init__(message)
+        self.destinations = destinations
+        # Failed destinations whose error is worth retrying
+        self.transient = transient or []
+
+
 class NotificationDispatcher:
     def __init__(
-        self, providers: Dict[str, BaseProvider], renderer: TemplateRenderer
+        self,
+        providers: Dict[str, BaseProvider],
+        renderer: TemplateRenderer,
+        retry_scheduler: Optional[RetryScheduler] = None,
+        render_offloader: Optional[RenderOffloader] = None,
+        deduplicator: Optional[Deduplicator] = None,
+        digest: Optional[DigestAggregator] = None,
     ) -> None:
         self.providers = providers
         self.renderer = renderer
+        self.retry_scheduler = retry_scheduler
+        self.render_offloader = render_offloader
+        self.deduplicator = deduplicator
+        self.digest = digest
 
-    async def process(self, message: Dict[str, Any]) -> None:
+    def accepts_route(self, route: RoutingInfo) -> bool:
+        """
+        KafkaManager pre-filter: drops records whose `provider` header names
+        no configured provider, since `process` would discard them anyway.
+        Records without the header are always accepted.
+        """
+        if route.provider is None or route.provider in self.providers:
+            return True
+        # Counted by MESSAGES_FILTERED; per-record errors would flood logs and alerts
+        logger.debug(f"Invalid provider in record header: {route.provider}")
+        return False
+
+    async def process(self, message: Union[AlertMessage, Dict[str, Any]]) -> None:
         """
         Orchestrates the processing of a notification message.
 
         1.  Selects the appropriate provider.
         2.  Determines the destination.
-        3.  Renders the template.
-        4.  Formats the payload.
-        5.  Sends the notification.
-        6.  Handles errors and sends fallback messages.
+        3.  Drops repeats of an alert within the dedup window, and buffers
+            alerts that are sent as digests.
+        4.  Renders the template.
+        5.  Formats the payload.
+        6.  Sends the notification.
+        7.  Retries transient failures through the retry scheduler.
+        8.  Handles other errors and exhausted retries with fallback messages.
+
+        Raises:
+            DeliveryError: If both the notification and its fallback failed,
+            so the caller (e.g. KafkaManager) can dead-letter the message.
         """
-        provider_name = message.get("provider")
-        if not provider_name or provider_name not in self.providers:
+        if not isinstance(message, AlertMessage):
+            try:
+                message = AlertMessage.from_dict(message)
+            except InvalidMessageError as e:
+                logger.error(f"Invalid message: {e}")
+                return
+
+        provider_name = message.provider
+        if provider_name not in self.providers:
             logger.error(f"Invalid or missing provider: {provider_name}")
             return
 
         provider = self.providers[provider_name]
-        destination = message.get("destination") or provider.default_destination
+        destination = message.destination or provider.default_destination
 
         if not destination:
             logger.error(f"No destination found for provider '{provider_name}'.")
             return
 
-        template_name = message.get("template")
-        if not template_name:
-            logger.error(f"Invalid or missing template for provider '{provider_name}'.")
+        template_name = message.template
+
+        # Retries and digests re-deliver alerts that already passed these stages
+        first_delivery = RETRY_STATE_KEY not in message and DIGEST_MARKER_KEY not in message
+        if (
+            first_delivery
+            and self.deduplicator is not None
+            and not self.deduplicator.admit(message)
+        ):
+            logger.debug(f"Suppressed duplicate alert for '{provider_name}'.")
+            return
+
+        if (
+            first_delivery
+            and self.digest is not None
+            and self.digest.accepts(message)
+            and self._digest_template(provider, template_name) is not None
+        ):
+            self.digest.add(message)
             return
 
-        context = self._get_message_context(message)
+        context = message.context
 
         try:
             # 1. Apply template rules
             template_name = provider.apply_template_rules(template_name)
 
             # 2. Render template
-            rendered_content = self.renderer.render(template_name, context)
+            rendered_content = await self._render(template_name, context)
 
             # 3. Format payload
             metadata = context.get("_meta", {})
             payload = provider.format_payload(rendered_content, metadata)
 
             # 4. Send
-            await provider.send(destination, payload)
+            result = await provider.send(destination, payload)
+            if not result:
+                if isinstance(result, DeliveryReport):
+                    failed, transient = result.failed, result.retryable
+                else:
+                    failed, transient = destination, []
+                raise DeliveryError(
+                    f"Notification via {provider_name} failed for destinations {failed}.",
+                    failed,
+                    transient,
+                )
             logger.info(f"Notification sent successfully via {provider_name}.")
 
         except Exception as e:
@@ -65,10 +154,33 @@ class NotificationDispatcher:
                 f"Error processing notification for {provider_name}: {e}",
                 exc_info=True,
             )
+            # Only destinations that did not receive the notification get the fallback
+            fallback_destination = (
+                e.destinations if isinstance(e, DeliveryError) else destination
+            )
+            retry_destination, permanent_destination = self._split_retryable(
+                e, fallback_destination
+            )
+            if retry_destination and await self.retry_scheduler.schedule(
+                message, retry_destination, self.process
+            ):
+                logger.warning(
+                    f"Transient failure via {provider_name}. Retrying {retry_destination}."
+                )
+                if not permanent_destination:
+                    return
+                fallback_destination = permanent_destination
+
             try:
                 # 5. Handle fallback
                 fallback_payload = provider.get_fallback_payload(e, context)
-                await provider.send(destination, fallback_payload)
+                delivered = await provider.send(fallback_destination, fallback_payload)
+                FALLBACKS.labels(provider_name, "sent" if delivered else "failed").inc()
+                if not delivered:
+                    raise DeliveryError(
+                        f"Fallback via {provider_name} was not delivered.",
+                        fallback_destination,
+                    )
                 logger.info(
                     f"Fallback notification sent successfully via {provider_name}."
                 )
@@ -77,23 +189,139 @@ class NotificationDispatcher:
                     f"Failed to send fallback notification for {provider_name}: {fallback_error}",
                     exc_info=True,
                 )
+                raise DeliveryError(
+                    f"Notification and fallback via {provider_name} failed: {fallback_error}",
+                    fallback_destination,
+                ) from fallback_error
+
+    async def _render(
+        self, template_name: str, context: Dict[str, Any]
+    ) -> Union[Dict[str, Any], str]:
+        """Renders inline, or through the offloader for expensive templates."""
+        with RENDER_SECONDS.labels(template_name).time():
+            if self.render_offloader is not None:
+                return await self.render_offloader.render(template_name, context)
+            return self.renderer.render(template_name, context)
+
+    def _split_retryable(
+        self, error: Exception, destination: Union[str, List[str]]
+    ) -> Tuple[Union[str, List[str], None], Union[str, List[str], None]]:
+        """Splits failed destinations into (retryable, permanent) ones."""
+        if self.retry_scheduler is None:
+            return None, destination
+        if isinstance(error, DeliveryError):
+            if not error.transient:
+                return None, destination
+            failed = [destination] if isinstance(destination, str) else destination
+            permanent = [dest for dest in failed if dest not in error.transient]
+            return error.transient, permanent or None
+        if is_transient_error(error):
+            return destination, None
+        return None, destination
 
-    def _get_message_context(self, message: Dict[str, Any]) -> Dict[str, Any]:
-        """Extracts the rendering context and metadata from the message data."""
-        # Extract Kafka metadata if present
-        kafka_meta = message.get("_kafka_meta", {})
-        
-        data = message.get("data", {})
-        if isinstance(data, dict):
-            meta = data.pop("_mail_meta", {})
-            context = {k: v for k, v in data.items() if not k.startswith("_")}
-            context["_meta"] = meta
-            # Add Kafka metadata to context for fallback payloads
-            if kafka_meta:
-                context.update({
-                    "topic": kafka_meta.get("topic"),
-                    "partition": kafka_meta.get("partition"),
-                    "offset": kafka_meta.get("offset"),
-                })
-            return context
-        return {"data": data, **kafka_meta}
+    async def send_summary(
+        self, message: Dict[str, Any], summary: Dict[str, Any]
+    ) -> None:
+        """
+        Sends a "repeated N times" summary for alerts suppressed by the
+        deduplicator, to the destination of the first occurrence.
+        """
+        provider_name = message.get("provider")
+        provider = self.providers.get(provider_name)
+        if provider is None:
+            return
+        destination = message.get("destination") or provider.default_destination
+        payload = provider.get_summary_payload(summary)
+        if not destination or payload is None:
+            return
+        if await provider.send(destination, payload):
+            logger.info(
+                f"Sent summary of {summary['count']} suppressed alerts via {provider_name}."
+            )
+        else:
+            logger.error(f"Failed to send suppression summary via {provider_name}.")
+
+    async def send_digest(self, messages: List[Dict[str, Any]]) -> None:
+        """
+        Renders buffered alerts of one (provider, destination, template)
+        bucket into a single digest notification and sends it.
+
+        The digest template is `<template>_digest`, or `digest` in the same
+        directory. It receives `items` (each alert's rendering context),
+        `count`, `template` and `window`. A single alert is sent as-is.
+        """
+        first = messages[0]
+        if len(messages) == 1:
+            await self.process({**first, DIGEST_MARKER_KEY: True})
+            return
+
+        provider = self.providers[first["provider"]]
+        template_name = first["template"]
+        digest_template = self._digest_template(provider, template_name)
+        if digest_template is None:
+            # The digest template disappeared (hot reload): send one by one
+            await asyncio.gather(
+                *(self.process({**m, DIGEST_MARKER_KEY: True}) for m in messages)
+            )
+            return
+
+        first_data = first.get("data")
+        mail_meta = first_data.get("_mail_meta", {}) if isinstance(first_data, dict) else {}
+        subject = mail_meta.get("subject")
+        data = {
+            "items": [AlertMessage.from_dict(m).context for m in messages],
+            "count": len(messages),
+            "template": template_name,
+            "window": self.digest.window if self.digest else None,
+            "_mail_meta": {
+                **mail_meta,
+                "subject": f"[{len(messages)} alerts] {subject}"
+                if subject
+                else f"[Digest] {len(messages)} alerts",
+            },
+        }
+        logger.info(f"Sending digest of {len(messages)} '{template_name}' alerts.")
+        await self.process(
+            {
+                "provider": first["provider"],
+                "destination": first.get("destination"),
+                "template": digest_template,
+                "data": data,
+                "_kafka_meta": first.get("_kafka_meta", {}),
+                DIGEST_MARKER_KEY: True,
+            }
+        )
+
+    def _digest_template(self, provider: BaseProvider, template_name: str) -> Optional[str]:
+        """Returns the digest template for a template, or None if there is none."""
+        candidates = (
+            f"{template_name}_digest",
+            posixpath.join(posixpath.dirname(template_name), "digest"),
+        )
+        for candidate in candidates:
+            if self.renderer.has_template(provider.apply_template_rules(candidate)):
+                return candidate
+        return None
+
+    async def process_batch(self, records: List[ConsumerRecord]) -> None:
+        """
+        Processes the messages of a batch of records concurrently.
+
+        Used by batch callbacks; each msg.value goes through `process`.
+
+        Raises:
+            BatchCallbackError: If some messages could not be delivered, so
+            that KafkaManager dead-letters only their records.
+        """
+        results = await asyncio.gather(
+            *(self.process(record.value) for record in records), return_exceptions=True
+        )
+        failed = [
+            (record, result)
+            for record, result in zip(records, results)
+            if isinstance(result, Exception)
+        ]
+        if failed:
+            raise BatchCallbackError(
+                f"{len(failed)} of {len(records)} messages in the batch failed.", failed
+            )
@@ -0,0 +1,159 @@
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+Destination = Union[str, List[str]]
+
+# Keys with a dedicated slot; every other key is kept in `extra`
+_FIELDS = ("provider", "template", "destination", "data")
+_KAFKA_META_KEY = "_kafka_meta"
+
+
+class InvalidMessageError(ValueError):
+    """Raised when a decoded Kafka value is not a valid notification message."""
+
+
+class AlertMessage(Mapping):
+    """
+    A validated notification message.
+
+    Built once per Kafka record by `from_dict`, which checks the shape of
+    the decoded value so that invalid messages are rejected before any
+    callback task is scheduled. Fields live in slots instead of a
+    per-message dict. Keys without a slot, such as retry state, are kept
+    in `extra`.
+
+    The class is a read-only Mapping, so code that works on plain message
+    dicts (`.get`, `in`, `{**message}`) keeps working.
+    """
+
+    __slots__ = (
+        "provider",
+        "template",
+        "destination",
+        "data",
+        "kafka_meta",
+        "extra",
+        "_context",
+    )
+
+    def __init__(
+        self,
+        provider: str,
+        template: str,
+        destination: Optional[Destination] = None,
+        data: Any = None,
+        kafka_meta: Optional[Dict[str, Any]] = None,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.provider = provider
+        self.template = template
+        self.destination = destination
+        self.data = data if data is not None else {}
+        self.kafka_meta = kafka_meta
+        self.extra = extra or {}
+        self._context: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_dict(cls, value: Any) -> "AlertMessage":
+        """
+        Validates a decoded message value.
+
+        Raises:
+            InvalidMessageError: If the value is not an object, or `provider`,
+            `template` or `destination` have the wrong type.
+        """
+        if isinstance(value, AlertMessage):
+            return value
+        if not isinstance(value, dict):
+            raise InvalidMessageError(
+                f"Message must be a JSON object, not {type(value).__name__}"
+            )
+
+        provider = value.get("provider")
+        if not isinstance(provider, str) or not provider:
+            raise InvalidMessageError(f"Invalid or missing provider: {provider!r}")
+        template = value.get("template")
+        if not isinstance(template, str) or not template:
+            raise InvalidMessageError(f"Invalid or missing template: {template!r}")
+        destination = value.get("destination")
+        if destination is not None and not (
+            isinstance(destination, str)
+            or (isinstance(destination, list) and all(isinstance(d, str) for d in destination))
+        ):
+            raise InvalidMessageError(f"Invalid destination: {destination!r}")
+        kafka_meta = value.get(_KAFKA_META_KEY)
+
+        known = sum(1 for key in _FIELDS if key in value) + (_KAFKA_META_KEY in value)
+        if len(value) > known:
+            extra = {
+                key: item
+                for key, item in value.items()
+                if key not in _FIELDS and key != _KAFKA_META_KEY
+            }
+        else:
+            extra = None
+        return cls(provider, template, destination, value.get("data"), kafka_meta, extra)
+
+    def set_kafka_meta(self, topic: str, partition: int, offset: int) -> None:
+        """Records where the message was consumed from, for fallback payloads."""
+        self.kafka_meta = {"topic": topic, "partition": partition, "offset": offset}
+        self._context = None
+
+    @property
+    def context(self) -> Dict[str, Any]:
+        """
+        Returns the rendering context: public `data` fields, `_meta` (from
+        `data._mail_meta`) and the Kafka topic, partition and offset.
+
+        Built on first use and shared by every later render of the message.
+        """
+        if self._context is None:
+            self._context = self._build_context()
+        return self._context
+
+    def _build_context(self) -> Dict[str, Any]:
+        kafka_meta = self.kafka_meta or {}
+        data = self.data
+        if not isinstance(data, dict):
+            return {"data": data, **kafka_meta}
+        context = {k: v for k, v in data.items() if not k.startswith("_")}
+        context["_meta"] = data.get("_mail_meta", {})
+        # Kafka metadata is used by fallback payloads
+        if kafka_meta:
+            context["topic"] = kafka_meta.get("topic")
+            context["partition"] = kafka_meta.get("partition")
+            context["offset"] = kafka_meta.get("offset")
+        return context
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the message as a plain dict, e.g. to publish it again."""
+        return dict(self)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _FIELDS:
+            value = getattr(self, key)
+            if value is None:
+                raise KeyError(key)
+            return value
+        if key == _KAFKA_META_KEY:
+            if self.kafka_meta is None:
+                raise KeyError(key)
+            return self.kafka_meta
+        return self.extra[key]
+
+    def __iter__(self) -> Iterator[str]:
+        for key in _FIELDS:
+            if getattr(self, key) is not None:
+                yield key
+        if self.kafka_meta is not None:
+            yield _KAFKA_META_KEY
+        yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return (
+            f"AlertMessage(provider={self.provider!r}, template={self.template!r}, "
+            f"destination={self.destination!r})"
+        )
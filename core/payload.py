@@ -0,0 +1,78 @@
+import json
+from typing import Any, Dict, Optional
+
+
+class JsonPayload(dict):
+    """
+    A JSON object payload that carries its serialized body.
+
+    Produced by `TemplateRenderer` for `.json.j2` templates: the rendered text
+    is parsed once for validation, and that same text is kept as `body` so
+    webhook providers can post it without serializing the dict again.
+
+    Top-level mutations (item assignment, `update`, `pop`, ...) drop the
+    cached body, which is then re-serialized on next access. Mutating nested
+    values in place is not detected; call `invalidate` after doing so.
+    """
+
+    def __init__(self, *args: Any, body: Optional[bytes] = None, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._body = body
+
+    @property
+    def body(self) -> bytes:
+        """Returns the UTF-8 JSON body, serializing only if the payload changed."""
+        if self._body is None:
+            self._body = json.dumps(self, ensure_ascii=False).encode("utf-8")
+        return self._body
+
+    def invalidate(self) -> None:
+        """Drops the cached body after an in-place change to a nested value."""
+        self._body = None
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self._body = None
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: Any) -> None:
+        self._body = None
+        super().__delitem__(key)
+
+    def __ior__(self, other: Any) -> "JsonPayload":
+        self._body = None
+        return super().__ior__(other)
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        self._body = None
+        super().update(*args, **kwargs)
+
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        if key not in self:
+            self._body = None
+        return super().setdefault(key, default)
+
+    def pop(self, key: Any, *default: Any) -> Any:
+        self._body = None
+        return super().pop(key, *default)
+
+    def popitem(self) -> Any:
+        self._body = None
+        return super().popitem()
+
+    def clear(self) -> None:
+        self._body = None
+        super().clear()
+
+    def copy(self) -> "JsonPayload":
+        return JsonPayload(self, body=self._body)
+
+    def __reduce__(self):
+        # Keep the body when pickled, e.g. when rendered in a worker process
+        return (self.__class__, (dict(self),), {"_body": self._body})
+
+
+def json_body(payload: Dict[str, Any]) -> bytes:
+    """Returns the serialized JSON body of a payload, reusing a cached one."""
+    if isinstance(payload, JsonPayload):
+        return payload.body
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
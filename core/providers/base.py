@@ -1,5 +1,35 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Union, List, Optional
+from dataclasses import dataclass, field
+from typing import Dict, Any, Union, List, Optional, Set
+
+
+@dataclass
+class DeliveryReport:
+    """
+    Per-destination outcome of a multi-destination send.
+
+    Evaluates truthy only when every destination succeeded, so callers that
+    treat `send` as returning a bool keep working. `transient` holds the
+    failed destinations whose error is worth retrying (timeouts, 5xx, 429).
+    """
+
+    results: Dict[str, bool] = field(default_factory=dict)
+    transient: Set[str] = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return all(self.results.values())
+
+    @property
+    def succeeded(self) -> List[str]:
+        return [dest for dest, ok in self.results.items() if ok]
+
+    @property
+    def failed(self) -> List[str]:
+        return [dest for dest, ok in self.results.items() if not ok]
+
+    @property
+    def retryable(self) -> List[str]:
+        return [dest for dest in self.failed if dest in self.transient]
 
 
 class BaseProvider(ABC):
@@ -13,6 +43,22 @@ class BaseProvider(ABC):
         """
         return None
 
+    async def start(self) -> None:
+        """
+        Acquire long-lived resources (connection pools, sessions).
+
+        Called once from the application lifecycle before consuming starts.
+        """
+        pass
+
+    async def stop(self) -> None:
+        """
+        Release resources acquired in `start`.
+
+        Called once from the application lifecycle after consuming stops.
+        """
+        pass
+
     @abstractmethod
     def apply_template_rules(self, template_name: str) -> str:
         """
@@ -58,10 +104,27 @@ class BaseProvider(ABC):
         """
         pass
 
+    def get_summary_payload(
+        self, summary: Dict[str, Any]
+    ) -> Optional[Union[Dict[str, Any], str]]:
+        """
+        Generate a payload summarizing suppressed duplicate alerts.
+
+        Args:
+            summary: Contains 'template', 'key' (the fields identifying the
+                alert), 'count' (suppressed repeats), 'window' (seconds)
+                and 'topic'.
+
+        Returns:
+            Optional[Union[Dict[str, Any], str]]: The summary payload, or
+            None if the provider does not send summaries.
+        """
+        return None
+
     @abstractmethod
     async def send(
         self, destination: Union[str, List[str]], payload: Union[Dict[str, Any], str]
-    ) -> bool:
+    ) -> Union[bool, DeliveryReport]:
         """
         Send a message to the provider.
 
@@ -70,6 +133,7 @@ class BaseProvider(ABC):
             payload: The message content (Dict for JSON APIs, str for others).
 
         Returns:
-            bool: True if successful, False otherwise.
+            Union[bool, DeliveryReport]: Truthy if successful. Multi-destination
+            providers return a DeliveryReport with the outcome per destination.
         """
         pass
@@ -1,14 +1,16 @@
-import aiohttp
 import json
 from typing import Dict, Any, Union, List, Optional
-from .base import BaseProvider
+from .base import DeliveryReport
+from .webhook import WebhookProvider
 from utils.logger import LogManager
 from core.config import settings
 
 logger = LogManager.get_logger(__name__)
 
 
-class DiscordProvider(BaseProvider):
+class DiscordProvider(WebhookProvider):
+    display_name = "Discord"
+
     @property
     def default_destination(self) -> Optional[str]:
         return settings.DISCORD_WEBHOOK_URL
@@ -45,15 +47,29 @@ class DiscordProvider(BaseProvider):
             f"**Original Data:** ```json\n{context_str}\n```"
         }
 
+    def get_summary_payload(
+        self, summary: Dict[str, Any]
+    ) -> Optional[Union[Dict[str, Any], str]]:
+        key_str = json.dumps(summary.get("key", {}), ensure_ascii=False, default=str)
+        return {
+            "content": f"🔁 **Alert repeated {summary['count']} more times** "
+            f"in the last {summary['window']:g}s (suppressed).\n"
+            f"**Template:** {summary.get('template', 'N/A')}\n"
+            f"**Alert:** ```json\n{key_str}\n```"
+        }
+
     async def send(
         self, destination: Union[str, List[str]], payload: Union[Dict[str, Any], str]
-    ) -> bool:
+    ) -> Union[bool, DeliveryReport]:
         """
         Sends a message to a Discord Webhook.
 
         Args:
-            destination: Discord Webhook URL.
+            destination: Discord Webhook URL or list of URLs, posted concurrently.
             payload: JSON payload (dict).
+
+        Returns:
+            DeliveryReport: Outcome per destination URL.
         """
         if not isinstance(payload, dict):
             logger.error("DiscordProvider requires a dict payload.")
@@ -64,22 +80,4 @@ class DiscordProvider(BaseProvider):
         else:
             destinations = destination
 
-        results = []
-        for dest in destinations:
-            try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(dest, json=payload) as response:
-                        if 200 <= response.status < 300:
-                            logger.info(f"Discord message sent successfully to {dest}.")
-                            results.append(True)
-                        else:
-                            text = await response.text()
-                            logger.error(
-                                f"Failed to send Discord message to {dest}. Status: {response.status}, Response: {text}"
-                            )
-                            results.append(False)
-            except Exception as e:
-                logger.error(f"Exception sending Discord message to {dest}: {e}")
-                results.append(False)
-
-        return all(results)
+        return await self._deliver(destinations, payload)
@@ -1,16 +1,71 @@
 from typing import Dict, Any, Union, List, Optional
 from email.message import EmailMessage
-import aiosmtplib
+import html
 import json
+import time
 
-from .base import BaseProvider
+from .base import BaseProvider, DeliveryReport
+from .email_batcher import EmailBatcher
+from .smtp_pool import SMTPConnectionPool
 from utils.logger import LogManager
+from utils.metrics import SEND_SECONDS
+from core.retry import is_transient_error
 from core.config import settings
 
 logger = LogManager.get_logger(__name__)
 
 
 class EmailProvider(BaseProvider):
+    def __init__(self) -> None:
+        self._pool: Optional[SMTPConnectionPool] = None
+        self._batcher: Optional[EmailBatcher] = None
+
+    async def start(self) -> None:
+        """Creates the SMTP connection pool."""
+        if self._pool is None:
+            self._pool = self._create_pool()
+
+    async def stop(self) -> None:
+        """Flushes pending batches and closes pooled SMTP connections."""
+        if self._batcher is not None:
+            await self._batcher.close()
+            self._batcher = None
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    @property
+    def pool(self) -> SMTPConnectionPool:
+        """Returns the SMTP pool, creating it lazily if `start` was not called."""
+        if self._pool is None:
+            self._pool = self._create_pool()
+        return self._pool
+
+    @property
+    def batcher(self) -> EmailBatcher:
+        """Returns the email batcher, creating it lazily on first use."""
+        if self._batcher is None:
+            config = settings.EMAIL_CONFIG
+            self._batcher = EmailBatcher(
+                self.pool,
+                window=config.BATCH_WINDOW_MS / 1000,
+                max_size=config.BATCH_MAX_SIZE,
+            )
+        return self._batcher
+
+    def _create_pool(self) -> SMTPConnectionPool:
+        config = settings.EMAIL_CONFIG
+        return SMTPConnectionPool(
+            hostname=config.SMTP_HOST,
+            port=config.SMTP_PORT,
+            username=config.SMTP_USER,
+            password=config.SMTP_PASSWORD,
+            use_tls=config.USE_TLS,
+            max_size=config.POOL_SIZE,
+            idle_timeout=config.POOL_IDLE_TIMEOUT,
+            timeout=config.SMTP_TIMEOUT,
+        )
+
     @property
     def default_destination(self) -> Optional[str]:
         return settings.EMAIL_CONFIG.DEFAULT_TO_EMAIL
@@ -50,15 +105,36 @@ class EmailProvider(BaseProvider):
         )
         return {"subject": subject, "body": body}
 
+    def get_summary_payload(
+        self, summary: Dict[str, Any]
+    ) -> Optional[Union[Dict[str, Any], str]]:
+        key_str = html.escape(
+            json.dumps(summary.get("key", {}), indent=2, ensure_ascii=False, default=str)
+        )
+        subject = (
+            f"🔁 Alert repeated {summary['count']} times: {summary.get('template', 'N/A')}"
+        )
+        body = (
+            f"<p>The following alert was repeated <strong>{summary['count']}</strong> more "
+            f"times in the last {summary['window']:g}s. The repeats were suppressed.</p>"
+            f"<pre>{key_str}</pre>"
+        )
+        return {"subject": subject, "body": body}
+
     async def send(
         self, destination: Union[str, List[str]], payload: Union[Dict[str, Any], str]
-    ) -> bool:
+    ) -> Union[bool, DeliveryReport]:
         """
-        Sends an email via SMTP using aiosmtplib.
+        Sends an email over a pooled SMTP connection.
 
         Args:
             destination: Target email address.
             payload: Dict containing 'subject', 'body', and 'meta'.
+
+        Returns:
+            Union[bool, DeliveryReport]: True on success. A transient SMTP
+            failure returns a DeliveryReport marking the To addresses as
+            retryable.
         """
         if (
             not isinstance(payload, dict)
@@ -92,29 +168,29 @@ class EmailProvider(BaseProvider):
         # Bcc
         bcc_emails = meta.get("bcc", [])
 
-        all_recipients = to_emails + cc_emails + bcc_emails
+        # Deduplicate while keeping order so nobody receives the mail twice
+        all_recipients = list(dict.fromkeys(to_emails + cc_emails + bcc_emails))
 
         message["Subject"] = subject
         message.set_content(body, subtype="html")
 
+        host = settings.EMAIL_CONFIG.SMTP_HOST
+        started = time.perf_counter()
         try:
-            logger.info(
-                f"Connecting to SMTP server {settings.EMAIL_CONFIG.SMTP_HOST}:{settings.EMAIL_CONFIG.SMTP_PORT}..."
-            )
-
-            await aiosmtplib.send(
-                message,
-                recipients=all_recipients,
-                hostname=settings.EMAIL_CONFIG.SMTP_HOST,
-                port=settings.EMAIL_CONFIG.SMTP_PORT,
-                username=settings.EMAIL_CONFIG.SMTP_USER,
-                password=settings.EMAIL_CONFIG.SMTP_PASSWORD,
-                use_tls=settings.EMAIL_CONFIG.USE_TLS,
-            )
+            if settings.EMAIL_CONFIG.BATCH_ENABLED:
+                await self.batcher.submit(message, recipients=all_recipients)
+            else:
+                await self.pool.send_message(message, recipients=all_recipients)
 
+            SEND_SECONDS.labels("email", host, "ok").observe(time.perf_counter() - started)
             logger.info(f"Email sent successfully to {all_recipients}")
             return True
 
         except Exception as e:
-            logger.error(f"Failed to send email to {all_recipients}: {e}")
+            SEND_SECONDS.labels("email", host, "error").observe(time.perf_counter() - started)
+            logger.error(f"Failed to send email to {all_recipients}: {e!r}")
+            if is_transient_error(e):
+                return DeliveryReport(
+                    results={to: False for to in to_emails}, transient=set(to_emails)
+                )
             return False
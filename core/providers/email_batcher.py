@@ -0,0 +1,106 @@
+import asyncio
+from email.message import EmailMessage
+from typing import List, Optional, Set, Tuple
+
+import aiosmtplib
+
+from .smtp_pool import _RECONNECT_ERRORS, SMTPConnectionPool
+from utils.logger import LogManager
+
+logger = LogManager.get_logger(__name__)
+
+_PendingEmail = Tuple[EmailMessage, List[str], "asyncio.Future[None]"]
+
+
+class EmailBatcher:
+    """
+    Collects outgoing emails for a short window and sends each batch over a
+    single pooled SMTP session.
+
+    A batch is flushed when it reaches `max_size` messages or when `window`
+    seconds have passed since its first message, whichever comes first.
+    Each `submit` call resolves once its own message has been accepted by
+    the relay, or raises the error reported for that message.
+    """
+
+    def __init__(
+        self, pool: SMTPConnectionPool, window: float = 0.2, max_size: int = 50
+    ) -> None:
+        self._pool = pool
+        self._window = window
+        self._max_size = max(1, max_size)
+
+        self._pending: List[_PendingEmail] = []
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        self._inflight: Set[asyncio.Task[None]] = set()
+
+    async def submit(self, message: EmailMessage, recipients: List[str]) -> None:
+        """Queues a message for the next batch and waits until it is sent."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[None] = loop.create_future()
+        self._pending.append((message, recipients, future))
+
+        if len(self._pending) >= self._max_size:
+            self._flush()
+        elif self._flush_timer is None:
+            self._flush_timer = loop.call_later(self._window, self._flush)
+
+        await future
+
+    def _flush(self) -> None:
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.create_task(self._send_batch(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _send_batch(self, batch: List[_PendingEmail]) -> None:
+        logger.info(f"Sending batch of {len(batch)} email(s) over one SMTP session.")
+        remaining = list(batch)
+        try:
+            try:
+                await self._send_over_session(remaining)
+            except _RECONNECT_ERRORS as e:
+                # Like SMTPConnectionPool.send_message, retry once on a new session
+                logger.warning(
+                    f"SMTP session lost with {len(remaining)} email(s) left in batch ({e}). "
+                    "Reconnecting and retrying..."
+                )
+                await self._send_over_session(remaining)
+        except Exception as e:
+            logger.error(
+                f"SMTP session failed with {len(remaining)} email(s) left in batch: {e}"
+            )
+            for _, _, future in remaining:
+                if not future.done():
+                    future.set_exception(e)
+
+    async def _send_over_session(self, remaining: List[_PendingEmail]) -> None:
+        """Sends `remaining` in order over one session, removing each message once handled."""
+        async with self._pool.connection() as client:
+            while remaining:
+                message, recipients, future = remaining[0]
+                if not future.cancelled():
+                    try:
+                        await client.send_message(message, recipients=recipients)
+                        if not future.done():
+                            future.set_result(None)
+                    except (
+                        aiosmtplib.SMTPResponseException,
+                        aiosmtplib.SMTPRecipientsRefused,
+                    ) as e:
+                        # Message-level rejection; the session is still usable.
+                        if not future.done():
+                            future.set_exception(e)
+                remaining.pop(0)
+
+    async def close(self) -> None:
+        """Flushes pending messages and waits for in-flight batches."""
+        self._flush()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
@@ -0,0 +1,114 @@
+import asyncio
+import time
+from typing import Dict, Mapping, Optional
+
+
+class _Bucket:
+    """Fixed-window token bucket state for a single webhook URL."""
+
+    __slots__ = ("limit", "remaining", "window", "reset_at")
+
+    def __init__(self, limit: int, window: float) -> None:
+        self.limit = limit
+        self.remaining = limit
+        self.window = window
+        self.reset_at = 0.0
+
+    def refill(self, now: float) -> None:
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = now + self.window
+
+
+class WebhookRateLimiter:
+    """
+    Paces webhook requests per URL using limits learned from responses.
+
+    Each webhook starts with a conservative default bucket
+    (`default_limit` requests per `default_window` seconds). Discord's
+    `X-RateLimit-Limit/Remaining/Reset-After` headers replace the defaults
+    with the real bucket state, and a 429 `Retry-After` (Discord or Slack)
+    blocks the bucket, or every bucket when `X-RateLimit-Global` is set,
+    until the advertised delay has passed.
+    """
+
+    def __init__(self, default_limit: int = 5, default_window: float = 2.0) -> None:
+        self._default_limit = max(1, default_limit)
+        self._default_window = default_window
+        self._buckets: Dict[str, _Bucket] = {}
+        self._global_blocked_until = 0.0
+
+    def _bucket(self, url: str) -> _Bucket:
+        bucket = self._buckets.get(url)
+        if bucket is None:
+            bucket = _Bucket(self._default_limit, self._default_window)
+            self._buckets[url] = bucket
+        return bucket
+
+    async def acquire(self, url: str) -> None:
+        """Waits until a request to `url` is allowed and consumes one token."""
+        bucket = self._bucket(url)
+        while True:
+            now = time.monotonic()
+            if now < self._global_blocked_until:
+                await asyncio.sleep(self._global_blocked_until - now)
+                continue
+            bucket.refill(now)
+            if bucket.remaining > 0:
+                bucket.remaining -= 1
+                return
+            await asyncio.sleep(bucket.reset_at - now)
+
+    def update(
+        self, url: str, status: int, headers: Mapping[str, str]
+    ) -> Optional[float]:
+        """
+        Learns bucket state from a webhook response.
+
+        Args:
+            url: The webhook URL the response belongs to.
+            status: HTTP status code of the response.
+            headers: Response headers.
+
+        Returns:
+            Optional[float]: Seconds to wait before retrying if the request
+            was rate limited (429), otherwise None.
+        """
+        now = time.monotonic()
+        bucket = self._bucket(url)
+
+        limit = _parse_float(headers.get("X-RateLimit-Limit"))
+        remaining = _parse_float(headers.get("X-RateLimit-Remaining"))
+        reset_after = _parse_float(headers.get("X-RateLimit-Reset-After"))
+        if limit is not None and limit >= 1:
+            bucket.limit = int(limit)
+        if reset_after is not None:
+            bucket.reset_at = now + reset_after
+            if remaining is not None and int(remaining) == bucket.limit - 1:
+                # A fresh window: reset-after spans (almost) the whole window
+                bucket.window = max(reset_after, 0.001)
+        if remaining is not None:
+            bucket.remaining = min(bucket.remaining, int(remaining))
+
+        if status != 429:
+            return None
+
+        retry_after = _parse_float(headers.get("Retry-After"))
+        if retry_after is None:
+            retry_after = reset_after if reset_after is not None else bucket.window
+        if headers.get("X-RateLimit-Global", "").lower() == "true":
+            self._global_blocked_until = max(
+                self._global_blocked_until, now + retry_after
+            )
+        bucket.remaining = 0
+        bucket.reset_at = now + retry_after
+        return retry_after
+
+
+def _parse_float(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
@@ -1,14 +1,16 @@
-import aiohttp
 import json
 from typing import Dict, Any, Union, List, Optional
-from .base import BaseProvider
+from .base import DeliveryReport
+from .webhook import WebhookProvider
 from utils.logger import LogManager
 from core.config import settings
 
 logger = LogManager.get_logger(__name__)
 
 
-class SlackProvider(BaseProvider):
+class SlackProvider(WebhookProvider):
+    display_name = "Slack"
+
     @property
     def default_destination(self) -> Optional[str]:
         return settings.SLACK_WEBHOOK_URL
@@ -73,15 +75,39 @@ class SlackProvider(BaseProvider):
             ],
         }
 
+    def get_summary_payload(
+        self, summary: Dict[str, Any]
+    ) -> Optional[Union[Dict[str, Any], str]]:
+        key_str = json.dumps(summary.get("key", {}), ensure_ascii=False, default=str)
+        return {
+            "text": f"🔁 Alert repeated {summary['count']} more times in the last "
+            f"{summary['window']:g}s (suppressed).",
+            "blocks": [
+                {
+                    "type": "section",
+                    "text": {
+                        "type": "mrkdwn",
+                        "text": f"*Alert repeated {summary['count']} more times* "
+                        f"in the last {summary['window']:g}s (suppressed).\n"
+                        f"*Template:* {summary.get('template', 'N/A')}\n"
+                        f"```{key_str}```",
+                    },
+                }
+            ],
+        }
+
     async def send(
         self, destination: Union[str, List[str]], payload: Union[Dict[str, Any], str]
-    ) -> bool:
+    ) -> Union[bool, DeliveryReport]:
         """
         Sends a message to a Slack Webhook.
 
         Args:
-            destination: Slack Webhook URL.
+            destination: Slack Webhook URL or list of URLs, posted concurrently.
             payload: JSON payload (dict) usually containing 'text' or 'blocks'.
+
+        Returns:
+            DeliveryReport: Outcome per destination URL.
         """
         if not isinstance(payload, dict):
             # Fallback if string is passed
@@ -92,22 +118,4 @@ class SlackProvider(BaseProvider):
         else:
             destinations = destination
 
-        results = []
-        for dest in destinations:
-            try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(dest, json=payload) as response:
-                        if 200 <= response.status < 300:
-                            logger.info(f"Slack message sent successfully to {dest}.")
-                            results.append(True)
-                        else:
-                            text = await response.text()
-                            logger.error(
-                                f"Failed to send Slack message to {dest}. Status: {response.status}, Response: {text}"
-                            )
-                            results.append(False)
-            except Exception as e:
-                logger.error(f"Exception sending Slack message to {dest}: {e}")
-                results.append(False)
-
-        return all(results)
+        return await self._deliver(destinations, payload)
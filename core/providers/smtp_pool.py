@@ -0,0 +1,147 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from email.message import EmailMessage
+from typing import AsyncIterator, Deque, List, Optional, Tuple
+
+import aiosmtplib
+
+from utils.logger import LogManager
+
+logger = LogManager.get_logger(__name__)
+
+# Errors after which a pooled connection is considered stale and is replaced.
+_RECONNECT_ERRORS = (aiosmtplib.SMTPServerDisconnected, ConnectionError)
+
+
+class SMTPConnectionPool:
+    """
+    Bounded pool of connected and authenticated `aiosmtplib.SMTP` clients.
+
+    Idle connections are reused most-recently-used first. Before reuse a
+    connection is dropped if it has been idle longer than `idle_timeout`,
+    otherwise it is health-checked with NOOP and replaced on failure.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = False,
+        max_size: int = 5,
+        idle_timeout: float = 60.0,
+        timeout: float = 30.0,
+    ) -> None:
+        self._hostname = hostname
+        self._port = port
+        self._username = username
+        self._password = password
+        self._use_tls = use_tls
+        self._idle_timeout = idle_timeout
+        self._timeout = timeout
+
+        self._idle: Deque[Tuple[aiosmtplib.SMTP, float]] = deque()
+        self._slots = asyncio.Semaphore(max_size)
+        self._closed = False
+
+    @property
+    def idle_count(self) -> int:
+        """Returns the number of idle connections ready for reuse."""
+        return len(self._idle)
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        logger.info(f"Connecting to SMTP server {self._hostname}:{self._port}...")
+        client = aiosmtplib.SMTP(
+            hostname=self._hostname,
+            port=self._port,
+            username=self._username,
+            password=self._password,
+            use_tls=self._use_tls,
+            timeout=self._timeout,
+        )
+        # connect() also runs STARTTLS and login when configured.
+        await client.connect()
+        return client
+
+    async def _discard(self, client: aiosmtplib.SMTP) -> None:
+        try:
+            if client.is_connected:
+                await client.quit()
+        except Exception as e:
+            logger.debug(f"Error while closing SMTP connection: {e}")
+            client.close()
+
+    async def _acquire(self) -> aiosmtplib.SMTP:
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                client, last_used = self._idle.pop()
+                if (
+                    time.monotonic() - last_used > self._idle_timeout
+                    or not client.is_connected
+                ):
+                    await self._discard(client)
+                    continue
+                try:
+                    await client.noop()
+                    return client
+                except (aiosmtplib.SMTPException, OSError) as e:
+                    logger.info(f"Pooled SMTP connection failed health check: {e}")
+                    await self._discard(client)
+            return await self._connect()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def _release(self, client: aiosmtplib.SMTP, reusable: bool) -> None:
+        try:
+            if reusable and not self._closed and client.is_connected:
+                self._idle.append((client, time.monotonic()))
+            else:
+                await self._discard(client)
+        finally:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosmtplib.SMTP]:
+        """
+        Borrows a healthy connection for the duration of the block.
+
+        The connection is returned to the pool unless the block raised.
+        """
+        if self._closed:
+            raise RuntimeError("SMTP connection pool is closed.")
+        client = await self._acquire()
+        reusable = False
+        try:
+            yield client
+            reusable = True
+        finally:
+            await self._release(client, reusable)
+
+    async def send_message(
+        self, message: EmailMessage, recipients: List[str]
+    ) -> None:
+        """
+        Sends a message over a pooled connection.
+
+        If the borrowed connection turns out to be stale, it is dropped and
+        the send is retried once on another (health-checked or new) connection.
+        """
+        try:
+            async with self.connection() as client:
+                await client.send_message(message, recipients=recipients)
+        except _RECONNECT_ERRORS as e:
+            logger.warning(f"SMTP connection lost ({e}). Reconnecting and retrying...")
+            async with self.connection() as client:
+                await client.send_message(message, recipients=recipients)
+
+    async def close(self) -> None:
+        """Closes every idle connection and rejects further use."""
+        self._closed = True
+        while self._idle:
+            client, _ = self._idle.pop()
+            await self._discard(client)
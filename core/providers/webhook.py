@@ -0,0 +1,166 @@
+import asyncio
+import time
+import aiohttp
+from urllib.parse import urlsplit
+from typing import Dict, Any, List, Optional, Tuple
+from .base import BaseProvider, DeliveryReport
+from core.payload import JsonPayload, json_body
+from .rate_limit import WebhookRateLimiter
+from utils.logger import LogManager
+from core.retry import is_transient_error, is_transient_status
+from core.config import settings
+from utils.priority import PriorityLanes, current_priority
+from utils.metrics import SEND_SECONDS
+
+logger = LogManager.get_logger(__name__)
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+class WebhookProvider(BaseProvider):
+    """
+    Base class for JSON webhook providers.
+
+    Holds a single long-lived aiohttp session so that every message reuses
+    pooled keep-alive connections instead of paying a fresh DNS lookup,
+    TCP connect and TLS handshake. Multi-destination sends fan out in
+    parallel, bounded per provider by WEBHOOK_CONFIG.MAX_CONCURRENCY and
+    served in the priority lane of the message being processed.
+    Requests are paced per webhook URL by a WebhookRateLimiter, and 429
+    responses are retried after the advertised delay.
+    """
+
+    display_name: str = "Webhook"
+
+    def __init__(self) -> None:
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Split into priority lanes when PRIORITY_CONFIG is enabled
+        self._send_slots = PriorityLanes.from_config(settings.WEBHOOK_CONFIG.MAX_CONCURRENCY)
+        self._rate_limiter = WebhookRateLimiter(
+            default_limit=settings.WEBHOOK_CONFIG.RATE_LIMIT_DEFAULT_LIMIT,
+            default_window=settings.WEBHOOK_CONFIG.RATE_LIMIT_DEFAULT_WINDOW,
+        )
+
+    async def start(self) -> None:
+        """Opens the pooled HTTP session."""
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+            logger.info(f"{self.display_name} HTTP session opened.")
+
+    async def stop(self) -> None:
+        """Closes the pooled HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.info(f"{self.display_name} HTTP session closed.")
+        self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Returns the pooled session, opening it lazily if `start` was not called."""
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+        return self._session
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        config = settings.WEBHOOK_CONFIG
+        connector = aiohttp.TCPConnector(
+            limit=config.POOL_SIZE,
+            limit_per_host=config.POOL_SIZE_PER_HOST,
+            ttl_dns_cache=config.DNS_CACHE_TTL,
+            keepalive_timeout=config.KEEPALIVE_TIMEOUT,
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=config.REQUEST_TIMEOUT),
+        )
+
+    async def _post(self, dest: str, payload: Dict[str, Any]) -> Tuple[bool, bool]:
+        """
+        Posts a JSON payload to a single webhook URL.
+
+        Waits for the URL's rate-limit bucket before each attempt and retries
+        429 responses up to RATE_LIMIT_MAX_RETRIES times. The body is
+        serialized once and reused across retries; a JsonPayload from the
+        renderer is posted without serializing at all.
+
+        Returns:
+            Tuple[bool, bool]: Whether the message was delivered, and whether
+            a failure is transient and worth retrying later.
+        """
+        config = settings.WEBHOOK_CONFIG
+        body = json_body(payload)
+        host = urlsplit(dest).hostname or "unknown"
+        retries = 0
+        while True:
+            started = None
+            try:
+                await self._rate_limiter.acquire(dest)
+                async with self._send_slots.slot(current_priority.get()):
+                    started = time.perf_counter()
+                    async with self.session.post(
+                        dest, data=body, headers=_JSON_HEADERS
+                    ) as response:
+                        self._observe_send(host, response.status, started)
+                        started = None
+                        retry_after = self._rate_limiter.update(
+                            dest, response.status, response.headers
+                        )
+                        if 200 <= response.status < 300:
+                            logger.info(
+                                f"{self.display_name} message sent successfully to {dest}."
+                            )
+                            return True, False
+                        text = await response.text()
+            except Exception as e:
+                if started is not None:
+                    # The request failed before a response arrived
+                    self._observe_send(host, "error", started)
+                logger.error(
+                    f"Exception sending {self.display_name} message to {dest}: {e!r}"
+                )
+                return False, is_transient_error(e)
+
+            if (
+                retry_after is not None
+                and retries < config.RATE_LIMIT_MAX_RETRIES
+                and retry_after <= config.RATE_LIMIT_MAX_WAIT
+            ):
+                retries += 1
+                logger.warning(
+                    f"{self.display_name} webhook {dest} rate limited. Retrying in {retry_after:.2f}s..."
+                )
+                continue
+
+            # Not rate limited, or out of 429 retries
+            logger.error(
+                f"Failed to send {self.display_name} message to {dest}. Status: {response.status}, Response: {text}"
+            )
+            return False, is_transient_status(response.status)
+
+    def _observe_send(self, host: str, status: object, started: float) -> None:
+        SEND_SECONDS.labels(self.display_name.lower(), host, status).observe(
+            time.perf_counter() - started
+        )
+
+    async def _deliver(
+        self, destinations: List[str], payload: Dict[str, Any]
+    ) -> DeliveryReport:
+        """Posts the payload to every destination concurrently."""
+        # The body is serialized on first use and shared by the whole fan-out
+        if not isinstance(payload, JsonPayload):
+            payload = JsonPayload(payload)
+        unique_destinations = list(dict.fromkeys(destinations))
+        outcomes = await asyncio.gather(
+            *(self._post(dest, payload) for dest in unique_destinations)
+        )
+        return DeliveryReport(
+            results={
+                dest: delivered
+                for dest, (delivered, _) in zip(unique_destinations, outcomes)
+            },
+            transient={
+                dest
+                for dest, (delivered, transient) in zip(unique_destinations, outcomes)
+                if not delivered and transient
+            },
+        )
@@ -0,0 +1,220 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Literal, Optional, Tuple, Union
+
+from jinja2 import TemplateError
+
+from .renderer import TemplateRenderer
+from utils.logger import LogManager
+
+logger = LogManager.get_logger(__name__)
+
+RenderResult = Union[Dict[str, Any], str]
+
+# Renderer of a worker process, created by _init_worker
+_worker_renderer: Optional[TemplateRenderer] = None
+
+# Environment of spawned workers: the custom rotation of LOG_DIR files is not
+# safe across processes, so workers log to stderr and errors reach the parent
+_WORKER_ENV = {"APP_CONFIG__LOG_STDERR_ONLY": "true"}
+
+
+class RenderTimeoutError(TemplateError):
+    """Raised when an offloaded render does not finish within the timeout."""
+
+
+def _init_worker(template_dir: str, cache_size: int, cache_ttl: Optional[float]) -> None:
+    """Process pool initializer: compiles every template once per worker."""
+    global _worker_renderer
+    _worker_renderer = TemplateRenderer(
+        template_dir=template_dir,
+        precompile=True,
+        cache_size=cache_size,
+        cache_ttl=cache_ttl,
+    )
+
+
+def _warm_up() -> None:
+    """No-op task that forces a worker process (and its initializer) to start."""
+
+
+@contextmanager
+def _environ(overrides: Dict[str, str]) -> Iterator[None]:
+    """Applies environment overrides to processes spawned within the block."""
+    saved = {key: os.environ.get(key) for key in overrides}
+    os.environ.update(overrides)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def _render_in_worker(template_name: str, data: Dict[str, Any]) -> Tuple[RenderResult, float]:
+    started = time.perf_counter()
+    result = _worker_renderer.render(template_name, data)
+    return result, time.perf_counter() - started
+
+
+class RenderOffloader:
+    """
+    Moves expensive template renders off the event loop.
+
+    Every template is rendered inline at first, and its render time is
+    tracked as an exponentially weighted moving average. Once the average
+    exceeds `threshold_ms`, renders of that template go to an executor,
+    while cheap templates keep rendering inline without the hand-off cost.
+
+    With the "process" executor, each worker compiles all templates when it
+    starts and logs to stderr only. The pool is recreated after the renderer
+    hot-reloads. An offloaded render that exceeds `timeout` raises
+    RenderTimeoutError; a process pool is then replaced, so the worker busy
+    with the abandoned render exits once it is done instead of holding a slot.
+    """
+
+    def __init__(
+        self,
+        renderer: TemplateRenderer,
+        executor: Literal["process", "thread"] = "process",
+        max_workers: int = 2,
+        threshold_ms: float = 5.0,
+        timeout: float = 5.0,
+        smoothing: float = 0.2,
+    ) -> None:
+        self.renderer = renderer
+        self.executor_kind = executor
+        self.max_workers = max_workers
+        self.threshold = threshold_ms / 1000
+        self.timeout = timeout
+        self.smoothing = smoothing
+        self._render_times: Dict[str, float] = {}
+        self._executor: Optional[Executor] = None
+        self._executor_version = -1
+        # Starts the workers of the current process pool
+        self._warm_ups: List[Future] = []
+
+    def average_render_time(self, template_name: str) -> Optional[float]:
+        """Returns the smoothed render time of a template in seconds, if measured."""
+        return self._render_times.get(template_name)
+
+    async def start(self) -> None:
+        """Creates the executor and starts its workers ahead of the first render."""
+        executor = self._get_executor()
+        if isinstance(executor, ProcessPoolExecutor):
+            await self._wait_started()
+            logger.info(f"Started {self.max_workers} template render worker processes.")
+
+    async def stop(self) -> None:
+        """Shuts the executor down, dropping renders that have not started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._warm_ups = []
+
+    async def render(self, template_name: str, data: Dict[str, Any]) -> RenderResult:
+        """
+        Renders a template inline or in the executor, depending on its cost.
+
+        Raises:
+            RenderTimeoutError: If an offloaded render exceeds the timeout.
+        """
+        average = self._render_times.get(template_name)
+        if average is None or average < self.threshold:
+            started = time.perf_counter()
+            result = self.renderer.render(template_name, data)
+            self._record(template_name, time.perf_counter() - started)
+            return result
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        if isinstance(executor, ProcessPoolExecutor):
+            # Starting a new pool does not count against the render timeout
+            await self._wait_started()
+            # The pool may have been replaced meanwhile
+            executor = self._get_executor()
+            future = loop.run_in_executor(executor, _render_in_worker, template_name, data)
+        else:
+            future = loop.run_in_executor(executor, self._render_timed, template_name, data)
+        try:
+            result, elapsed = await asyncio.wait_for(future, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            if executor is self._executor and isinstance(executor, ProcessPoolExecutor):
+                logger.warning(
+                    f"Rendering '{template_name}' timed out. Restarting render worker processes."
+                )
+                # Renders already queued still finish in the old pool
+                executor.shutdown(wait=False)
+                self._executor = None
+            raise RenderTimeoutError(
+                f"Rendering '{template_name}' took longer than {self.timeout}s"
+            ) from None
+        self._record(template_name, elapsed)
+        return result
+
+    async def _wait_started(self) -> None:
+        if not all(warm_up.done() for warm_up in self._warm_ups):
+            await asyncio.gather(*(asyncio.wrap_future(warm_up) for warm_up in self._warm_ups))
+
+    def _render_timed(
+        self, template_name: str, data: Dict[str, Any]
+    ) -> Tuple[RenderResult, float]:
+        started = time.perf_counter()
+        result = self.renderer.render(template_name, data)
+        return result, time.perf_counter() - started
+
+    def _record(self, template_name: str, elapsed: float) -> None:
+        average = self._render_times.get(template_name)
+        if average is None:
+            self._render_times[template_name] = elapsed
+        else:
+            self._render_times[template_name] = (
+                self.smoothing * elapsed + (1 - self.smoothing) * average
+            )
+        if (average is None or average < self.threshold) and self._render_times[
+            template_name
+        ] >= self.threshold:
+            logger.info(
+                f"Template '{template_name}' averages "
+                f"{self._render_times[template_name] * 1000:.1f} ms. Offloading its renders."
+            )
+
+    def _get_executor(self) -> Executor:
+        if self.executor_kind == "thread":
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="render"
+                )
+            return self._executor
+
+        # Worker processes hold compiled templates: replace them after a reload
+        if self._executor is not None and self._executor_version != self.renderer.version:
+            logger.info("Templates reloaded. Restarting render worker processes.")
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._executor is None:
+            cache = self.renderer.render_cache
+            executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                # Forking a process that runs an event loop and threads is unsafe
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(
+                    self.renderer.template_dir,
+                    cache.max_size if cache else 0,
+                    cache.ttl if cache else None,
+                ),
+            )
+            # Workers are spawned by submit; start them all while the
+            # environment override applies
+            with _environ(_WORKER_ENV):
+                self._warm_ups = [executor.submit(_warm_up) for _ in range(self.max_workers)]
+            self._executor = executor
+            self._executor_version = self.renderer.version
+        return self._executor
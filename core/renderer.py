@@ -1,41 +1,257 @@
+import asyncio
+import copy
+import hashlib
 import json
-from jinja2 import Environment, FileSystemLoader, TemplateNotFound, TemplateError
-from typing import Dict, Any, Union
+import os
+import time
+from jinja2 import (
+    Environment,
+    FileSystemLoader,
+    Template,
+    TemplateNotFound,
+    TemplateError,
+    meta,
+)
+from typing import Dict, Any, FrozenSet, Optional, Tuple, Union
 from utils.logger import LogManager
+from utils.ttl_cache import TTLCache
+from .payload import JsonPayload
 
 logger = LogManager.get_logger(__name__)
 
+# Per-record fields added by AlertMessage.context.
+# They differ for every message, so they are left out of render cache keys.
+KAFKA_CONTEXT_FIELDS: FrozenSet[str] = frozenset({"topic", "partition", "offset"})
+
 
 class TemplateRenderer:
-    def __init__(self, template_dir: str = "templates"):
+    """
+    Renders Jinja2 templates from `template_dir`.
+
+    By default templates are loaded lazily through the Jinja2 loader. With
+    `precompile=True` every template is compiled once at construction and
+    renders are served from an in-memory cache without touching the
+    filesystem. `watch_interval` then enables a polling watcher (started by
+    `start`) that recompiles the directory when a file changes and swaps
+    the cache in a single assignment, so renders never see a partial reload.
+
+    `cache_size` > 0 memoizes rendered output in an LRU cache with a TTL of
+    `cache_ttl` seconds, keyed on the template and a hash of the context.
+    The Kafka fields in KAFKA_CONTEXT_FIELDS are left out of the key once
+    analysis of the template (at compile time, or on first use when loading
+    lazily) shows it neither references them nor includes other templates.
+    """
+
+    def __init__(
+        self,
+        template_dir: str = "templates",
+        precompile: bool = False,
+        watch_interval: Optional[float] = None,
+        cache_size: int = 0,
+        cache_ttl: Optional[float] = 60.0,
+    ):
         self.template_dir = template_dir
+        self.precompile = precompile
+        self.watch_interval = watch_interval
+        self.render_cache: Optional[TTLCache] = (
+            TTLCache(cache_size, cache_ttl) if cache_size > 0 else None
+        )
+        self._templates: Optional[Dict[str, Template]] = None
+        self.version = 0  # Incremented whenever the precompiled cache is replaced
+        self._ignored_fields: Dict[str, FrozenSet[str]] = {}
+        # Lazily loaded templates: the analyzed version and its ignored fields
+        self._analyzed: Dict[str, Tuple[Template, FrozenSet[str]]] = {}
+        self._snapshot: Dict[str, Tuple[int, int]] = {}
+        self._watch_task: Optional[asyncio.Task[None]] = None
         try:
-            self.env = Environment(
-                loader=FileSystemLoader(self.template_dir),
-                autoescape=True,
-                trim_blocks=True,
-                lstrip_blocks=True,
-            )
+            self.env = self._create_environment()
         except Exception as e:
             logger.error(f"Failed to initialize Jinja2 environment: {e}")
             raise
 
+        if self.precompile:
+            self._snapshot = self._scan()
+            self._templates, self._ignored_fields = self._compile_all(self.env)
+
+    def _create_environment(self) -> Environment:
+        return Environment(
+            loader=FileSystemLoader(self.template_dir),
+            autoescape=True,
+            trim_blocks=True,
+            lstrip_blocks=True,
+            # Precompiled templates are reloaded by the watcher, not per render
+            auto_reload=not self.precompile,
+            cache_size=-1 if self.precompile else 400,
+        )
+
+    def _compile_all(
+        self,
+        env: Environment,
+        previous: Optional[Dict[str, Template]] = None,
+    ) -> Tuple[Dict[str, Template], Dict[str, FrozenSet[str]]]:
+        """
+        Compiles every template under `template_dir` into a new cache.
+
+        A template that fails to compile keeps its `previous` version, if any.
+
+        Returns:
+            The compiled templates, and per template the Kafka context
+            fields it does not use (safe to leave out of render cache keys).
+        """
+        started = time.perf_counter()
+        templates: Dict[str, Template] = {}
+        ignored_fields: Dict[str, FrozenSet[str]] = {}
+        source_bytes = 0
+        for name in env.list_templates():
+            try:
+                templates[name] = env.get_template(name)
+                source = env.loader.get_source(env, name)[0]
+                source_bytes += len(source.encode("utf-8"))
+                ignored_fields[name] = self._unused_kafka_fields(env, source)
+            except TemplateError as e:
+                logger.error(f"Failed to compile template '{name}': {e}")
+                if previous and name in previous:
+                    templates[name] = previous[name]
+                    ignored_fields[name] = self._ignored_fields.get(name, frozenset())
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            f"Compiled {len(templates)} templates ({source_bytes / 1024:.1f} KiB source) "
+            f"from '{self.template_dir}' in {elapsed_ms:.1f} ms."
+        )
+        return templates, ignored_fields
+
+    @staticmethod
+    def _unused_kafka_fields(env: Environment, source: str) -> FrozenSet[str]:
+        """Returns the Kafka context fields a template source does not reference."""
+        ast = env.parse(source)
+        if next(meta.find_referenced_templates(ast), None) is not None:
+            # Included templates are not analyzed; keep the full context
+            return frozenset()
+        return KAFKA_CONTEXT_FIELDS - meta.find_undeclared_variables(ast)
+
+    def _ignored_for(self, template_name: str, template: Template) -> FrozenSet[str]:
+        """Returns the fields to leave out of the cache key; none until analyzed."""
+        if self._templates is not None:
+            return self._ignored_fields.get(template_name, frozenset())
+        analyzed = self._analyzed.get(template_name)
+        # Jinja2 returns a new template object when the file changed
+        if analyzed is None or analyzed[0] is not template:
+            try:
+                source = self.env.loader.get_source(self.env, template_name)[0]
+                ignored = self._unused_kafka_fields(self.env, source)
+            except TemplateError:
+                ignored = frozenset()
+            analyzed = (template, ignored)
+            self._analyzed[template_name] = analyzed
+        return analyzed[1]
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """Returns (mtime_ns, size) for every file under `template_dir`."""
+        snapshot = {}
+        for root, _, files in os.walk(self.template_dir):
+            for file_name in files:
+                path = os.path.join(root, file_name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    async def start(self) -> None:
+        """Starts the template watcher if precompilation and watching are enabled."""
+        if self.precompile and self.watch_interval and self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch())
+            logger.info(
+                f"Watching '{self.template_dir}' for template changes every {self.watch_interval}s."
+            )
+
+    async def stop(self) -> None:
+        """Stops the template watcher."""
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.watch_interval)
+            try:
+                await self.reload_if_changed()
+            except Exception as e:
+                logger.error(f"Template reload failed: {e}", exc_info=True)
+
+    async def reload_if_changed(self) -> bool:
+        """
+        Recompiles all templates if any file under `template_dir` changed.
+
+        Scanning and compiling run in a worker thread; the new environment
+        and cache replace the old ones only once compilation has finished.
+
+        Returns:
+            bool: True if the cache was replaced.
+        """
+        snapshot = await asyncio.to_thread(self._scan)
+        if snapshot == self._snapshot:
+            return False
+        logger.info(f"Template changes detected in '{self.template_dir}'. Recompiling...")
+        env = self._create_environment()
+        templates, ignored_fields = await asyncio.to_thread(
+            self._compile_all, env, self._templates
+        )
+        self.env, self._templates, self._ignored_fields, self._snapshot = (
+            env,
+            templates,
+            ignored_fields,
+            snapshot,
+        )
+        self.version += 1
+        return True
+
+    def _get_template(self, template_name: str) -> Template:
+        if self._templates is None:
+            return self.env.get_template(template_name)
+        template = self._templates.get(template_name)
+        if template is None:
+            raise TemplateNotFound(template_name)
+        return template
+
     def render(
         self, template_name: str, data: Dict[str, Any]
     ) -> Union[Dict[str, Any], str]:
         """
         Render a template from a file with the given data.
-        If the template ends with .json.j2, returns a Dict.
+        If the template ends with .json.j2, returns a Dict (a JsonPayload
+        carrying the rendered text as its body for JSON objects).
         If the template ends with .html.j2 or others, returns a String.
         """
         try:
-            template = self.env.get_template(template_name)
+            template = self._get_template(template_name)
+
+            cache_key = None
+            if self.render_cache is not None:
+                cache_key = self._cache_key(
+                    template_name, data, self._ignored_for(template_name, template)
+                )
+                if cache_key is not None:
+                    cached = self.render_cache.get(cache_key)
+                    # The template object identifies its version: a reload misses
+                    if cached is not None and cached[0] is template:
+                        return self._copy_result(cached[1])
+
             rendered_str = template.render(**data)
 
             if template_name.endswith(".json.j2"):
-                return self._parse_json(rendered_str, template_name)
+                result = self._parse_json(rendered_str, template_name)
+            else:
+                result = rendered_str
 
-            return rendered_str
+            if cache_key is not None:
+                self.render_cache.put(cache_key, (template, self._copy_result(result)))
+            return result
 
         except TemplateNotFound:
             logger.error(f"Template not found: {template_name}")
@@ -47,6 +263,46 @@ class TemplateRenderer:
             logger.error(f"Unexpected error during rendering: {e}")
             raise
 
+    def has_template(self, template_name: str) -> bool:
+        """Returns True if the template exists (and compiles)."""
+        if self._templates is not None:
+            return template_name in self._templates
+        try:
+            self.env.get_template(template_name)
+            return True
+        except TemplateError:
+            return False
+
+    @property
+    def cache_stats(self) -> Dict[str, int]:
+        """Returns render cache size and hit/miss/eviction counters."""
+        if self.render_cache is None:
+            return {}
+        return self.render_cache.stats()
+
+    def _cache_key(
+        self, template_name: str, data: Dict[str, Any], ignored: FrozenSet[str]
+    ) -> Optional[Tuple[str, str]]:
+        """
+        Returns (template name, context hash), or None if the context cannot
+        be serialized canonically. `ignored` fields are left out of the hash.
+        """
+        context = {k: v for k, v in data.items() if k not in ignored}
+        try:
+            canonical = json.dumps(
+                context, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+            )
+        except (TypeError, ValueError):
+            return None
+        digest = hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+        return template_name, digest
+
+    @staticmethod
+    def _copy_result(result: Union[Dict[str, Any], str]) -> Union[Dict[str, Any], str]:
+        # Callers may modify nested values (embeds, attachments, ...), so the
+        # cache keeps its own deep copy. JsonPayload keeps its body when copied.
+        return result if isinstance(result, str) else copy.deepcopy(result)
+
     def render_from_string(
         self, template_content: str, data: Dict[str, Any], is_json: bool = True
     ) -> Union[Dict[str, Any], str]:
@@ -67,7 +323,11 @@ class TemplateRenderer:
 
     def _parse_json(self, rendered_str: str, source_name: str) -> Dict[str, Any]:
         try:
-            return json.loads(rendered_str)
+            value = json.loads(rendered_str)
+            if isinstance(value, dict):
+                # The text was just validated, so it is reused as the request body
+                return JsonPayload(value, body=rendered_str.encode("utf-8"))
+            return value
         except json.JSONDecodeError as e:
             logger.error(f"JSON Parse Error in {source_name}: {e}")
             logger.debug(f"Rendered Output: {rendered_str}")
@@ -0,0 +1,233 @@
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+import aiohttp
+from aiokafka import ConsumerRecord
+from aiosmtplib import SMTPResponseException
+
+from core.config import RetryConfig, settings
+from utils.kafka_manager import DELIVER_AT_HEADER, get_kafka_manager
+from utils.logger import LogManager
+
+logger = LogManager.get_logger(__name__)
+
+MessageProcessor = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# Key holding the retry bookkeeping inside a notification message
+RETRY_STATE_KEY = "_retry"
+
+
+def is_transient_status(status: int) -> bool:
+    """Returns True for HTTP statuses that are worth retrying later."""
+    return status in (408, 425, 429) or status >= 500
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    Returns True if an exception is likely to succeed on a later attempt.
+
+    Timeouts, dropped connections and SMTP 4xx replies are transient;
+    everything else (bad payloads, template errors, auth failures) is not.
+    """
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    if isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ServerTimeoutError)):
+        return True
+    if isinstance(error, SMTPResponseException):
+        return 400 <= error.code < 500
+    return False
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    Returns a "full jitter" exponential backoff delay for a retry attempt.
+
+    The delay is drawn uniformly from [0, min(cap, base * 2 ** attempt)] so
+    that many messages failing at once do not retry in lockstep.
+    """
+    return random.uniform(0, min(cap, base * (2**attempt)))
+
+
+def delay_topic_name(prefix: str, delay: int) -> str:
+    """Returns the name of the delay topic for a tier, e.g. `alert-retry-5s`."""
+    for unit, seconds in (("h", 3600), ("m", 60)):
+        if delay >= seconds and delay % seconds == 0:
+            return f"{prefix}-{delay // seconds}{unit}"
+    return f"{prefix}-{delay}s"
+
+
+class RetryScheduler:
+    """
+    Retries notifications that failed with a transient error.
+
+    The first RETRY_CONFIG.IN_PROCESS_ATTEMPTS retries run in this process
+    after a jittered exponential backoff. They wait in detached tasks, so
+    they neither block the consumer loop nor hold KafkaManager semaphore
+    slots. At most MAX_PENDING retries wait in memory at a time. Further
+    retries, and any retry over that cap, are published to tiered delay
+    topics (e.g. `alert-retry-5s`, `alert-retry-1m`). The record carries a
+    deliver-at header, and KafkaManager holds the partition back until the
+    record is due. Delay topics that KafkaManager does not consume (e.g.
+    because they were not created) are never published to, so the caller
+    falls back instead of losing the alert.
+
+    In-process retries are not backed by a Kafka offset. `stop` therefore
+    moves every retry that is still waiting to the next delay topic. A crash
+    would still lose them, so with manual offset commits (at-least-once
+    delivery) the in-process tier is skipped by default and the first retry
+    goes to the first delay topic.
+    """
+
+    def __init__(
+        self, config: Optional[RetryConfig] = None, in_process: Optional[bool] = None
+    ) -> None:
+        self._config = config or settings.RETRY_CONFIG
+        if in_process is None:
+            in_process = settings.KAFKA_CONSUMER_CONFIG.enable_auto_commit
+        self._in_process = in_process
+        self._waiting: Dict[asyncio.Task[None], Dict[str, Any]] = {}
+        self._running: set[asyncio.Task[None]] = set()
+        self._closing = False
+
+    @property
+    def topics(self) -> List[str]:
+        """Returns the delay topics in tier order."""
+        return [
+            delay_topic_name(self._config.TOPIC_PREFIX, delay)
+            for delay in self._config.TOPIC_DELAYS
+        ]
+
+    @property
+    def pending(self) -> int:
+        """Returns the number of in-process retries waiting for their backoff."""
+        return len(self._waiting)
+
+    async def schedule(
+        self,
+        message: Dict[str, Any],
+        destination: Union[str, List[str]],
+        processor: MessageProcessor,
+    ) -> bool:
+        """
+        Schedules another delivery attempt of a message.
+
+        Args:
+            message: The notification message that failed.
+            destination: The destinations that should be retried.
+            processor: Coroutine that processes the message again in-process.
+
+        Returns:
+            bool: False if retries are exhausted or the retry could not be
+            published, in which case the caller should fall back.
+        """
+        if not self._config.ENABLED:
+            return False
+
+        attempt, tier = self._retry_state(message)
+        retry_message = {
+            **message,
+            "destination": destination,
+            RETRY_STATE_KEY: {"attempt": attempt + 1, "tier": tier},
+        }
+
+        if (
+            self._in_process
+            and not self._closing
+            and tier == 0
+            and attempt < self._config.IN_PROCESS_ATTEMPTS
+            and len(self._waiting) < self._config.MAX_PENDING
+        ):
+            delay = backoff_delay(
+                attempt, self._config.BASE_DELAY, self._config.MAX_DELAY
+            )
+            task = asyncio.create_task(
+                self._retry_later(retry_message, delay, processor)
+            )
+            self._waiting[task] = retry_message
+            logger.info(f"Retry {attempt + 1} scheduled in {delay:.2f}s.")
+            return True
+
+        return await self._publish(retry_message)
+
+    async def consume(self, msg: ConsumerRecord, context: Optional[Any] = None):
+        """
+        KafkaManager callback for the delay topics.
+
+        Records only reach this callback once they are due. `context` is the
+        NotificationDispatcher passed to KafkaManager as callback context.
+        """
+        if not msg.value or context is None:
+            logger.warning(f"Skipping unusable retry record on topic '{msg.topic}'.")
+            return
+        await context.process(msg.value)
+
+    async def stop(self) -> None:
+        """Moves waiting in-process retries to the delay topics and awaits running ones."""
+        # Retries scheduled from now on (e.g. by a running retry) skip the in-process tier
+        self._closing = True
+        waiting = list(self._waiting.items())
+        self._waiting.clear()
+        for task, _ in waiting:
+            task.cancel()
+        await asyncio.gather(*(task for task, _ in waiting), return_exceptions=True)
+
+        for _, message in waiting:
+            if not await self._publish(message):
+                logger.error(
+                    f"Dropping in-process retry of message for {message.get('destination')}."
+                )
+
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def _retry_later(
+        self, message: Dict[str, Any], delay: float, processor: MessageProcessor
+    ) -> None:
+        task = asyncio.current_task()
+        await asyncio.sleep(delay)
+        # From here on the retry is running and is no longer moved on stop
+        self._waiting.pop(task, None)
+        self._running.add(task)
+        try:
+            await processor(message)
+        except Exception as e:
+            logger.error(f"In-process retry failed: {e}", exc_info=True)
+        finally:
+            self._running.discard(task)
+
+    async def _publish(self, message: Dict[str, Any]) -> bool:
+        """Publishes a message to the delay topic of its next tier."""
+        attempt, tier = self._retry_state(message)
+        if tier >= len(self._config.TOPIC_DELAYS):
+            # `attempt` counts the original delivery and every retry so far
+            logger.warning(
+                f"Retries exhausted after {attempt} delivery attempts "
+                f"({tier} through delay topics)."
+            )
+            return False
+
+        delay = self._config.TOPIC_DELAYS[tier]
+        topic = delay_topic_name(self._config.TOPIC_PREFIX, delay)
+        manager = get_kafka_manager()
+        if topic not in manager.subscribed_topics:
+            # A retry published there would never be consumed
+            logger.error(f"Delay topic '{topic}' is not consumed. Create it to retry through Kafka.")
+            return False
+        deliver_at = int((time.time() + delay) * 1000)
+        message = {**message, RETRY_STATE_KEY: {"attempt": attempt, "tier": tier + 1}}
+        try:
+            await manager.send_message(
+                topic, message, headers=[(DELIVER_AT_HEADER, str(deliver_at).encode())]
+            )
+        except Exception as e:
+            logger.error(f"Failed to publish retry to '{topic}': {e}")
+            return False
+        logger.info(f"Retry {attempt} published to '{topic}' (due in {delay}s).")
+        return True
+
+    @staticmethod
+    def _retry_state(message: Dict[str, Any]) -> Tuple[int, int]:
+        state = message.get(RETRY_STATE_KEY) or {}
+        return int(state.get("attempt", 0)), int(state.get("tier", 0))
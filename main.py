@@ -1,11 +1,21 @@
 import asyncio
+import signal
+from pathlib import Path
+from typing import Dict
 
 from core.config import settings
 from utils.logger import LogManager
 from utils.kafka_manager import init_kafka_manager
+from utils.metrics import MetricsServer
+from utils.supervisor import WorkerSupervisor
 from callback import callbacks
 from core.dispatcher import NotificationDispatcher
+from core.message import AlertMessage
+from core.dedup import Deduplicator
+from core.digest import DigestAggregator
 from core.renderer import TemplateRenderer
+from core.render_offload import RenderOffloader
+from core.retry import RetryScheduler
 from core.providers.discord import DiscordProvider
 from core.providers.slack import SlackProvider
 from core.providers.email import EmailProvider
@@ -13,8 +23,13 @@ from core.providers.email import EmailProvider
 logger = LogManager.get_logger(__name__)
 
 
-async def main():
-    """Initializes and runs the application."""
+async def main(worker_index: int = 0):
+    """
+    Initializes and runs the application.
+
+    `worker_index` is set in multi-process mode; each worker serves its
+    metrics on METRICS_CONFIG.PORT + worker_index.
+    """
     if not settings.KAFKA_BROKERS:
         logger.error(
             "No Kafka brokers configured. Please set KAFKA_BROKERS environment variable."
@@ -22,13 +37,46 @@ async def main():
         return
 
     # 1. Initialize dependencies
-    renderer = TemplateRenderer()
+    template_config = settings.TEMPLATE_CONFIG
+    renderer = TemplateRenderer(
+        template_dir=template_config.DIR,
+        precompile=template_config.PRECOMPILE,
+        watch_interval=template_config.WATCH_INTERVAL if template_config.WATCH else None,
+        cache_size=template_config.RENDER_CACHE_SIZE,
+        cache_ttl=template_config.RENDER_CACHE_TTL,
+    )
     providers = {
         "discord": DiscordProvider(),
         "slack": SlackProvider(),
         "email": EmailProvider(),
     }
-    dispatcher = NotificationDispatcher(providers, renderer)
+    render_offloader = (
+        RenderOffloader(
+            renderer,
+            executor=template_config.OFFLOAD_EXECUTOR,
+            max_workers=template_config.OFFLOAD_WORKERS,
+            threshold_ms=template_config.OFFLOAD_THRESHOLD_MS,
+            timeout=template_config.OFFLOAD_TIMEOUT,
+        )
+        if template_config.OFFLOAD_ENABLED
+        else None
+    )
+    retry_scheduler = RetryScheduler() if settings.RETRY_CONFIG.ENABLED else None
+    deduplicator = Deduplicator() if settings.DEDUP_CONFIG.ENABLED else None
+    digest = None
+    if settings.DIGEST_CONFIG.ENABLED:
+        if settings.KAFKA_CONSUMER_CONFIG.enable_auto_commit:
+            digest = DigestAggregator()
+        else:
+            # Buffered alerts only live in memory, so their offsets would be
+            # committed before the digest is sent
+            logger.error(
+                "Digests are disabled: DIGEST_CONFIG__ENABLED requires "
+                "KAFKA_CONSUMER_CONFIG__ENABLE_AUTO_COMMIT=True."
+            )
+    dispatcher = NotificationDispatcher(
+        providers, renderer, retry_scheduler, render_offloader, deduplicator, digest
+    )
 
     logger.info("Initializing Kafka manager...")
     kafka_manager = init_kafka_manager(
@@ -39,20 +87,92 @@ async def main():
         callback_context=dispatcher,
     )
 
+    metrics_config = settings.METRICS_CONFIG
+    metrics_server = (
+        MetricsServer(
+            metrics_config.HOST, metrics_config.PORT + worker_index, metrics_config.PATH
+        )
+        if metrics_config.ENABLED
+        else None
+    )
+
     all_topic_sub_callbacks = callbacks.pop("all", [])
 
     logger.info(f"Subscribing to callbacks for topics: {list(callbacks.keys())}")
     for topic, topic_callbacks in callbacks.items():
         topic_callbacks.extend(all_topic_sub_callbacks)
+        # Records for unknown providers are dropped before their value is decoded,
+        # but only on topics whose every callback goes through the dispatcher
+        prefilter = (
+            dispatcher.accepts_route
+            if topic_callbacks and all(callback.dispatch for callback in topic_callbacks)
+            else None
+        )
         for callback in topic_callbacks:
             logger.info(
                 f"Subscribing [{topic}] {callback.name}-{callback.func.__name__}"
             )
-            kafka_manager.register_callback(topic, callback.func)
+            kafka_manager.register_callback(
+                topic,
+                callback.func,
+                batch=callback.batch,
+                value_parser=callback.value_parser,
+                prefilter=prefilter,
+            )
+
+    if retry_scheduler:
+        for topic in retry_scheduler.topics:
+            kafka_manager.register_callback(
+                topic,
+                retry_scheduler.consume,
+                value_parser=AlertMessage.from_dict,
+                prefilter=dispatcher.accepts_route,
+            )
+        # Move waiting in-process retries to the delay topics before the producer closes
+        kafka_manager.add_shutdown_hook(retry_scheduler.stop)
+    if deduplicator:
+        # Emit pending "repeated N times" summaries while providers are still open
+        kafka_manager.add_shutdown_hook(deduplicator.stop)
+    if digest:
+        kafka_manager.add_shutdown_hook(digest.stop)
+
+    # Stop gracefully on SIGTERM (docker stop, the supervisor) as on Ctrl-C
+    loop = asyncio.get_running_loop()
+    main_task = asyncio.current_task()
+    stopping = False
+
+    def request_stop():
+        nonlocal stopping
+        if not stopping:
+            stopping = True
+            main_task.cancel()
+
+    loop.add_signal_handler(signal.SIGTERM, request_stop)
 
     try:
+        if metrics_server:
+            await metrics_server.start()
+        await renderer.start()
+        if render_offloader:
+            await render_offloader.start()
+        if deduplicator:
+            deduplicator.start(dispatcher.send_summary)
+        if digest:
+            digest.start(dispatcher.send_digest)
+
+        logger.info("Starting providers...")
+        for provider in providers.values():
+            await provider.start()
+
         logger.info("Starting Kafka manager...")
         await kafka_manager.start()
+        if retry_scheduler:
+            missing = set(retry_scheduler.topics) - set(kafka_manager.subscribed_topics)
+            if missing:
+                logger.warning(
+                    f"Retry delay topics {sorted(missing)} do not exist. "
+                    "Failed alerts fall back once in-process retries are exhausted."
+                )
 
         # Keep the application running by waiting on the consumer task
         if kafka_manager.consumer_task:
@@ -68,13 +188,39 @@ async def main():
     except (KeyboardInterrupt, asyncio.CancelledError):
         logger.info("Shutdown signal received.")
     finally:
+        # A repeated SIGTERM must not interrupt the shutdown below
+        stopping = True
         logger.info("Stopping Kafka manager...")
         await kafka_manager.stop()
+        logger.info("Stopping providers...")
+        for provider in providers.values():
+            await provider.stop()
+        if render_offloader:
+            await render_offloader.stop()
+        await renderer.stop()
+        if renderer.render_cache is not None:
+            logger.info(f"Render cache stats: {renderer.cache_stats}")
+        if metrics_server:
+            await metrics_server.stop()
         logger.info("Application shut down gracefully.")
 
 
+def run_worker(index: int) -> None:
+    """Entry point of a worker process started by the supervisor."""
+    asyncio.run(main(index))
+
+
+def _worker_env(index: int) -> Dict[str, str]:
+    # Per-worker log directories, so workers never rotate each other's files
+    return {"APP_CONFIG__LOG_DIR": str(Path(settings.APP_CONFIG.LOG_DIR) / f"worker-{index}")}
+
+
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        if settings.WORKER_CONFIG.PROCESSES == 1:
+            asyncio.run(main())
+        else:
+            # Workers join the same consumer group, so Kafka spreads partitions across them
+            asyncio.run(WorkerSupervisor.from_config(run_worker, env=_worker_env).run())
     except KeyboardInterrupt:
         logger.info("Application interrupted by user.")
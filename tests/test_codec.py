@@ -0,0 +1,45 @@
+import pytest
+from utils import codec as codec_module
+from utils.codec import available_codecs, get_codec
+
+CODECS = list(available_codecs().values())
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.name)
+def test_round_trip_from_bytes(codec):
+    message = {"provider": "discord", "data": {"text": "디스크 사용량 95%", "n": [1, 2.5, None]}}
+
+    encoded = codec.dumps(message)
+
+    assert isinstance(encoded, bytes)
+    assert codec.loads(encoded) == message
+    assert codec.loads('{"text": "한글"}'.encode("utf-8")) == {"text": "한글"}
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.name)
+@pytest.mark.parametrize("raw", [b"{not json", b'{"text": "\xff\xfe"}', b""])
+def test_malformed_values_raise_the_codec_errors(codec, raw):
+    with pytest.raises(codec.errors):
+        codec.loads(raw)
+
+
+def test_auto_prefers_the_fastest_installed_codec(monkeypatch):
+    def missing():
+        raise ImportError("not installed")
+
+    monkeypatch.setitem(codec_module._FACTORIES, "orjson", missing)
+    monkeypatch.setitem(codec_module._FACTORIES, "msgspec", missing)
+
+    assert get_codec("auto").name == "json"
+    # An explicitly chosen codec that is missing falls back to the stdlib
+    assert get_codec("orjson").name == "json"
+
+
+def test_auto_uses_orjson_when_installed():
+    pytest.importorskip("orjson")
+    assert get_codec("auto").name == "orjson"
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError):
+        get_codec("yaml")
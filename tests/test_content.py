@@ -0,0 +1,72 @@
+import gzip
+import json
+
+import pytest
+
+from utils.codec import get_codec
+from utils.content import ContentDecoder, PayloadError
+
+ALERT = {"provider": "discord", "template": "alert", "data": {"trace": "x" * 4096}}
+RAW = json.dumps(ALERT).encode("utf-8")
+
+
+def _compress(encoding, data):
+    if encoding == "gzip":
+        return gzip.compress(data)
+    if encoding == "zstd":
+        zstandard = pytest.importorskip("zstandard")
+        return zstandard.ZstdCompressor().compress(data)
+    lz4_frame = pytest.importorskip("lz4.frame")
+    return lz4_frame.compress(data)
+
+
+def test_values_without_headers_are_json():
+    decoder = ContentDecoder(get_codec("json"))
+    assert decoder.decode(RAW) == ALERT
+    assert decoder.decode(RAW, [("content-type", b"application/json; charset=utf-8")]) == ALERT
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "zstd", "lz4"])
+def test_decompresses_by_content_encoding(encoding):
+    decoder = ContentDecoder(get_codec("json"), max_bytes=1024 * 1024)
+    value = _compress(encoding, RAW)
+    headers = [("content-encoding", encoding.encode())]
+
+    # Contexts are reused, so decoding twice must give the same result
+    assert decoder.decode(value, headers) == ALERT
+    assert decoder.decode(value, headers) == ALERT
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "zstd", "lz4"])
+def test_rejects_values_larger_than_the_cap_once_decompressed(encoding):
+    decoder = ContentDecoder(get_codec("json"), max_bytes=1024)
+    value = _compress(encoding, RAW)
+
+    with pytest.raises(PayloadError, match="exceeds 1024 bytes"):
+        decoder.decode(value, [("content-encoding", encoding.encode())])
+
+
+def test_rejects_corrupt_and_unknown_payloads():
+    decoder = ContentDecoder(get_codec("json"))
+
+    with pytest.raises(PayloadError, match="gzip"):
+        decoder.decode(b"not gzip", [("content-encoding", b"gzip")])
+    with pytest.raises(PayloadError, match="Truncated"):
+        decoder.decode(gzip.compress(RAW)[:-20], [("content-encoding", b"gzip")])
+    with pytest.raises(PayloadError, match="content-encoding 'br'"):
+        decoder.decode(RAW, [("content-encoding", b"br")])
+    with pytest.raises(PayloadError, match="content-type 'text/plain'"):
+        decoder.decode(RAW, [("content-type", b"text/plain")])
+    with pytest.raises(PayloadError):
+        decoder.decode(b"{not json")
+
+
+def test_decodes_msgpack_values():
+    msgpack = pytest.importorskip("msgpack")
+    decoder = ContentDecoder(get_codec("json"))
+    value = gzip.compress(msgpack.packb(ALERT))
+    headers = [("content-type", b"application/msgpack"), ("content-encoding", b"gzip")]
+
+    assert decoder.decode(value, headers) == ALERT
+    with pytest.raises(PayloadError):
+        decoder.decode(b"\xc1", [("content-type", b"application/msgpack")])
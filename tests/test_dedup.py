@@ -0,0 +1,101 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+from core.config import DedupConfig
+from core.dedup import Deduplicator
+from core.dispatcher import NotificationDispatcher
+from core.message import AlertMessage
+from core.providers.discord import DiscordProvider
+from core.renderer import TemplateRenderer
+
+
+def alert(service, code, offset=0):
+    return {
+        "provider": "discord",
+        "template": "error_report",
+        "data": {"service": service, "error_code": code, "ts": offset},
+        "_kafka_meta": {"topic": "alerts", "partition": 0, "offset": offset},
+    }
+
+
+async def test_repeats_are_suppressed_and_summarized_when_the_window_closes():
+    dedup = Deduplicator(
+        DedupConfig(
+            WINDOW=0.1,
+            TEMPLATE_KEYS={"error_report": ["provider", "template", "data.service", "data.error_code"]},
+        )
+    )
+    on_summary = AsyncMock()
+    dedup.start(on_summary)
+    try:
+        assert dedup.admit(alert("api", 500, offset=1))
+        # Same key fields, different timestamp and offset
+        assert not dedup.admit(alert("api", 500, offset=2))
+        assert not dedup.admit(alert("api", 500, offset=3))
+        assert dedup.admit(alert("db", 500, offset=4))
+
+        await asyncio.sleep(0.3)
+    finally:
+        await dedup.stop()
+
+    on_summary.assert_awaited_once()
+    message, summary = on_summary.await_args.args
+    assert message["_kafka_meta"]["offset"] == 1
+    assert summary["count"] == 2
+    assert summary["key"]["data.service"] == "api"
+    assert len(dedup) == 0
+    # A new window opens once the old one has closed
+    assert dedup.admit(alert("api", 500, offset=5))
+
+
+async def test_default_keys_compare_whole_data():
+    dedup = Deduplicator(DedupConfig(WINDOW=60))
+    assert dedup.admit(alert("api", 500, offset=1))
+    assert dedup.admit(alert("api", 500, offset=2))  # data.ts differs
+    assert not dedup.admit(alert("api", 500, offset=2))
+
+
+async def test_memory_bound_closes_oldest_window_early():
+    dedup = Deduplicator(DedupConfig(WINDOW=60, MAX_KEYS=2, KEYS=["data.service"]))
+    on_summary = AsyncMock()
+    dedup.start(on_summary)
+    try:
+        dedup.admit(alert("a", 1))
+        dedup.admit(alert("a", 1))
+        dedup.admit(alert("b", 1))
+        dedup.admit(alert("c", 1))
+        await asyncio.sleep(0)
+    finally:
+        await dedup.stop()
+
+    assert len(dedup) == 0
+    assert on_summary.await_args_list[0].args[1]["key"] == {"data.service": "a"}
+
+
+async def test_dispatcher_skips_duplicates_and_sends_summary():
+    renderer = MagicMock(spec=TemplateRenderer)
+    renderer.render.return_value = {"content": "alert"}
+    provider = DiscordProvider()
+    provider.send = AsyncMock(return_value=True)
+    dedup = Deduplicator(DedupConfig(WINDOW=60, KEYS=["data.service"]))
+    dispatcher = NotificationDispatcher(
+        {"discord": provider}, renderer, deduplicator=dedup
+    )
+    dedup.start(dispatcher.send_summary)
+
+    message = {**alert("api", 500), "destination": "https://hook"}
+    for _ in range(3):
+        await dispatcher.process(dict(message))
+    await dedup.stop()
+
+    assert provider.send.await_count == 2
+    destination, payload = provider.send.await_args.args
+    assert destination == "https://hook"
+    assert "repeated 2 more times" in payload["content"]
+
+
+def test_key_paths_are_read_from_alert_messages():
+    dedup = Deduplicator(DedupConfig(KEYS=["provider", "data.service"]))
+
+    assert dedup.admit(AlertMessage.from_dict(alert("api", 500, offset=1)))
+    assert not dedup.admit(AlertMessage.from_dict(alert("api", 503, offset=2)))
+    assert dedup.admit(AlertMessage.from_dict(alert("db", 500, offset=3)))
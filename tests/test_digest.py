@@ -0,0 +1,81 @@
+import asyncio
+from unittest.mock import AsyncMock
+from core.config import DigestConfig
+from core.digest import DigestAggregator
+from core.dispatcher import NotificationDispatcher
+from core.providers.discord import DiscordProvider
+from core.renderer import TemplateRenderer
+
+
+def make_dispatcher(temp_template_dir, config):
+    (temp_template_dir / "alert.json.j2").write_text(
+        '{"content": "{{ service }}"}', encoding="utf-8"
+    )
+    (temp_template_dir / "digest.json.j2").write_text(
+        '{"content": "{{ count }}: {% for i in items %}{{ i.service }} {% endfor %}"}',
+        encoding="utf-8",
+    )
+    renderer = TemplateRenderer(template_dir=str(temp_template_dir), precompile=True)
+    provider = DiscordProvider()
+    provider.send = AsyncMock(return_value=True)
+    digest = DigestAggregator(config)
+    dispatcher = NotificationDispatcher({"discord": provider}, renderer, digest=digest)
+    digest.start(dispatcher.send_digest)
+    return dispatcher, digest, provider
+
+
+def alert(service, destination="https://hook"):
+    return {
+        "provider": "discord",
+        "template": "alert",
+        "destination": destination,
+        "data": {"service": service},
+    }
+
+
+async def test_alerts_are_sent_as_one_digest_after_the_window(temp_template_dir):
+    dispatcher, digest, provider = make_dispatcher(
+        temp_template_dir, DigestConfig(WINDOW=0.05, MAX_ITEMS=100)
+    )
+    for service in ("api", "db", "cache"):
+        await dispatcher.process(alert(service))
+    await dispatcher.process(alert("other", destination="https://other"))
+
+    assert digest.buffered == 4
+    provider.send.assert_not_awaited()
+
+    await asyncio.sleep(0.15)
+    sent = {call.args[0]: call.args[1] for call in provider.send.await_args_list}
+    assert sent == {
+        "https://hook": {"content": "3: api db cache "},
+        # A bucket holding a single alert is sent with its own template
+        "https://other": {"content": "other"},
+    }
+
+
+async def test_full_bucket_flushes_early_and_stop_flushes_the_rest(temp_template_dir):
+    dispatcher, digest, provider = make_dispatcher(
+        temp_template_dir, DigestConfig(WINDOW=60, MAX_ITEMS=2)
+    )
+    for service in ("a", "b", "c"):
+        await dispatcher.process(alert(service))
+    await asyncio.sleep(0)
+
+    assert provider.send.await_args.args[1] == {"content": "2: a b "}
+    assert digest.buffered == 1
+
+    await digest.stop()
+    assert provider.send.await_count == 2
+    assert provider.send.await_args.args[1] == {"content": "c"}
+
+
+async def test_templates_without_digest_template_are_sent_immediately(temp_template_dir):
+    dispatcher, digest, provider = make_dispatcher(
+        temp_template_dir, DigestConfig(WINDOW=60)
+    )
+    (temp_template_dir / "digest.json.j2").unlink()
+    await dispatcher.renderer.reload_if_changed()
+
+    await dispatcher.process(alert("api"))
+    provider.send.assert_awaited_once()
+    assert digest.buffered == 0
@@ -1,8 +1,11 @@
 import pytest
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock
-from core.dispatcher import NotificationDispatcher
+from core.dispatcher import DeliveryError, NotificationDispatcher
 from core.renderer import TemplateRenderer
-from core.providers.base import BaseProvider
+from core.render_offload import RenderOffloader
+from core.retry import RetryScheduler
+from core.providers.base import BaseProvider, DeliveryReport
 
 
 @pytest.mark.asyncio
@@ -107,3 +110,190 @@ async def test_process_with_mail_meta():
         "rendered content", expected_metadata
     )
     mock_provider.send.assert_called_once_with("dest", {"key": "value"})
+
+
+@pytest.mark.asyncio
+async def test_process_batch_processes_every_message():
+    # Setup
+    mock_renderer = MagicMock(spec=TemplateRenderer)
+    mock_provider = MagicMock(spec=BaseProvider)
+    mock_provider.send = AsyncMock(return_value=True)
+
+    mock_renderer.render.return_value = "rendered content"
+    mock_provider.apply_template_rules.return_value = "template.txt"
+    mock_provider.format_payload.return_value = {"key": "value"}
+
+    dispatcher = NotificationDispatcher({"test_provider": mock_provider}, mock_renderer)
+
+    records = [
+        SimpleNamespace(
+            value={"provider": "test_provider", "template": "template", "destination": f"dest{i}", "data": {}}
+        )
+        for i in range(3)
+    ]
+
+    # Execute
+    await dispatcher.process_batch(records)
+
+    # Verify
+    assert mock_provider.send.call_count == 3
+    sent_to = {call.args[0] for call in mock_provider.send.call_args_list}
+    assert sent_to == {"dest0", "dest1", "dest2"}
+
+
+@pytest.mark.asyncio
+async def test_process_failed_send_falls_back_to_failed_destinations_only():
+    # Setup
+    mock_renderer = MagicMock(spec=TemplateRenderer)
+    mock_provider = MagicMock(spec=BaseProvider)
+    mock_provider.send = AsyncMock(
+        side_effect=[DeliveryReport({"ok": True, "bad": False}), True]
+    )
+
+    mock_renderer.render.return_value = "rendered content"
+    mock_provider.apply_template_rules.return_value = "template.txt"
+    mock_provider.format_payload.return_value = {"key": "value"}
+    mock_provider.get_fallback_payload.return_value = {"error": "message"}
+
+    dispatcher = NotificationDispatcher({"test_provider": mock_provider}, mock_renderer)
+
+    message = {
+        "provider": "test_provider",
+        "template": "template",
+        "destination": ["ok", "bad"],
+        "data": {},
+    }
+
+    # Execute
+    await dispatcher.process(message)
+
+    # Verify
+    assert mock_provider.send.call_count == 2
+    mock_provider.send.assert_called_with(["bad"], {"error": "message"})
+
+
+@pytest.mark.asyncio
+async def test_process_raises_when_fallback_fails():
+    # Setup
+    mock_renderer = MagicMock(spec=TemplateRenderer)
+    mock_provider = MagicMock(spec=BaseProvider)
+    mock_provider.send = AsyncMock(return_value=False)
+
+    mock_renderer.render.return_value = "rendered content"
+    mock_provider.apply_template_rules.return_value = "template.txt"
+    mock_provider.format_payload.return_value = {"key": "value"}
+    mock_provider.get_fallback_payload.return_value = {"error": "message"}
+
+    dispatcher = NotificationDispatcher({"test_provider": mock_provider}, mock_renderer)
+
+    message = {
+        "provider": "test_provider",
+        "template": "template",
+        "destination": "dest",
+        "data": {},
+    }
+
+    # Execute / Verify: the caller gets the failure so it can dead-letter the message
+    with pytest.raises(DeliveryError):
+        await dispatcher.process(message)
+    assert mock_provider.send.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_process_retries_transient_failures_instead_of_falling_back():
+    # Setup
+    mock_renderer = MagicMock(spec=TemplateRenderer)
+    mock_provider = MagicMock(spec=BaseProvider)
+    mock_provider.send = AsyncMock(
+        side_effect=[
+            DeliveryReport({"down": False, "gone": False}, transient={"down"}),
+            True,
+        ]
+    )
+    mock_scheduler = MagicMock(spec=RetryScheduler)
+    mock_scheduler.schedule = AsyncMock(return_value=True)
+
+    mock_renderer.render.return_value = "rendered content"
+    mock_provider.apply_template_rules.return_value = "template.txt"
+    mock_provider.format_payload.return_value = {"key": "value"}
+    mock_provider.get_fallback_payload.return_value = {"error": "message"}
+
+    dispatcher = NotificationDispatcher(
+        {"test_provider": mock_provider}, mock_renderer, mock_scheduler
+    )
+
+    message = {
+        "provider": "test_provider",
+        "template": "template",
+        "destination": ["down", "gone"],
+        "data": {},
+    }
+
+    # Execute
+    await dispatcher.process(message)
+
+    # Verify: the 5xx destination is retried, the permanent failure falls back
+    mock_scheduler.schedule.assert_awaited_once_with(
+        message, ["down"], dispatcher.process
+    )
+    mock_provider.send.assert_called_with(["gone"], {"error": "message"})
+
+
+@pytest.mark.asyncio
+async def test_process_renders_through_offloader_when_configured():
+    # Setup
+    mock_renderer = MagicMock(spec=TemplateRenderer)
+    mock_offloader = MagicMock(spec=RenderOffloader)
+    mock_offloader.render = AsyncMock(return_value="rendered content")
+    mock_provider = MagicMock(spec=BaseProvider)
+    mock_provider.send = AsyncMock(return_value=True)
+    mock_provider.apply_template_rules.return_value = "template.txt"
+    mock_provider.format_payload.return_value = {"key": "value"}
+
+    dispatcher = NotificationDispatcher(
+        {"test_provider": mock_provider},
+        mock_renderer,
+        render_offloader=mock_offloader,
+    )
+
+    # Execute
+    await dispatcher.process(
+        {"provider": "test_provider", "template": "template", "destination": "d", "data": {}}
+    )
+
+    # Verify
+    mock_offloader.render.assert_awaited_once()
+    mock_renderer.render.assert_not_called()
+    mock_provider.format_payload.assert_called_with("rendered content", {})
+
+
+def test_accepts_route_drops_unknown_provider_headers():
+    from utils.routing import RoutingInfo
+
+    dispatcher = NotificationDispatcher(
+        {"slack": MagicMock(spec=BaseProvider)}, MagicMock(spec=TemplateRenderer)
+    )
+
+    assert dispatcher.accepts_route(RoutingInfo("alerts", provider="slack"))
+    assert dispatcher.accepts_route(RoutingInfo("alerts"))
+    assert not dispatcher.accepts_route(RoutingInfo("alerts", provider="pager"))
+
+
+@pytest.mark.asyncio
+async def test_process_batch_reports_only_failed_messages():
+    from utils.kafka_manager import BatchCallbackError
+
+    dispatcher = NotificationDispatcher({}, MagicMock(spec=TemplateRenderer))
+    records = [SimpleNamespace(value={"n": i}) for i in range(3)]
+    error = DeliveryError("send failed", "dest1")
+
+    async def process(message):
+        if message["n"] == 1:
+            raise error
+
+    dispatcher.process = process
+
+    with pytest.raises(BatchCallbackError) as excinfo:
+        await dispatcher.process_batch(records)
+
+    assert excinfo.value.failed == [(records[1], error)]
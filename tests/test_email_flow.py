@@ -14,7 +14,10 @@ async def test_email_full_flow_with_meta(mocker):
     mock_renderer = MagicMock(spec=TemplateRenderer)
     email_provider = EmailProvider()
     spy_send = mocker.spy(email_provider, "send")
-    mock_smtp_send = mocker.patch("aiosmtplib.send", new_callable=AsyncMock)
+    mock_smtp_send = mocker.patch(
+        "core.providers.smtp_pool.SMTPConnectionPool.send_message",
+        new_callable=AsyncMock,
+    )
 
     providers = {"email": email_provider}
     dispatcher = NotificationDispatcher(providers, mock_renderer)
@@ -57,6 +60,28 @@ async def test_email_full_flow_with_meta(mocker):
     assert set(recipients) == {"user@example.com", "cc@example.com", "bcc@example.com"}
 
 
+@pytest.mark.asyncio
+async def test_send_deduplicates_recipients(mocker):
+    """
+    Test that an address listed in To, Cc and Bcc receives the mail only once.
+    """
+    email_provider = EmailProvider()
+    mock_smtp_send = mocker.patch(
+        "core.providers.smtp_pool.SMTPConnectionPool.send_message",
+        new_callable=AsyncMock,
+    )
+
+    payload = {
+        "subject": "Dup",
+        "body": "<p>body</p>",
+        "meta": {"cc": ["ops@example.com", "dev@example.com"], "bcc": ["dev@example.com"]},
+    }
+    assert await email_provider.send(["dev@example.com", "ops@example.com"], payload)
+
+    recipients = mock_smtp_send.call_args[1]["recipients"]
+    assert recipients == ["dev@example.com", "ops@example.com"]
+
+
 def test_apply_template_rules():
     """
     Test that apply_template_rules correctly appends the .html.j2 extension.
@@ -1,9 +1,13 @@
+import asyncio
+import json
+import time
 import pytest
 from unittest.mock import AsyncMock, MagicMock
-from aiokafka import ConsumerRecord
-from utils.kafka_manager import KafkaManager
+from aiokafka import ConsumerRecord, TopicPartition
+from utils.kafka_manager import DELIVER_AT_HEADER, KafkaManager
 from core.config import KafkaConsumerConfig, KafkaProducerConfig
 from core.dispatcher import NotificationDispatcher
+from core.message import AlertMessage
 
 
 @pytest.mark.asyncio
@@ -13,8 +17,9 @@ async def test_kafka_manager_consumption_with_dispatcher(mocker):
     mock_consumer_instance = AsyncMock()
     mock_consumer_cls.return_value = mock_consumer_instance
 
-    # Mock Producer
+    # Mock Producers
     mocker.patch("utils.kafka_manager.AIOKafkaProducer", return_value=AsyncMock())
+    mocker.patch("utils.dead_letter.AIOKafkaProducer", return_value=AsyncMock())
 
     # Mock NotificationDispatcher
     mock_dispatcher = AsyncMock(spec=NotificationDispatcher)
@@ -29,7 +34,7 @@ async def test_kafka_manager_consumption_with_dispatcher(mocker):
         timestamp=0,
         timestamp_type=0,
         key=b"key",
-        value=record_value,
+        value=json.dumps(record_value).encode("utf-8"),
         headers=[],
         checksum=0,
         serialized_key_size=0,
@@ -78,6 +83,7 @@ async def test_kafka_manager_topic_filtering(mocker):
     mock_consumer_instance = AsyncMock()
     mock_consumer_cls.return_value = mock_consumer_instance
     mocker.patch("utils.kafka_manager.AIOKafkaProducer", return_value=AsyncMock())
+    mocker.patch("utils.dead_letter.AIOKafkaProducer", return_value=AsyncMock())
 
     # Mock available topics
     mock_consumer_instance.topics = AsyncMock(return_value={"existing-topic"})
@@ -105,3 +111,747 @@ async def test_kafka_manager_topic_filtering(mocker):
 
     # Cleanup
     await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_kafka_manager_partitioned_mode_keeps_partition_order(mocker):
+    # Records of one partition must be handled in offset order
+    mocker.patch("utils.kafka_manager.settings.KAFKA_PROCESSING_MODE", "partitioned")
+    mock_consumer_cls = mocker.patch("utils.kafka_manager.AIOKafkaConsumer")
+    mock_consumer_instance = AsyncMock()
+    mock_consumer_cls.return_value = mock_consumer_instance
+    mocker.patch("utils.kafka_manager.AIOKafkaProducer", return_value=AsyncMock())
+    mocker.patch("utils.dead_letter.AIOKafkaProducer", return_value=AsyncMock())
+
+    records = [
+        ConsumerRecord(
+            topic="test-topic",
+            partition=offset % 2,
+            offset=offset,
+            timestamp=0,
+            timestamp_type=0,
+            key=None,
+            value=json.dumps({"n": offset}).encode("utf-8"),
+            headers=[],
+            checksum=0,
+            serialized_key_size=0,
+            serialized_value_size=0,
+        )
+        for offset in range(6)
+    ]
+
+    async def async_iter():
+        for record in records:
+            yield record
+
+    mock_consumer_instance.__aiter__.side_effect = lambda: async_iter()
+    mock_consumer_instance.topics = AsyncMock(return_value={"test-topic"})
+    mock_consumer_instance.subscribe = MagicMock()
+    mock_consumer_instance.stop = AsyncMock()
+
+    manager = KafkaManager(
+        bootstrap_servers=["localhost:9092"],
+        consumer_group="test-group",
+        consumer_config=KafkaConsumerConfig(),
+        producer_config=KafkaProducerConfig(),
+    )
+
+    handled = {0: [], 1: []}
+
+    async def slow_callback(msg: ConsumerRecord, context):
+        # Earlier offsets take longer, so unordered processing would reorder them
+        await asyncio.sleep(0.01 * (6 - msg.offset))
+        handled[msg.partition].append(msg.offset)
+
+    manager.register_callback("test-topic", slow_callback)
+
+    await manager.start()
+    await manager.consumer_task
+    for worker in manager._partition_workers.values():
+        await worker.join()
+    await manager.stop()
+
+    assert handled == {0: [0, 2, 4], 1: [1, 3, 5]}
+
+
+@pytest.mark.asyncio
+async def test_kafka_manager_manual_commit_uses_low_watermark(mocker):
+    # With auto commit disabled, only contiguously completed offsets are committed
+    mock_consumer_cls = mocker.patch("utils.kafka_manager.AIOKafkaConsumer")
+    mock_consumer_instance = AsyncMock()
+    mock_consumer_cls.return_value = mock_consumer_instance
+    mocker.patch("utils.kafka_manager.AIOKafkaProducer", return_value=AsyncMock())
+    mocker.patch("utils.dead_letter.AIOKafkaProducer", return_value=AsyncMock())
+
+    records = [
+        ConsumerRecord(
+            topic="test-topic",
+            partition=0,
+            offset=offset,
+            timestamp=0,
+            timestamp_type=0,
+            key=None,
+            value=json.dumps({"n": offset}).encode("utf-8"),
+            headers=[],
+            checksum=0,
+            serialized_key_size=0,
+            serialized_value_size=0,
+        )
+        for offset in range(4)
+    ]
+
+    async def async_iter():
+        for record in records:
+            yield record
+
+    mock_consumer_instance.__aiter__.side_effect = lambda: async_iter()
+    mock_consumer_instance.topics = AsyncMock(return_value={"test-topic"})
+    mock_consumer_instance.subscribe = MagicMock()
+    mock_consumer_instance.stop = AsyncMock()
+    mock_consumer_instance.commit = AsyncMock()
+
+    manager = KafkaManager(
+        bootstrap_servers=["localhost:9092"],
+        consumer_group="test-group",
+        consumer_config=KafkaConsumerConfig(enable_auto_commit=False),
+        producer_config=KafkaProducerConfig(),
+    )
+
+    release = asyncio.Event()
+
+    async def callback(msg: ConsumerRecord, context):
+        if msg.offset == 1:
+            await release.wait()
+
+    manager.register_callback("test-topic", callback)
+
+    await manager.start()
+    await manager.consumer_task
+    await asyncio.sleep(0.01)
+
+    # Offset 1 is still in flight, so only offset 0 may be committed
+    await manager.commit_offsets()
+    tp = TopicPartition("test-topic", 0)
+    mock_consumer_instance.commit.assert_awaited_with({tp: 1})
+    assert "listener" in mock_consumer_instance.subscribe.call_args.kwargs
+
+    release.set()
+    await manager.stop()
+
+    # Shutdown drains in-flight callbacks and commits the final watermark
+    mock_consumer_instance.commit.assert_awaited_with({tp: 4})
+
+
+@pytest.mark.asyncio
+async def test_kafka_manager_batch_mode_delivers_lists_to_batch_callbacks(mocker):
+    # getmany() batches go to BATCH callbacks as a list, record callbacks per record
+    mocker.patch("utils.kafka_manager.settings.KAFKA_PROCESSING_MODE", "batch")
+    mock_consumer_cls = mocker.patch("utils.kafka_manager.AIOKafkaConsumer")
+    mock_consumer_instance = AsyncMock()
+    mock_consumer_cls.return_value = mock_consumer_instance
+    mocker.patch("utils.kafka_manager.AIOKafkaProducer", return_value=AsyncMock())
+    mocker.patch("utils.dead_letter.AIOKafkaProducer", return_value=AsyncMock())
+
+    records = [
+        ConsumerRecord(
+            topic="test-topic",
+            partition=0,
+            offset=offset,
+            timestamp=0,
+            timestamp_type=0,
+            key=None,
+            value=json.dumps({"n": offset}).encode("utf-8") if offset != 1 else b"{not json",
+            headers=[],
+            checksum=0,
+            serialized_key_size=0,
+            serialized_value_size=0,
+        )
+        for offset in range(3)
+    ]
+    mocker.patch("utils.kafka_manager.settings.KAFKA_DEAD_LETTER_TOPIC", "")
+    tp = TopicPartition("test-topic", 0)
+    mock_consumer_instance.getmany = AsyncMock(
+        side_effect=[{tp: records}, {}, asyncio.CancelledError()]
+    )
+    mock_consumer_instance.topics = AsyncMock(return_value={"test-topic"})
+    mock_consumer_instance.subscribe = MagicMock()
+    mock_consumer_instance.stop = AsyncMock()
+
+    manager = KafkaManager(
+        bootstrap_servers=["localhost:9092"],
+        consumer_group="test-group",
+        consumer_config=KafkaConsumerConfig(),
+        producer_config=KafkaProducerConfig(),
+    )
+
+    batches = []
+    singles = []
+
+    async def batch_callback(msgs, context):
+        batches.append([m.offset for m in msgs])
+
+    async def record_callback(msg, context):
+        singles.append(msg.offset)
+
+    manager.register_callback("test-topic", batch_callback, batch=True)
+    manager.register_callback("test-topic", record_callback)
+
+    await manager.start()
+    await manager.consumer_task
+    await manager.stop()
+
+    # The undeserializable record (offset 1) is skipped
+    assert batches == [[0, 2]]
+    assert sorted(singles) == [0, 2]
+
+
+@pytest.mark.asyncio
+async def test_kafka_manager_dead_letters_poison_and_failed_records(mocker):
+    # Undeserializable values and failing callbacks go to the DLQ with raw bytes
+    mock_consumer_cls = mocker.patch("utils.kafka_manager.AIOKafkaConsumer")
+    mock_consumer_instance = AsyncMock()
+    mock_consumer_cls.return_value = mock_consumer_instance
+    mocker.patch("utils.kafka_manager.AIOKafkaProducer", return_value=AsyncMock())
+
+    delivered = asyncio.get_running_loop().create_future()
+    delivered.set_result(None)
+    dlq_producer = AsyncMock()
+    dlq_producer.send = AsyncMock(return_value=delivered)
+    dlq_producer_cls = mocker.patch(
+        "utils.dead_letter.AIOKafkaProducer", return_value=dlq_producer
+    )
+
+    raw_values = [b"\xff\xfe not json", json.dumps({"fail": True}).encode("utf-8")]
+    records = [
+        ConsumerRecord(
+            topic="test-topic",
+            partition=0,
+            offset=offset,
+            timestamp=0,
+            timestamp_type=0,
+            key=b"key",
+            value=raw,
+            headers=[("trace-id", b"abc")],
+            checksum=0,
+            serialized_key_size=0,
+            serialized_value_size=0,
+        )
+        for offset, raw in enumerate(raw_values)
+    ]
+
+    async def async_iter():
+        for record in records:
+            yield record
+
+    mock_consumer_instance.__aiter__.side_effect = lambda: async_iter()
+    mock_consumer_instance.topics = AsyncMock(return_value={"test-topic"})
+    mock_consumer_instance.subscribe = MagicMock()
+    mock_consumer_instance.stop = AsyncMock()
+
+    manager = KafkaManager(
+        bootstrap_servers=["localhost:9092"],
+        consumer_group="test-group",
+        consumer_config=KafkaConsumerConfig(),
+        producer_config=KafkaProducerConfig(),
+    )
+
+    async def failing_callback(msg: ConsumerRecord, context):
+        raise RuntimeError("provider exploded")
+
+    manager.register_callback("test-topic", failing_callback)
+
+    await manager.start()
+    await manager.consumer_task
+    await manager.stop()
+
+    # The DLQ producer batches with a high linger
+    assert dlq_producer_cls.call_args.kwargs["linger_ms"] >= 100
+
+    assert dlq_producer.send.await_count == 2
+    (poison_call, failed_call) = dlq_producer.send.await_args_list
+    for call, raw in zip((poison_call, failed_call), raw_values):
+        assert call.args[0] == "dead-letter-queue"
+        assert call.kwargs["value"] == raw
+        assert call.kwargs["key"] == b"key"
+
+    poison_headers = dict(poison_call.kwargs["headers"])
+    failed_headers = dict(failed_call.kwargs["headers"])
+    assert poison_headers["trace-id"] == b"abc"
+    assert poison_headers["dlq.error.stage"] == b"deserialize"
+    assert failed_headers["dlq.error.stage"] == b"callback"
+    assert failed_headers["dlq.error.class"] == b"RuntimeError"
+    assert failed_headers["dlq.error.message"] == b"provider exploded"
+    assert failed_headers["dlq.original.offset"] == b"1"
+    dlq_producer.stop.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_kafka_manager_rejects_invalid_messages_before_scheduling(mocker):
+    # Values failing the value parser are dead-lettered and never reach callbacks
+    mock_consumer_cls = mocker.patch("utils.kafka_manager.AIOKafkaConsumer")
+    mock_consumer_instance = AsyncMock()
+    mock_consumer_cls.return_value = mock_consumer_instance
+    mocker.patch("utils.kafka_manager.AIOKafkaProducer", return_value=AsyncMock())
+    delivered = asyncio.get_running_loop().create_future()
+    delivered.set_result(None)
+    dlq_producer = AsyncMock()
+    dlq_producer.send = AsyncMock(return_value=delivered)
+    mocker.patch("utils.dead_letter.AIOKafkaProducer", return_value=dlq_producer)
+
+    values = [
+        {"provider": "discord", "template": "alert", "data": {"n": 0}},
+        {"provider": "discord", "data": {"n": 1}},
+    ]
+    records = [
+        ConsumerRecord(
+            topic="test-topic",
+            partition=0,
+            offset=offset,
+            timestamp=0,
+            timestamp_type=0,
+            key=None,
+            value=json.dumps(value).encode("utf-8"),
+            headers=[],
+            checksum=0,
+            serialized_key_size=0,
+            serialized_value_size=0,
+        )
+        for offset, value in enumerate(values)
+    ]
+
+    async def async_iter():
+        for record in records:
+            yield record
+
+    mock_consumer_instance.__aiter__.side_effect = lambda: async_iter()
+    mock_consumer_instance.topics = AsyncMock(return_value={"test-topic"})
+    mock_consumer_instance.subscribe = MagicMock()
+    mock_consumer_instance.stop = AsyncMock()
+
+    manager = KafkaManager(
+        bootstrap_servers=["localhost:9092"],
+        consumer_group="test-group",
+        consumer_config=KafkaConsumerConfig(),
+        producer_config=KafkaProducerConfig(),
+        value_parser=AlertMessage.from_dict,
+    )
+    received = []
+
+    async def record_callback(msg: ConsumerRecord, context):
+        received.append(msg.value)
+
+    manager.register_callback("test-topic", record_callback)
+    await manager.start()
+    await manager.consumer_task
+    await manager.stop()
+
+    assert len(received) == 1
+    assert isinstance(received[0], AlertMessage)
+    assert received[0].data == {"n": 0}
+    dlq_producer.send.assert_awaited_once()
+    headers = dict(dlq_producer.send.await_args.kwargs["headers"])
+    assert headers["dlq.error.stage"] == b"validate"
+    assert headers["dlq.error.class"] == b"InvalidMessageError"
+    assert headers["dlq.original.offset"] == b"1"
+
+
+@pytest.mark.asyncio
+async def test_kafka_manager_defers_records_until_due(mocker):
+    # A record with a future deliver-at header pauses and rewinds its partition
+    mock_consumer_cls = mocker.patch("utils.kafka_manager.AIOKafkaConsumer")
+    mock_consumer_instance = AsyncMock()
+    mock_consumer_cls.return_value = mock_consumer_instance
+    mocker.patch("utils.kafka_manager.AIOKafkaProducer", return_value=AsyncMock())
+    mocker.patch("utils.dead_letter.AIOKafkaProducer", return_value=AsyncMock())
+
+    def make_record(offset, headers):
+        return ConsumerRecord(
+            topic="alert-retry-5s",
+            partition=0,
+            offset=offset,
+            timestamp=0,
+            timestamp_type=0,
+            key=None,
+            value=json.dumps({"n": offset}).encode("utf-8"),
+            headers=headers,
+            checksum=0,
+            serialized_key_size=0,
+            serialized_value_size=0,
+        )
+
+    due = str(int(time.time() * 1000) - 1000).encode()
+    not_due = str(int(time.time() * 1000) + 100).encode()
+    records = [
+        make_record(0, [(DELIVER_AT_HEADER, due)]),
+        make_record(1, [(DELIVER_AT_HEADER, not_due)]),
+    ]
+
+    async def async_iter():
+        for record in records:
+            yield record
+
+    mock_consumer_instance.__aiter__.side_effect = lambda: async_iter()
+    mock_consumer_instance.topics = AsyncMock(return_value={"alert-retry-5s"})
+    mock_consumer_instance.subscribe = MagicMock()
+    mock_consumer_instance.pause = MagicMock()
+    mock_consumer_instance.resume = MagicMock()
+    mock_consumer_instance.seek = MagicMock()
+    mock_consumer_instance.stop = AsyncMock()
+
+    manager = KafkaManager(
+        bootstrap_servers=["localhost:9092"],
+        consumer_group="test-group",
+        consumer_config=KafkaConsumerConfig(),
+        producer_config=KafkaProducerConfig(),
+    )
+
+    seen = []
+
+    async def record_callback(msg: ConsumerRecord, context):
+        seen.append(msg.offset)
+
+    manager.register_callback("alert-retry-5s", record_callback)
+
+    await manager.start()
+    await manager.consumer_task
+    await asyncio.sleep(0)
+
+    tp = TopicPartition("alert-retry-5s", 0)
+    assert seen == [0]
+    mock_consumer_instance.pause.assert_called_once_with(tp)
+    mock_consumer_instance.seek.assert_called_once_with(tp, 1)
+    mock_consumer_instance.resume.assert_not_called()
+
+    await asyncio.sleep(0.2)
+    mock_consumer_instance.resume.assert_called_once_with(tp)
+    await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_kafka_manager_runs_shutdown_hooks_before_closing_producer(mocker):
+    # Digests and retries flushed from shutdown hooks can still be produced
+    producer = AsyncMock()
+    mocker.patch("utils.kafka_manager.AIOKafkaProducer", return_value=producer)
+    mocker.patch("utils.dead_letter.AIOKafkaProducer", return_value=AsyncMock())
+
+    manager = KafkaManager(
+        bootstrap_servers=["localhost:9092"],
+        consumer_group="test-group",
+        consumer_config=KafkaConsumerConfig(),
+        producer_config=KafkaProducerConfig(),
+    )
+    events = []
+
+    async def flush_hook():
+        events.append(("hook", producer.stop.await_count))
+
+    manager.add_shutdown_hook(flush_hook)
+    await manager.start()
+    await manager.stop()
+
+    assert events == [("hook", 0)]
+    producer.stop.assert_awaited_once()
+
+
+def _consumer_record(topic, offset, value, headers=()):
+    return ConsumerRecord(
+        topic=topic,
+        partition=0,
+        offset=offset,
+        timestamp=0,
+        timestamp_type=0,
+        key=None,
+        value=json.dumps(value).encode("utf-8"),
+        headers=list(headers),
+        checksum=0,
+        serialized_key_size=0,
+        serialized_value_size=0,
+    )
+
+
+def _mock_consumer(mocker, records, topics):
+    mock_consumer_instance = AsyncMock()
+    mocker.patch("utils.kafka_manager.AIOKafkaConsumer", return_value=mock_consumer_instance)
+    mocker.patch("utils.kafka_manager.AIOKafkaProducer", return_value=AsyncMock())
+    mocker.patch("utils.dead_letter.AIOKafkaProducer", return_value=AsyncMock())
+
+    async def async_iter():
+        for record in records:
+            yield record
+
+    mock_consumer_instance.__aiter__.side_effect = lambda: async_iter()
+    mock_consumer_instance.topics = AsyncMock(return_value=set(topics))
+    mock_consumer_instance.subscribe = MagicMock()
+    mock_consumer_instance.stop = AsyncMock()
+    return mock_consumer_instance
+
+
+@pytest.mark.asyncio
+async def test_kafka_manager_prefilter_drops_records_before_decoding(mocker):
+    records = [
+        _consumer_record("test-topic", 0, {"provider": "discord"}, [("provider", b"discord")]),
+        _consumer_record("test-topic", 1, {"provider": "pager"}, [("provider", b"pager")]),
+        _consumer_record("test-topic", 2, {"provider": "discord"}),
+    ]
+    _mock_consumer(mocker, records, {"test-topic"})
+
+    manager = KafkaManager(
+        bootstrap_servers=["localhost:9092"],
+        consumer_group="test-group",
+        consumer_config=KafkaConsumerConfig(),
+        producer_config=KafkaProducerConfig(),
+        prefilter=lambda route: route.provider in (None, "discord"),
+    )
+    loads = mocker.spy(manager.codec, "loads")
+    received = []
+
+    async def record_callback(msg: ConsumerRecord, context):
+        received.append(msg.offset)
+
+    manager.register_callback("test-topic", record_callback)
+    await manager.start()
+    await manager.consumer_task
+    await manager.stop()
+
+    assert received == [0, 2]
+    assert loads.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_kafka_manager_applies_prefilter_only_to_its_topic(mocker):
+    records = [
+        _consumer_record("alerts", 0, {"provider": "pager"}, [("provider", b"pager")]),
+        _consumer_record("audit", 0, {"provider": "pager"}, [("provider", b"pager")]),
+    ]
+    _mock_consumer(mocker, records, {"alerts", "audit"})
+
+    manager = KafkaManager(
+        bootstrap_servers=["localhost:9092"],
+        consumer_group="test-group",
+        consumer_config=KafkaConsumerConfig(),
+        producer_config=KafkaProducerConfig(),
+    )
+    received = []
+
+    async def record_callback(msg: ConsumerRecord, context):
+        received.append(msg.topic)
+
+    manager.register_callback(
+        "alerts", record_callback, prefilter=lambda route: route.provider == "discord"
+    )
+    manager.register_callback("audit", record_callback)
+    await manager.start()
+    await manager.consumer_task
+    await manager.stop()
+
+    assert received == ["audit"]
+
+
+@pytest.mark.asyncio
+async def test_kafka_manager_skips_decoding_for_topics_without_callbacks(mocker):
+    records = [_consumer_record("other-topic", 0, {"provider": "discord"})]
+    _mock_consumer(mocker, records, {"test-topic", "other-topic"})
+
+    manager = KafkaManager(
+        bootstrap_servers=["localhost:9092"],
+        consumer_group="test-group",
+        consumer_config=KafkaConsumerConfig(),
+        producer_config=KafkaProducerConfig(),
+    )
+    loads = mocker.spy(manager.codec, "loads")
+    manager.register_callback("test-topic", AsyncMock())
+    await manager.start()
+    await manager.consumer_task
+    await manager.stop()
+
+    loads.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_kafka_manager_decodes_large_values_in_thread_pool(mocker):
+    import threading
+
+    from core.config import settings
+
+    mocker.patch.object(settings, "KAFKA_DECODE_OFFLOAD_BYTES", 1024)
+    records = [
+        _consumer_record("test-topic", 0, {"provider": "discord"}),
+        _consumer_record("test-topic", 1, {"provider": "discord", "data": "x" * 2048}),
+    ]
+    _mock_consumer(mocker, records, {"test-topic"})
+
+    manager = KafkaManager(
+        bootstrap_servers=["localhost:9092"],
+        consumer_group="test-group",
+        consumer_config=KafkaConsumerConfig(),
+        producer_config=KafkaProducerConfig(),
+    )
+    threads = []
+    loads = manager.codec.loads
+
+    def recording_loads(raw):
+        threads.append(threading.current_thread().name)
+        return loads(raw)
+
+    manager.codec.loads = recording_loads
+    received = []
+
+    async def record_callback(msg: ConsumerRecord, context):
+        received.append(msg.value)
+
+    manager.register_callback("test-topic", record_callback)
+    await manager.start()
+    await manager.consumer_task
+    await manager.stop()
+
+    assert [len(value) for value in received] == [1, 2]
+    assert threads[0] == threading.main_thread().name
+    assert threads[1].startswith("kafka-decode")
+    assert manager._decode_executor is None
+
+
+@pytest.mark.asyncio
+async def test_kafka_manager_drops_partition_workers_on_revoke(mocker):
+    from core.config import settings
+
+    mocker.patch.object(settings, "KAFKA_PROCESSING_MODE", "partitioned")
+    records = [_consumer_record("test-topic", offset, {"n": offset}) for offset in range(2)]
+    consumer = _mock_consumer(mocker, records, {"test-topic"})
+    consumer.resume = MagicMock(side_effect=RuntimeError("partition is not assigned"))
+
+    manager = KafkaManager(
+        bootstrap_servers=["localhost:9092"],
+        consumer_group="test-group",
+        consumer_config=KafkaConsumerConfig(),
+        producer_config=KafkaProducerConfig(),
+    )
+    processed = []
+
+    async def record_callback(msg: ConsumerRecord, context):
+        processed.append(msg.offset)
+
+    manager.register_callback("test-topic", record_callback)
+    await manager.start()
+    await manager.consumer_task
+
+    # The listener is registered with auto commit as well
+    listener = consumer.subscribe.call_args.kwargs["listener"]
+    tp = TopicPartition("test-topic", 0)
+    assert tp in manager._partition_workers
+    await listener.on_partitions_revoked([tp])
+    await manager.stop()
+
+    assert processed == [0, 1]
+    assert tp not in manager._partition_workers
+
+
+@pytest.mark.asyncio
+async def test_kafka_manager_applies_value_parsers_per_topic(mocker):
+    records = {
+        "alerts": _consumer_record("alerts", 0, {"provider": "discord", "template": "t"}),
+        "metrics": _consumer_record("metrics", 0, {"cpu": 0.9}),
+    }
+
+    consumer = _mock_consumer(mocker, [], {"alerts", "metrics"})
+
+    async def async_iter():
+        for record in records.values():
+            yield record
+
+    consumer.__aiter__.side_effect = lambda: async_iter()
+    manager = KafkaManager(
+        bootstrap_servers=["localhost:9092"],
+        consumer_group="test-group",
+        consumer_config=KafkaConsumerConfig(),
+        producer_config=KafkaProducerConfig(),
+    )
+    received = {}
+
+    async def record_callback(msg: ConsumerRecord, context):
+        received[msg.topic] = msg.value
+
+    manager.register_callback("alerts", record_callback, value_parser=AlertMessage.from_dict)
+    manager.register_callback("metrics", record_callback)
+    await manager.start()
+    await manager.consumer_task
+    await manager.stop()
+
+    assert isinstance(received["alerts"], AlertMessage)
+    assert received["metrics"] == {"cpu": 0.9}
+
+
+@pytest.mark.asyncio
+async def test_kafka_manager_dead_letters_only_failed_batch_records(mocker):
+    from core.config import settings
+    from utils.kafka_manager import BatchCallbackError
+
+    mocker.patch.object(settings, "KAFKA_DEAD_LETTER_TOPIC", "alerts-dlq")
+    records = [_consumer_record("test-topic", offset, {"n": offset}) for offset in range(3)]
+    _mock_consumer(mocker, records, {"test-topic"})
+    delivered = asyncio.get_running_loop().create_future()
+    delivered.set_result(None)
+    dlq_producer = AsyncMock()
+    dlq_producer.send = AsyncMock(return_value=delivered)
+    mocker.patch("utils.dead_letter.AIOKafkaProducer", return_value=dlq_producer)
+
+    manager = KafkaManager(
+        bootstrap_servers=["localhost:9092"],
+        consumer_group="test-group",
+        consumer_config=KafkaConsumerConfig(),
+        producer_config=KafkaProducerConfig(),
+    )
+
+    async def batch_callback(msgs, context):
+        failed = [(msg, RuntimeError("boom")) for msg in msgs if msg.value["n"] == 1]
+        # A failure for a record the callback was not given only logs a warning
+        failed.append((_consumer_record("test-topic", 9, {"n": 9}), RuntimeError("stray")))
+        if failed:
+            raise BatchCallbackError("1 message failed", failed)
+
+    manager.register_callback("test-topic", batch_callback, batch=True)
+    await manager.start()
+    await manager.consumer_task
+    await manager.stop()
+
+    dlq_producer.send.assert_awaited_once()
+    headers = dict(dlq_producer.send.await_args.kwargs["headers"])
+    assert headers["dlq.original.offset"] == b"1"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_callback_tasks_do_not_mark_records_done(mocker):
+    manager = KafkaManager(
+        bootstrap_servers=["localhost:9092"],
+        consumer_group="test-group",
+        consumer_config=KafkaConsumerConfig(enable_auto_commit=False),
+        producer_config=KafkaProducerConfig(),
+    )
+    never = asyncio.Event()
+
+    async def wait_for_slot(lane):
+        await never.wait()
+
+    mocker.patch.object(manager._lanes, "acquire", wait_for_slot)
+    on_done = MagicMock()
+    record = _consumer_record("test-topic", 0, {"n": 0})
+
+    # Cancelled while waiting for a lane slot
+    waiting = asyncio.create_task(
+        manager._execute_callback_safe(AsyncMock(), record, on_done, acquired=False)
+    )
+    await asyncio.sleep(0)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    # Cancelled while the callback runs
+    async def slow_callback(msg, context):
+        await never.wait()
+
+    running = asyncio.create_task(manager._execute_callback_safe(slow_callback, record, on_done))
+    await asyncio.sleep(0)
+    running.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await running
+
+    on_done.assert_not_called()
@@ -0,0 +1,80 @@
+import threading
+import time
+from utils.log_notifier import BackgroundNotifier
+
+
+class RecordingNotifier:
+    """Stands in for apprise.Apprise and records every notification."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def notify(self, body, title=""):
+        self.release.wait()
+        time.sleep(self.delay)
+        self.calls.append({"body": body, "title": title})
+        return True
+
+
+def test_sink_does_not_block_on_a_slow_notifier():
+    notifier = RecordingNotifier(delay=0.2)
+    sink = BackgroundNotifier(notifier, batch_window=0.05, batch_max=100)
+
+    started = time.perf_counter()
+    for n in range(100):
+        sink(f"error {n}\n")
+    elapsed = time.perf_counter() - started
+    sink.stop()
+
+    assert elapsed < 0.1
+    assert sum(call["body"].count("error") for call in notifier.calls) == 100
+
+
+def test_repeated_messages_are_merged_into_one_notification():
+    notifier = RecordingNotifier()
+    sink = BackgroundNotifier(notifier, batch_window=0.2)
+
+    for _ in range(5):
+        sink("[kafka] broker down\n")
+    sink("[smtp] auth failed\n")
+    sink.stop()
+
+    assert notifier.calls == [
+        {"body": "[kafka] broker down (x5)\n[smtp] auth failed", "title": "6 errors"}
+    ]
+
+
+def test_full_queue_drops_records_and_reports_the_count():
+    notifier = RecordingNotifier()
+    notifier.release.clear()
+    sink = BackgroundNotifier(notifier, queue_size=2, batch_window=0.0, batch_max=1)
+
+    sink("first")
+    time.sleep(0.05)  # The worker takes "first" and blocks in notify
+    for n in range(5):
+        sink(f"storm {n}")
+    notifier.release.set()
+    sink.stop()
+
+    assert sink.dropped == 3
+    assert notifier.calls[0]["body"] == "first"
+    # The next notification tells how many records were lost
+    assert notifier.calls[1]["body"] == "storm 0\n... 3 more errors dropped"
+
+
+def test_rate_limit_merges_records_into_the_pending_batch():
+    notifier = RecordingNotifier()
+    sink = BackgroundNotifier(notifier, batch_window=0.0, rate_limit=1, rate_window=0.3)
+
+    sink("one")
+    time.sleep(0.05)
+    for _ in range(3):
+        sink("two")
+        time.sleep(0.01)
+    time.sleep(0.4)
+    sink.stop()
+
+    assert [call["body"] for call in notifier.calls] == ["one", "two (x3)"]
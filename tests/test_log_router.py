@@ -0,0 +1,86 @@
+import json
+import pytest
+from loguru import logger
+from utils.log_router import RoutingFileSink
+
+
+@pytest.fixture
+def add_sink():
+    """Adds a RoutingFileSink to loguru and removes it after the test."""
+    handler_ids = []
+
+    def add(sink: RoutingFileSink):
+        handler_ids.append(
+            logger.add(sink, level="DEBUG", filter=sink.accepts, format=sink.format)
+        )
+        return sink
+
+    yield add
+    for handler_id in handler_ids:
+        logger.remove(handler_id)
+
+
+def test_records_are_routed_to_the_file_of_their_name(tmp_path, add_sink):
+    sink = add_sink(RoutingFileSink(tmp_path))
+    sink.add_route("kafka")
+    sink.add_route("core.dispatcher")
+
+    logger.bind(name="kafka").info("consumer started")
+    logger.bind(name="core.dispatcher").warning("fallback sent")
+    logger.bind(name="not.routed").error("ignored")
+    sink.stop()
+
+    kafka = (tmp_path / "kafka.log").read_text(encoding="utf-8")
+    dispatcher = (tmp_path / "core.dispatcher.log").read_text(encoding="utf-8")
+    assert kafka.count("\n") == 1 and "INFO     |" in kafka and "consumer started" in kafka
+    assert dispatcher.count("\n") == 1 and "fallback sent" in dispatcher
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["core.dispatcher.log", "kafka.log"]
+
+
+def test_json_lines_include_location_extra_and_traceback(tmp_path, add_sink):
+    sink = add_sink(RoutingFileSink(tmp_path, serialize=True))
+    sink.add_route("kafka")
+
+    logger.bind(name="kafka", topic="alerts").info("consumer started")
+    try:
+        raise ValueError("bad payload")
+    except ValueError:
+        logger.bind(name="kafka").exception("decode failed")
+    sink.stop()
+
+    lines = (tmp_path / "kafka.jsonl").read_text(encoding="utf-8").splitlines()
+    first, second = (json.loads(line) for line in lines)
+    assert first["level"] == "INFO"
+    assert first["logger"] == "kafka"
+    assert first["message"] == "consumer started"
+    assert first["extra"] == {"topic": "alerts"}
+    assert first["function"] == "test_json_lines_include_location_extra_and_traceback"
+    assert second["message"].startswith("decode failed\n")
+    assert "ValueError: bad payload" in second["message"]
+
+
+def test_full_files_are_zipped_and_old_backups_removed(tmp_path, add_sink):
+    sink = add_sink(RoutingFileSink(tmp_path, max_bytes=200, backup_count=2))
+    sink.add_route("kafka")
+
+    for n in range(21):
+        logger.bind(name="kafka").info(f"message {n:02d} " + "x" * 50)
+    sink.stop()
+
+    backups = sorted(tmp_path.glob("kafka.*.log.zip"))
+    assert len(backups) == 2
+    assert (tmp_path / "kafka.log").stat().st_size < 200
+
+
+def test_rotation_counts_bytes_of_non_ascii_lines(tmp_path):
+    from utils.log_router import _RotatingFile
+
+    path = tmp_path / "kafka.log"
+    rotating = _RotatingFile(path, max_bytes=100, backup_count=5)
+    # 13 characters, 33 bytes in UTF-8
+    for _ in range(4):
+        rotating.write("메시지 처리 실패입니다\n")
+    rotating.close()
+
+    assert not path.exists()
+    assert len(list(tmp_path.glob("kafka.*.log.zip"))) == 1
@@ -0,0 +1,80 @@
+import pytest
+from core.message import AlertMessage, InvalidMessageError
+
+
+def test_from_dict_keeps_fields_and_unknown_keys():
+    value = {
+        "provider": "discord",
+        "template": "alert",
+        "destination": ["https://a", "https://b"],
+        "data": {"service": "api"},
+        "_retry": {"attempt": 1, "tier": 0},
+        "priority": "critical",
+    }
+
+    message = AlertMessage.from_dict(value)
+
+    assert message.provider == "discord"
+    assert message.template == "alert"
+    assert message.destination == ["https://a", "https://b"]
+    assert message.extra == {"_retry": {"attempt": 1, "tier": 0}, "priority": "critical"}
+    # Behaves like the dict it was built from
+    assert dict(message) == value
+    assert message.get("priority") == "critical"
+    assert "_retry" in message and "destination" in message
+    assert {**message, "x": 1} == {**value, "x": 1}
+
+
+def test_extra_keys_are_kept_when_optional_fields_are_missing():
+    message = AlertMessage.from_dict({"provider": "slack", "template": "t", "priority": "low"})
+
+    assert message.extra == {"priority": "low"}
+    assert "destination" not in message
+    assert message.get("destination") is None
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        ["not", "an", "object"],
+        {"template": "alert"},
+        {"provider": "", "template": "alert"},
+        {"provider": "discord"},
+        {"provider": "discord", "template": 3},
+        {"provider": "discord", "template": "alert", "destination": {"url": "x"}},
+        {"provider": "discord", "template": "alert", "destination": ["ok", 1]},
+    ],
+)
+def test_invalid_values_are_rejected(value):
+    with pytest.raises(InvalidMessageError):
+        AlertMessage.from_dict(value)
+
+
+def test_context_is_built_once_and_refreshed_with_kafka_meta():
+    message = AlertMessage.from_dict(
+        {
+            "provider": "email",
+            "template": "report",
+            "data": {"title": "Disk", "_mail_meta": {"subject": "S"}, "_private": 1},
+        }
+    )
+
+    context = message.context
+    assert context == {"title": "Disk", "_meta": {"subject": "S"}}
+    assert message.context is context
+
+    message.set_kafka_meta("alerts", 2, 41)
+    assert message.context == {
+        "title": "Disk",
+        "_meta": {"subject": "S"},
+        "topic": "alerts",
+        "partition": 2,
+        "offset": 41,
+    }
+    assert message["_kafka_meta"] == {"topic": "alerts", "partition": 2, "offset": 41}
+
+
+def test_non_object_data_is_passed_through():
+    message = AlertMessage.from_dict({"provider": "slack", "template": "t", "data": "raw text"})
+
+    assert message.context == {"data": "raw text"}
@@ -0,0 +1,95 @@
+import aiohttp
+import pytest
+from aiohttp.test_utils import unused_port
+from utils.metrics import MetricsRegistry, MetricsServer, _Metric
+
+
+def test_counters_and_gauges_are_exposed_per_label_set():
+    metrics = MetricsRegistry()
+    consumed = metrics.counter("consumed", "Records fetched.", ("topic", "partition"))
+    lag = metrics.gauge("lag", "Consumer lag.", ("topic",))
+
+    consumed.labels("alerts", 0).inc()
+    consumed.labels("alerts", 0).inc(2)
+    consumed.labels("alerts", 1).inc()
+    lag.labels('odd"topic').set(7)
+
+    text = metrics.expose()
+    assert "# TYPE consumed counter" in text
+    assert 'consumed_total{topic="alerts",partition="0"} 3' in text
+    assert 'consumed_total{topic="alerts",partition="1"} 1' in text
+    assert 'lag{topic="odd\\"topic"} 7' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    metrics = MetricsRegistry()
+    latency = metrics.histogram("latency", "Send latency.", ("provider",), buckets=(0.1, 1.0))
+
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.labels("discord").observe(value)
+
+    text = metrics.expose()
+    assert 'latency_bucket{provider="discord",le="0.1"} 1' in text
+    assert 'latency_bucket{provider="discord",le="1"} 3' in text
+    assert 'latency_bucket{provider="discord",le="+Inf"} 4' in text
+    assert 'latency_count{provider="discord"} 4' in text
+    assert 'latency_sum{provider="discord"} 4.05' in text
+
+
+def test_registry_rejects_conflicting_definitions_and_wrong_labels():
+    metrics = MetricsRegistry()
+    first = metrics.counter("sends", "Sends.", ("provider",))
+
+    assert metrics.counter("sends", "Sends.", ("provider",)) is first
+    with pytest.raises(ValueError):
+        metrics.gauge("sends", "Sends.", ("provider",))
+    with pytest.raises(ValueError):
+        first.labels("discord", "extra")
+
+
+def test_metric_kinds_must_implement_children_and_samples():
+    class Incomplete(_Metric):
+        def _new_child(self):
+            return 0
+
+    with pytest.raises(TypeError):
+        Incomplete("incomplete", "Missing _samples.")
+
+
+def test_collectors_run_before_each_scrape():
+    metrics = MetricsRegistry()
+    in_use = metrics.gauge("slots", "Slots in use.")
+    values = iter([1, 4])
+
+    def collect():
+        in_use.set(next(values))
+
+    def broken():
+        raise RuntimeError("boom")
+
+    metrics.add_collector(collect)
+    metrics.add_collector(broken)
+
+    assert "slots 1" in metrics.expose()
+    assert "slots 4" in metrics.expose()
+    metrics.remove_collector(collect)
+    assert "slots 4" in metrics.expose()
+
+
+@pytest.mark.asyncio
+async def test_metrics_server_serves_registry():
+    metrics = MetricsRegistry()
+    metrics.counter("dead_letters", "Dead letters.", ("topic",)).labels("alerts").inc()
+    port = unused_port()
+    server = MetricsServer("127.0.0.1", port, "/metrics", metrics)
+    await server.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{port}/metrics") as response:
+                body = await response.text()
+                assert response.status == 200
+                assert response.content_type == "text/plain"
+    finally:
+        await server.stop()
+
+    assert 'dead_letters_total{topic="alerts"} 1' in body
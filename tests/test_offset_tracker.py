@@ -0,0 +1,75 @@
+from aiokafka import TopicPartition
+from utils.offset_tracker import OffsetTracker
+
+TP = TopicPartition("alerts", 0)
+
+
+def test_watermark_waits_for_contiguous_completion():
+    """Test that out-of-order completions do not skip an unfinished offset."""
+    tracker = OffsetTracker()
+    for offset in range(4):
+        tracker.track(TP, offset)
+
+    tracker.done(TP, 0)
+    tracker.done(TP, 2)
+    tracker.done(TP, 3)
+    assert tracker.committable() == {TP: 1}
+
+    tracker.done(TP, 1)
+    assert tracker.committable() == {TP: 4}
+    assert tracker.pending(TP) == 0
+
+
+def test_nothing_committable_until_first_completion():
+    """Test that a partition with only in-flight records is not committed."""
+    tracker = OffsetTracker()
+    tracker.track(TP, 10)
+    assert tracker.committable() == {}
+
+
+def test_offset_gaps_are_handled():
+    """Test that compacted (non-contiguous) offsets still advance the watermark."""
+    tracker = OffsetTracker()
+    for offset in (5, 9, 12):
+        tracker.track(TP, offset)
+        tracker.done(TP, offset)
+    assert tracker.committable() == {TP: 13}
+
+
+def test_mark_committed_suppresses_unchanged_partitions():
+    """Test that committed watermarks are not reported again until they move."""
+    tracker = OffsetTracker()
+    other = TopicPartition("alerts", 1)
+    tracker.track(TP, 0)
+    tracker.track(other, 0)
+    tracker.done(TP, 0)
+    tracker.done(other, 0)
+    assert tracker.completed_since_commit == 2
+
+    tracker.mark_committed({TP: 1, other: 1})
+    assert tracker.committable() == {}
+    assert tracker.completed_since_commit == 0
+
+    tracker.track(TP, 1)
+    tracker.done(TP, 1)
+    assert tracker.committable() == {TP: 2}
+
+
+def test_forget_drops_revoked_partitions():
+    """Test that revoked partitions no longer produce commits."""
+    tracker = OffsetTracker()
+    tracker.track(TP, 0)
+    tracker.done(TP, 0)
+    tracker.forget([TP])
+    assert tracker.committable() == {}
+
+
+def test_duplicate_track_and_done_are_ignored():
+    """Test that re-delivered offsets and double completion are no-ops."""
+    tracker = OffsetTracker()
+    tracker.track(TP, 0)
+    tracker.track(TP, 0)
+    tracker.done(TP, 0)
+    tracker.done(TP, 0)
+    assert tracker.completed_since_commit == 1
+    assert tracker.committable() == {TP: 1}
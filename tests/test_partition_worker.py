@@ -0,0 +1,143 @@
+import asyncio
+import pytest
+from aiokafka import ConsumerRecord, TopicPartition
+from utils.partition_worker import PartitionWorker
+
+
+def make_record(offset, partition=0):
+    return ConsumerRecord(
+        topic="alerts",
+        partition=partition,
+        offset=offset,
+        timestamp=0,
+        timestamp_type=0,
+        key=None,
+        value={"offset": offset},
+        headers=[],
+        checksum=0,
+        serialized_key_size=0,
+        serialized_value_size=0,
+    )
+
+
+@pytest.fixture
+def hooks():
+    return {"paused": [], "resumed": []}
+
+
+def make_worker(handler, hooks, **kwargs):
+    return PartitionWorker(
+        TopicPartition("alerts", 0),
+        handler=handler,
+        on_full=hooks["paused"].append,
+        on_drained=hooks["resumed"].append,
+        **kwargs,
+    )
+
+
+async def test_records_are_processed_in_order(hooks):
+    """Test that records finish in submission order with concurrency 1."""
+    processed = []
+
+    async def handler(msg):
+        # Earlier records sleep longer; ordering must still hold
+        await asyncio.sleep(0.01 * (5 - msg.offset))
+        processed.append(msg.offset)
+
+    worker = make_worker(handler, hooks)
+    for offset in range(5):
+        worker.submit(make_record(offset))
+    await worker.join()
+    await worker.stop()
+
+    assert processed == [0, 1, 2, 3, 4]
+
+
+async def test_concurrency_limit_is_respected(hooks):
+    """Test that at most `concurrency` records run at the same time."""
+    running = 0
+    peak = 0
+
+    async def handler(msg):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    worker = make_worker(handler, hooks, concurrency=2)
+    for offset in range(6):
+        worker.submit(make_record(offset))
+    await worker.join()
+    await worker.stop()
+
+    assert peak == 2
+
+
+async def test_full_queue_pauses_and_drained_queue_resumes(hooks):
+    """Test that backpressure pauses the partition and resumes it later."""
+    release = asyncio.Event()
+
+    async def handler(msg):
+        await release.wait()
+
+    worker = make_worker(handler, hooks, max_queue_size=4)
+    for offset in range(5):
+        worker.submit(make_record(offset))
+    await asyncio.sleep(0)
+
+    assert worker.paused
+    assert hooks["paused"] == [TopicPartition("alerts", 0)]
+
+    release.set()
+    await worker.join()
+    await worker.stop()
+
+    assert not worker.paused
+    assert hooks["resumed"] == [TopicPartition("alerts", 0)]
+
+
+async def test_handler_errors_do_not_stop_the_worker(hooks):
+    """Test that a failing record does not block the following ones."""
+    processed = []
+
+    async def handler(msg):
+        if msg.offset == 0:
+            raise RuntimeError("boom")
+        processed.append(msg.offset)
+
+    worker = make_worker(handler, hooks)
+    worker.submit(make_record(0))
+    worker.submit(make_record(1))
+    await worker.join()
+    await worker.stop()
+
+    assert processed == [1]
+
+
+async def test_failing_hooks_do_not_stop_the_worker():
+    """Test that pausing or resuming a revoked partition does not kill the worker."""
+    processed = []
+    release = asyncio.Event()
+
+    async def handler(msg):
+        await release.wait()
+        processed.append(msg.offset)
+
+    def revoked(tp):
+        raise RuntimeError("partition is not assigned")
+
+    worker = PartitionWorker(
+        TopicPartition("alerts", 0),
+        handler=handler,
+        on_full=revoked,
+        on_drained=revoked,
+        max_queue_size=2,
+    )
+    for offset in range(3):
+        worker.submit(make_record(offset))
+    release.set()
+    await asyncio.wait_for(worker.join(), 1)
+    await worker.stop()
+
+    assert processed == [0, 1, 2]
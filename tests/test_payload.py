@@ -0,0 +1,25 @@
+import json
+import pickle
+from core.payload import JsonPayload, json_body
+
+
+def test_body_is_reused_until_the_payload_changes():
+    payload = JsonPayload({"a": 1}, body=b'{ "a" : 1 }')
+    assert payload.body == b'{ "a" : 1 }'
+
+    payload["b"] = 2
+    assert json.loads(payload.body) == {"a": 1, "b": 2}
+
+    payload.pop("a")
+    assert json.loads(payload.body) == {"b": 2}
+
+
+def test_json_body_serializes_plain_dicts():
+    assert json.loads(json_body({"text": "안녕"})) == {"text": "안녕"}
+    assert json_body(JsonPayload({}, body=b"{}")) == b"{}"
+
+
+def test_pickle_keeps_body():
+    payload = pickle.loads(pickle.dumps(JsonPayload({"a": 1}, body=b'{"a":1}')))
+    assert payload == {"a": 1}
+    assert payload.body == b'{"a":1}'
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from aiokafka import ConsumerRecord, TopicPartition
+from utils.kafka_manager import KafkaManager
+from utils.metrics import MESSAGES_CONSUMED
+from utils.priority import PriorityLanes, current_priority, priority_of_record
+from core.config import KafkaConsumerConfig, KafkaProducerConfig
+
+
+def make_record(topic="alerts", offset=0, value=None, headers=None, partition=0):
+    return ConsumerRecord(
+        topic=topic,
+        partition=partition,
+        offset=offset,
+        timestamp=0,
+        timestamp_type=0,
+        key=None,
+        value=value,
+        headers=headers or [],
+        checksum=0,
+        serialized_key_size=0,
+        serialized_value_size=0,
+    )
+
+
+def test_budgets_are_shares_of_total():
+    lanes = PriorityLanes(10, {"critical": 1.0, "low": 0.1}, default="low")
+
+    assert lanes.budget("critical") == 10
+    assert lanes.budget("low") == 1
+    assert lanes.resolve("unknown") == "low"
+    assert lanes.most_urgent(["low", "critical"]) == "low"  # Equal weights: first wins
+
+
+@pytest.mark.asyncio
+async def test_saturated_low_lane_leaves_room_for_critical():
+    lanes = PriorityLanes(4, {"critical": 1.0, "low": 0.5}, {"critical": 8, "low": 1})
+    await lanes.acquire("low")
+    await lanes.acquire("low")
+
+    blocked = asyncio.create_task(lanes.acquire("low"))
+    await asyncio.sleep(0)
+    assert not blocked.done()
+    assert lanes.waiting("low") == 1
+
+    # The low lane is at its budget, but critical still gets a slot at once
+    await asyncio.wait_for(lanes.acquire("critical"), timeout=0.1)
+    assert lanes.in_use("critical") == 1
+
+    lanes.release("low")
+    await asyncio.wait_for(blocked, timeout=0.1)
+    assert lanes.in_use("low") == 2
+
+
+@pytest.mark.asyncio
+async def test_free_slots_are_handed_out_by_weight():
+    lanes = PriorityLanes(1, {"critical": 1.0, "low": 1.0}, {"critical": 3, "low": 1})
+    await lanes.acquire("critical")
+
+    order = []
+
+    async def worker(lane):
+        async with lanes.slot(lane):
+            order.append(lane)
+            await asyncio.sleep(0)
+
+    tasks = [asyncio.create_task(worker(lane)) for lane in ["low"] * 4 + ["critical"] * 4]
+    await asyncio.sleep(0)
+    lanes.release("critical")
+    await asyncio.gather(*tasks)
+
+    # Critical is served three times as often, but low is not starved
+    assert order[:4] == ["critical", "critical", "low", "critical"]
+    assert sorted(order) == ["critical"] * 4 + ["low"] * 4
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_a_slot():
+    lanes = PriorityLanes(1, {"default": 1.0})
+    await lanes.acquire()
+    waiter = asyncio.create_task(lanes.acquire())
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    lanes.release()
+
+    assert lanes.waiting("default") == 0
+    await asyncio.wait_for(lanes.acquire(), timeout=0.1)
+
+
+def test_priority_of_record_lookup_order(mocker):
+    config = mocker.patch("utils.priority.settings.PRIORITY_CONFIG")
+    config.HEADER = "priority"
+    config.FIELD = "priority"
+    config.TOPIC_PRIORITIES = {"pager": "critical"}
+    config.DEFAULT = "normal"
+
+    header = make_record(value={"priority": "low"}, headers=[("priority", b"high")])
+    field = make_record(topic="pager", value={"priority": "low"})
+
+    assert priority_of_record(header) == "high"
+    assert priority_of_record(field) == "low"
+    assert priority_of_record(make_record(topic="pager", value={})) == "critical"
+    assert priority_of_record(make_record(value=[1, 2])) == "normal"
+
+
+@pytest.mark.asyncio
+async def test_kafka_manager_holds_partitions_of_a_full_lane(mocker):
+    # A backlogged low lane pauses its partition while critical records proceed
+    config = mocker.patch("utils.kafka_manager.settings.PRIORITY_CONFIG")
+    config.ENABLED = True
+    config.MAX_BACKLOG = 1
+    mocker.patch("utils.kafka_manager.settings.KAFKA_MAX_CONCURRENT_TASKS", 4)
+    lanes = PriorityLanes(4, {"critical": 1.0, "low": 0.25}, {"critical": 8, "low": 1})
+    mocker.patch.object(PriorityLanes, "from_config", return_value=lanes)
+    mocker.patch(
+        "utils.kafka_manager.priority_of_record",
+        side_effect=lambda msg: msg.value["priority"],
+    )
+
+    mock_consumer_cls = mocker.patch("utils.kafka_manager.AIOKafkaConsumer")
+    consumer = AsyncMock()
+    mock_consumer_cls.return_value = consumer
+    mocker.patch("utils.kafka_manager.AIOKafkaProducer", return_value=AsyncMock())
+    mocker.patch("utils.dead_letter.AIOKafkaProducer", return_value=AsyncMock())
+
+    def encoded(offset, priority, partition):
+        value = json.dumps({"n": offset, "priority": priority}).encode("utf-8")
+        return make_record(offset=offset, value=value, partition=partition)
+
+    records = [
+        encoded(0, "low", 0),
+        encoded(1, "low", 0),
+        encoded(2, "low", 0),
+        encoded(0, "critical", 1),
+    ]
+
+    async def async_iter():
+        for record in records:
+            yield record
+            await asyncio.sleep(0)  # Let the spawned callbacks reach their lane
+
+    consumer.__aiter__.side_effect = lambda: async_iter()
+    consumer.topics = AsyncMock(return_value={"alerts"})
+    consumer.subscribe = MagicMock()
+    consumer.pause = MagicMock()
+    consumer.resume = MagicMock()
+    consumer.seek = MagicMock()
+    consumer.stop = AsyncMock()
+
+    manager = KafkaManager(
+        bootstrap_servers=["localhost:9092"],
+        consumer_group="test-group",
+        consumer_config=KafkaConsumerConfig(),
+        producer_config=KafkaProducerConfig(),
+    )
+
+    release_low = asyncio.Event()
+    seen = []
+
+    async def callback(msg: ConsumerRecord, context):
+        seen.append((msg.value["priority"], current_priority.get()))
+        if msg.value["priority"] == "low":
+            await release_low.wait()
+
+    manager.register_callback("alerts", callback)
+    consumed = MESSAGES_CONSUMED.labels("alerts", 0)
+    consumed_before = consumed.value
+    await manager.start()
+    await manager.consumer_task
+    await asyncio.sleep(0.05)
+
+    # One low record runs, one waits for the lane, the third is held back
+    tp = TopicPartition("alerts", 0)
+    consumer.seek.assert_called_once_with(tp, 2)
+    consumer.pause.assert_called_once_with(tp)
+    # The held record is counted once it is fetched again
+    assert consumed.value - consumed_before == 2
+    assert manager._fetched[tp] == 1
+    assert ("critical", "critical") in seen
+    assert seen.count(("low", "low")) == 1
+
+    release_low.set()
+    await asyncio.sleep(0.05)
+    consumer.resume.assert_called_with(tp)
+    assert seen.count(("low", "low")) == 2
+    await manager.stop()
@@ -0,0 +1,117 @@
+import time
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from core.providers.discord import DiscordProvider
+from core.providers.slack import SlackProvider
+from core.providers.rate_limit import WebhookRateLimiter
+
+
+@pytest.fixture
+async def rate_limited_server():
+    """Local webhook stub answering the first N requests of each path with 429."""
+    state = {"limited": {}, "hits": []}
+
+    async def handler(request):
+        path = request.path
+        state["hits"].append((path, time.monotonic()))
+        remaining = state["limited"].get(path, 0)
+        if remaining > 0:
+            state["limited"][path] = remaining - 1
+            return web.json_response(
+                {"message": "You are being rate limited.", "retry_after": 0.2},
+                status=429,
+                headers={"Retry-After": "0.2", "X-RateLimit-Global": "false"},
+            )
+        return web.Response(
+            status=204,
+            headers={
+                "X-RateLimit-Limit": "2",
+                "X-RateLimit-Remaining": "1",
+                "X-RateLimit-Reset-After": "0.3",
+            },
+        )
+
+    app = web.Application()
+    app.router.add_post("/{name}", handler)
+    server = TestServer(app)
+    await server.start_server()
+    server.state = state
+    yield server
+    await server.close()
+
+
+@pytest.mark.parametrize("provider_cls", [DiscordProvider, SlackProvider])
+async def test_429_is_retried_after_retry_after(provider_cls, rate_limited_server):
+    """Test that a 429 response is retried once the advertised delay passed."""
+    rate_limited_server.state["limited"]["/hook"] = 1
+    provider = provider_cls()
+    url = str(rate_limited_server.make_url("/hook"))
+    try:
+        assert await provider.send(url, {"content": "retry me"})
+    finally:
+        await provider.stop()
+
+    hits = rate_limited_server.state["hits"]
+    assert len(hits) == 2
+    assert hits[1][1] - hits[0][1] >= 0.2
+
+
+async def test_gives_up_after_max_retries(mocker, rate_limited_server):
+    """Test that a webhook that keeps answering 429 is eventually reported failed."""
+    mocker.patch(
+        "core.providers.webhook.settings.WEBHOOK_CONFIG.RATE_LIMIT_MAX_RETRIES", 1
+    )
+    rate_limited_server.state["limited"]["/hook"] = 5
+    provider = DiscordProvider()
+    url = str(rate_limited_server.make_url("/hook"))
+    try:
+        assert not await provider.send(url, {"content": "never"})
+    finally:
+        await provider.stop()
+
+    assert len(rate_limited_server.state["hits"]) == 2
+
+
+async def test_learned_bucket_paces_sends(rate_limited_server):
+    """Test that X-RateLimit headers pace requests without hitting 429."""
+    provider = DiscordProvider()
+    url = str(rate_limited_server.make_url("/paced"))
+    try:
+        for i in range(3):
+            assert await provider.send(url, {"content": f"msg {i}"})
+    finally:
+        await provider.stop()
+
+    # The bucket allows 2 requests per 0.3s window, so the third waits for a reset
+    hits = [t for _, t in rate_limited_server.state["hits"]]
+    assert hits[2] - hits[0] >= 0.25
+
+
+async def test_limiter_blocks_bucket_on_429():
+    """Test that update() blocks the bucket for the Retry-After duration."""
+    limiter = WebhookRateLimiter(default_limit=5, default_window=1.0)
+
+    delay = limiter.update("https://hook", 429, {"Retry-After": "0.1"})
+
+    assert delay == pytest.approx(0.1)
+    started = time.monotonic()
+    await limiter.acquire("https://hook")
+    assert time.monotonic() - started >= 0.09
+
+
+async def test_limiter_global_429_blocks_every_webhook():
+    """Test that a global rate limit also delays other webhook URLs."""
+    limiter = WebhookRateLimiter()
+
+    limiter.update("https://a", 429, {"Retry-After": "0.1", "X-RateLimit-Global": "true"})
+
+    started = time.monotonic()
+    await limiter.acquire("https://b")
+    assert time.monotonic() - started >= 0.09
+
+
+def test_limiter_ignores_successful_responses_without_headers():
+    """Test that a plain 2xx response yields no retry delay."""
+    limiter = WebhookRateLimiter()
+    assert limiter.update("https://a", 204, {}) is None
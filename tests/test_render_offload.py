@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock
+from core.payload import JsonPayload
+from core.render_offload import RenderOffloader, RenderTimeoutError
+from core.renderer import TemplateRenderer
+
+
+def slow_renderer(delay):
+    """Renderer mock that records the rendering thread."""
+    renderer = MagicMock(spec=TemplateRenderer)
+    renderer.threads = []
+
+    def render(template_name, data):
+        renderer.threads.append(threading.current_thread().name)
+        time.sleep(delay)
+        return f"{template_name}:{data['n']}"
+
+    renderer.render.side_effect = render
+    return renderer
+
+
+async def test_expensive_templates_are_offloaded_cheap_ones_stay_inline():
+    renderer = slow_renderer(0.02)
+    offloader = RenderOffloader(renderer, executor="thread", threshold_ms=10)
+    try:
+        assert await offloader.render("slow", {"n": 1}) == "slow:1"
+        assert await offloader.render("slow", {"n": 2}) == "slow:2"
+    finally:
+        await offloader.stop()
+
+    main_thread = threading.current_thread().name
+    assert renderer.threads[0] == main_thread  # first render is measured inline
+    assert renderer.threads[1].startswith("render")
+    assert offloader.average_render_time("slow") >= 0.01
+
+    cheap = slow_renderer(0)
+    offloader = RenderOffloader(cheap, executor="thread", threshold_ms=10)
+    for n in range(3):
+        await offloader.render("cheap", {"n": n})
+    assert cheap.threads == [main_thread] * 3
+
+
+async def test_offloaded_render_times_out():
+    renderer = slow_renderer(0.2)
+    offloader = RenderOffloader(renderer, executor="thread", threshold_ms=1, timeout=0.05)
+    try:
+        await offloader.render("slow", {"n": 1})
+        with pytest.raises(RenderTimeoutError):
+            await offloader.render("slow", {"n": 2})
+    finally:
+        await offloader.stop()
+
+
+async def test_process_workers_render_preloaded_templates(temp_template_dir):
+    (temp_template_dir / "alert.json.j2").write_text(
+        '{"service": "{{ service }}"}', encoding="utf-8"
+    )
+    renderer = TemplateRenderer(template_dir=str(temp_template_dir), precompile=True)
+    offloader = RenderOffloader(renderer, executor="process", max_workers=1, threshold_ms=0)
+    await offloader.start()
+    try:
+        inline = await offloader.render("alert.json.j2", {"service": "api"})
+        offloaded = await offloader.render("alert.json.j2", {"service": "db"})
+    finally:
+        await offloader.stop()
+
+    assert inline == {"service": "api"}
+    assert isinstance(offloaded, JsonPayload)
+    assert offloaded == {"service": "db"}
+    assert offloaded.body == b'{"service": "db"}'
+
+
+async def test_process_pool_is_replaced_after_a_timeout(temp_template_dir):
+    (temp_template_dir / "slow.html.j2").write_text(
+        "{% for i in range(1500) %}{% for j in range(1500) %}{% endfor %}{% endfor %}done",
+        encoding="utf-8",
+    )
+    (temp_template_dir / "fast.html.j2").write_text("{{ n }}", encoding="utf-8")
+    renderer = TemplateRenderer(template_dir=str(temp_template_dir), precompile=True)
+    offloader = RenderOffloader(renderer, executor="process", max_workers=1, timeout=0.1)
+    await offloader.start()
+    # Both templates are already known to be expensive, so they are offloaded
+    offloader._render_times.update({"slow.html.j2": 1.0, "fast.html.j2": 1.0})
+    try:
+        first_pool = offloader._executor
+        # Workers log to stderr instead of the parent's LOG_DIR files
+        assert first_pool.submit(os.getenv, "APP_CONFIG__LOG_STDERR_ONLY").result() == "true"
+        assert os.getenv("APP_CONFIG__LOG_STDERR_ONLY") is None
+
+        with pytest.raises(RenderTimeoutError):
+            await offloader.render("slow.html.j2", {})
+        assert await offloader.render("fast.html.j2", {"n": 1}) == "1"
+        assert offloader._executor is not first_pool
+    finally:
+        await offloader.stop()
@@ -1,5 +1,7 @@
 import pytest
 from jinja2 import TemplateNotFound
+from core.payload import JsonPayload
+from core.renderer import TemplateRenderer
 
 
 def test_render_json_success(renderer, temp_template_dir):
@@ -48,3 +50,122 @@ def test_render_from_string_text(renderer):
     content = "Hello {{ name }}!"
     result = renderer.render_from_string(content, {"name": "world"}, is_json=False)
     assert result == "Hello world!"
+
+
+def test_precompiled_renders_without_filesystem_access(temp_template_dir, mocker):
+    (temp_template_dir / "cached.html.j2").write_text("<p>{{ v }}</p>", encoding="utf-8")
+    renderer = TemplateRenderer(template_dir=str(temp_template_dir), precompile=True)
+
+    get_source = mocker.spy(renderer.env.loader, "get_source")
+    stat = mocker.patch("os.stat", side_effect=AssertionError("filesystem access"))
+
+    assert renderer.render("cached.html.j2", {"v": 1}) == "<p>1</p>"
+    get_source.assert_not_called()
+    stat.assert_not_called()
+
+
+def test_precompiled_unknown_template_raises(temp_template_dir):
+    renderer = TemplateRenderer(template_dir=str(temp_template_dir), precompile=True)
+    with pytest.raises(TemplateNotFound):
+        renderer.render("missing.html.j2", {})
+
+
+async def test_precompiled_hot_reload_swaps_changed_templates(temp_template_dir):
+    path = temp_template_dir / "greet.html.j2"
+    path.write_text("Hello {{ name }}", encoding="utf-8")
+    renderer = TemplateRenderer(template_dir=str(temp_template_dir), precompile=True)
+
+    assert not await renderer.reload_if_changed()
+
+    path.write_text("Bye {{ name }}!", encoding="utf-8")
+    (temp_template_dir / "broken.html.j2").write_text("{% if %}", encoding="utf-8")
+    assert await renderer.reload_if_changed()
+
+    assert renderer.render("greet.html.j2", {"name": "a"}) == "Bye a!"
+    # A template that does not compile is left out instead of failing the reload
+    with pytest.raises(TemplateNotFound):
+        renderer.render("broken.html.j2", {})
+
+
+def test_render_json_keeps_rendered_text_as_body(renderer, temp_template_dir):
+    p = temp_template_dir / "embed.json.j2"
+    p.write_text('{"embeds": [{"title": "{{ title }}"}]}', encoding="utf-8")
+
+    result = renderer.render("embed.json.j2", {"title": "Down"})
+    assert isinstance(result, JsonPayload)
+    assert result.body == b'{"embeds": [{"title": "Down"}]}'
+
+
+def test_render_cache_ignores_kafka_fields(temp_template_dir, mocker):
+    (temp_template_dir / "alert.json.j2").write_text(
+        '{"service": "{{ service }}"}', encoding="utf-8"
+    )
+    renderer = TemplateRenderer(
+        template_dir=str(temp_template_dir), precompile=True, cache_size=10
+    )
+    render = mocker.spy(renderer._templates["alert.json.j2"], "render")
+
+    first = renderer.render("alert.json.j2", {"service": "api", "offset": 1})
+    second = renderer.render("alert.json.j2", {"service": "api", "offset": 2})
+    renderer.render("alert.json.j2", {"service": "db", "offset": 3})
+
+    assert first == second == {"service": "api"}
+    assert second.body == first.body
+    assert render.call_count == 2
+    assert renderer.cache_stats == {"size": 2, "hits": 1, "misses": 2, "evictions": 0}
+
+
+def test_render_cache_is_not_changed_by_nested_mutations(temp_template_dir):
+    (temp_template_dir / "embed.json.j2").write_text(
+        '{"embeds": [{"title": "{{ title }}"}]}', encoding="utf-8"
+    )
+    renderer = TemplateRenderer(
+        template_dir=str(temp_template_dir), precompile=True, cache_size=10
+    )
+
+    first = renderer.render("embed.json.j2", {"title": "Down"})
+    first["embeds"][0]["title"] = "Changed"
+    second = renderer.render("embed.json.j2", {"title": "Down"})
+    second["embeds"].append({"title": "Extra"})
+    third = renderer.render("embed.json.j2", {"title": "Down"})
+
+    assert third == {"embeds": [{"title": "Down"}]}
+    assert third.body == b'{"embeds": [{"title": "Down"}]}'
+    assert renderer.cache_stats["hits"] == 2
+
+
+def test_render_cache_keys_on_kafka_fields_a_template_uses(temp_template_dir):
+    (temp_template_dir / "where.html.j2").write_text("{{ topic }}@{{ offset }}", encoding="utf-8")
+    renderer = TemplateRenderer(
+        template_dir=str(temp_template_dir), precompile=True, cache_size=10
+    )
+
+    assert renderer.render("where.html.j2", {"topic": "t", "offset": 1}) == "t@1"
+    assert renderer.render("where.html.j2", {"topic": "t", "offset": 2}) == "t@2"
+
+
+def test_lazy_render_cache_keys_on_kafka_fields_a_template_uses(temp_template_dir):
+    (temp_template_dir / "where.html.j2").write_text("{{ topic }}@{{ offset }}", encoding="utf-8")
+    (temp_template_dir / "plain.html.j2").write_text("{{ service }}", encoding="utf-8")
+    renderer = TemplateRenderer(template_dir=str(temp_template_dir), cache_size=10)
+
+    assert renderer.render("where.html.j2", {"topic": "t", "offset": 1}) == "t@1"
+    assert renderer.render("where.html.j2", {"topic": "t", "offset": 2}) == "t@2"
+
+    # Templates that do not use them still share cache entries across offsets
+    renderer.render("plain.html.j2", {"service": "api", "offset": 1})
+    renderer.render("plain.html.j2", {"service": "api", "offset": 2})
+    assert renderer.cache_stats["hits"] == 1
+
+
+async def test_render_cache_misses_after_reload(temp_template_dir):
+    path = temp_template_dir / "greet.html.j2"
+    path.write_text("Hello {{ name }}", encoding="utf-8")
+    renderer = TemplateRenderer(
+        template_dir=str(temp_template_dir), precompile=True, cache_size=10
+    )
+    assert renderer.render("greet.html.j2", {"name": "a"}) == "Hello a"
+
+    path.write_text("Hi {{ name }}", encoding="utf-8")
+    await renderer.reload_if_changed()
+    assert renderer.render("greet.html.j2", {"name": "a"}) == "Hi a"
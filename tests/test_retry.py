@@ -0,0 +1,144 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from aiohttp import ClientConnectionError
+from aiosmtplib import SMTPResponseException
+from core.config import RetryConfig
+from core.retry import (
+    RetryScheduler,
+    backoff_delay,
+    delay_topic_name,
+    is_transient_error,
+    is_transient_status,
+)
+from utils.kafka_manager import DELIVER_AT_HEADER
+
+
+def test_backoff_delay_is_jittered_and_capped():
+    """Test that delays stay within the exponential bound and the cap."""
+    for attempt in range(10):
+        delay = backoff_delay(attempt, base=1.0, cap=30.0)
+        assert 0 <= delay <= min(30.0, 2**attempt)
+
+
+def test_delay_topic_names():
+    """Test that tier delays map to readable topic names."""
+    assert delay_topic_name("alert-retry", 5) == "alert-retry-5s"
+    assert delay_topic_name("alert-retry", 60) == "alert-retry-1m"
+    assert delay_topic_name("alert-retry", 90) == "alert-retry-90s"
+    assert delay_topic_name("alert-retry", 7200) == "alert-retry-2h"
+
+
+def test_transient_classification():
+    """Test which statuses and errors are considered worth retrying."""
+    assert is_transient_status(503)
+    assert is_transient_status(429)
+    assert not is_transient_status(404)
+    assert is_transient_error(asyncio.TimeoutError())
+    assert is_transient_error(ClientConnectionError())
+    assert is_transient_error(SMTPResponseException(451, "try later"))
+    assert not is_transient_error(SMTPResponseException(550, "no such user"))
+    assert not is_transient_error(ValueError("bad template"))
+
+
+async def test_in_process_retry_runs_without_blocking():
+    """Test that an in-process retry is scheduled and replays the message later."""
+    scheduler = RetryScheduler(RetryConfig(ENABLED=True, BASE_DELAY=0.01, MAX_DELAY=0.01))
+    processor = AsyncMock()
+
+    assert await scheduler.schedule({"provider": "slack"}, ["u1"], processor)
+    assert scheduler.pending == 1
+    processor.assert_not_awaited()
+
+    await asyncio.sleep(0.05)
+    processor.assert_awaited_once_with(
+        {"provider": "slack", "destination": ["u1"], "_retry": {"attempt": 1, "tier": 0}}
+    )
+    assert scheduler.pending == 0
+
+
+async def test_retries_move_to_delay_topics_then_exhaust(mocker):
+    """Test that retries beyond the in-process attempts go through each delay tier."""
+    manager = MagicMock()
+    manager.send_message = AsyncMock()
+    manager.subscribed_topics = ["alert-retry-5s", "alert-retry-1m", "alert-retry-10m"]
+    mocker.patch("core.retry.get_kafka_manager", return_value=manager)
+    scheduler = RetryScheduler(
+        RetryConfig(ENABLED=True, IN_PROCESS_ATTEMPTS=0, TOPIC_DELAYS=[5, 60])
+    )
+
+    message = {"provider": "slack"}
+    assert await scheduler.schedule(message, "u1", AsyncMock())
+    first = manager.send_message.await_args
+    assert first.args[0] == "alert-retry-5s"
+    assert first.kwargs["headers"][0][0] == DELIVER_AT_HEADER
+
+    assert await scheduler.schedule(first.args[1], "u1", AsyncMock())
+    second = manager.send_message.await_args
+    assert second.args[0] == "alert-retry-1m"
+    assert second.args[1]["_retry"] == {"attempt": 2, "tier": 2}
+
+    # Every tier has been used
+    assert not await scheduler.schedule(second.args[1], "u1", AsyncMock())
+    assert manager.send_message.await_count == 2
+
+
+async def test_pending_cap_overflows_to_delay_topic(mocker):
+    """Test that retries beyond MAX_PENDING skip the in-process tier."""
+    manager = MagicMock()
+    manager.send_message = AsyncMock()
+    manager.subscribed_topics = ["alert-retry-5s", "alert-retry-1m", "alert-retry-10m"]
+    mocker.patch("core.retry.get_kafka_manager", return_value=manager)
+    scheduler = RetryScheduler(RetryConfig(ENABLED=True, BASE_DELAY=10, MAX_PENDING=1))
+
+    await scheduler.schedule({"n": 1}, "u1", AsyncMock())
+    await scheduler.schedule({"n": 2}, "u1", AsyncMock())
+
+    assert scheduler.pending == 1
+    assert manager.send_message.await_args.args[1]["n"] == 2
+    await scheduler.stop()
+
+
+async def test_stop_moves_waiting_retries_to_delay_topic(mocker):
+    """Test that in-process retries are not lost on shutdown."""
+    manager = MagicMock()
+    manager.send_message = AsyncMock()
+    manager.subscribed_topics = ["alert-retry-5s", "alert-retry-1m", "alert-retry-10m"]
+    mocker.patch("core.retry.get_kafka_manager", return_value=manager)
+    scheduler = RetryScheduler(RetryConfig(ENABLED=True, BASE_DELAY=10, MAX_DELAY=10))
+    processor = AsyncMock()
+
+    await scheduler.schedule({"provider": "slack"}, "u1", processor)
+    await scheduler.stop()
+
+    processor.assert_not_awaited()
+    assert scheduler.pending == 0
+    assert manager.send_message.await_args.args[0] == "alert-retry-5s"
+
+
+async def test_unconsumed_delay_topics_fall_back(mocker):
+    """Test that retries are not published to delay topics nobody consumes."""
+    manager = MagicMock()
+    manager.send_message = AsyncMock()
+    manager.subscribed_topics = ["alerts"]
+    mocker.patch("core.retry.get_kafka_manager", return_value=manager)
+    scheduler = RetryScheduler(RetryConfig(ENABLED=True, IN_PROCESS_ATTEMPTS=0))
+
+    assert not await scheduler.schedule({"provider": "slack"}, "u1", AsyncMock())
+    manager.send_message.assert_not_awaited()
+
+
+async def test_manual_commit_skips_the_in_process_tier(mocker):
+    """Test that retries are backed by a delay topic when offsets are committed manually."""
+    manager = MagicMock()
+    manager.send_message = AsyncMock()
+    manager.subscribed_topics = ["alert-retry-5s"]
+    mocker.patch("core.retry.get_kafka_manager", return_value=manager)
+    mocker.patch(
+        "core.retry.settings.KAFKA_CONSUMER_CONFIG.enable_auto_commit", False
+    )
+    scheduler = RetryScheduler(RetryConfig(ENABLED=True))
+
+    assert await scheduler.schedule({"provider": "slack"}, "u1", AsyncMock())
+    assert scheduler.pending == 0
+    assert manager.send_message.await_args.args[0] == "alert-retry-5s"
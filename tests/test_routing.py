@@ -0,0 +1,30 @@
+from aiokafka import ConsumerRecord
+
+from utils.routing import RoutingInfo
+
+
+def _record(headers):
+    return ConsumerRecord(
+        topic="alerts",
+        partition=0,
+        offset=0,
+        timestamp=0,
+        timestamp_type=0,
+        key=None,
+        value=b"{}",
+        headers=headers,
+        checksum=0,
+        serialized_key_size=0,
+        serialized_value_size=0,
+    )
+
+
+def test_routing_info_reads_headers():
+    route = RoutingInfo.from_record(
+        _record([("provider", b"slack"), ("template", b"ops/alert"), ("priority", b"critical")])
+    )
+    assert route == RoutingInfo("alerts", "slack", "ops/alert", "critical")
+
+
+def test_routing_info_without_headers():
+    assert RoutingInfo.from_record(_record([])) == RoutingInfo("alerts")
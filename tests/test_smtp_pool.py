@@ -0,0 +1,210 @@
+import asyncio
+import pytest
+import aiosmtplib
+from email.message import EmailMessage
+from core.providers.email_batcher import EmailBatcher
+from core.providers.smtp_pool import SMTPConnectionPool
+
+
+class FakeSMTP:
+    """Minimal stand-in for aiosmtplib.SMTP that records its lifecycle."""
+
+    instances = []
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.is_connected = False
+        self.sent = []
+        self.noop_error = None
+        self.send_error = None
+        FakeSMTP.instances.append(self)
+
+    async def connect(self):
+        self.is_connected = True
+
+    async def noop(self):
+        if self.noop_error:
+            raise self.noop_error
+
+    async def send_message(self, message, recipients):
+        if self.send_error:
+            error, self.send_error = self.send_error, None
+            self.is_connected = False
+            raise error
+        self.sent.append((message["Subject"], recipients))
+
+    async def quit(self):
+        self.is_connected = False
+
+    def close(self):
+        self.is_connected = False
+
+
+@pytest.fixture
+def fake_smtp(mocker):
+    FakeSMTP.instances = []
+    mocker.patch("core.providers.smtp_pool.aiosmtplib.SMTP", FakeSMTP)
+    return FakeSMTP
+
+
+@pytest.fixture
+def pool(fake_smtp):
+    return SMTPConnectionPool(
+        hostname="smtp.example.com",
+        port=587,
+        username="user",
+        password="secret",
+        max_size=2,
+        idle_timeout=60.0,
+    )
+
+
+def make_message(subject="Alert"):
+    message = EmailMessage()
+    message["Subject"] = subject
+    message.set_content("body")
+    return message
+
+
+async def test_connection_is_reused_across_messages(pool, fake_smtp):
+    """Test that consecutive sends share one authenticated connection."""
+    await pool.send_message(make_message("one"), recipients=["a@example.com"])
+    await pool.send_message(make_message("two"), recipients=["b@example.com"])
+
+    assert len(fake_smtp.instances) == 1
+    client = fake_smtp.instances[0]
+    assert client.kwargs["username"] == "user"
+    assert [s for s, _ in client.sent] == ["one", "two"]
+    assert pool.idle_count == 1
+
+
+async def test_failed_health_check_opens_new_connection(pool, fake_smtp):
+    """Test that a connection failing NOOP is replaced before reuse."""
+    await pool.send_message(make_message(), recipients=["a@example.com"])
+    fake_smtp.instances[0].noop_error = aiosmtplib.SMTPServerDisconnected("gone")
+
+    await pool.send_message(make_message(), recipients=["a@example.com"])
+
+    assert len(fake_smtp.instances) == 2
+    assert not fake_smtp.instances[0].is_connected
+    assert len(fake_smtp.instances[1].sent) == 1
+
+
+async def test_idle_connection_expires(pool, fake_smtp, mocker):
+    """Test that connections idle past the timeout are not reused."""
+    await pool.send_message(make_message(), recipients=["a@example.com"])
+    mocker.patch("core.providers.smtp_pool.time.monotonic", return_value=1e12)
+
+    await pool.send_message(make_message(), recipients=["a@example.com"])
+
+    assert len(fake_smtp.instances) == 2
+
+
+async def test_send_reconnects_after_disconnect(pool, fake_smtp):
+    """Test that a send on a dropped connection is retried on a new one."""
+    await pool.send_message(make_message(), recipients=["a@example.com"])
+    fake_smtp.instances[0].send_error = aiosmtplib.SMTPServerDisconnected("reset")
+
+    await pool.send_message(make_message("retried"), recipients=["a@example.com"])
+
+    assert len(fake_smtp.instances) == 2
+    assert fake_smtp.instances[1].sent == [("retried", ["a@example.com"])]
+
+
+async def test_close_disconnects_idle_connections(pool, fake_smtp):
+    """Test that closing the pool quits idle connections and rejects use."""
+    await pool.send_message(make_message(), recipients=["a@example.com"])
+    await pool.close()
+
+    assert not fake_smtp.instances[0].is_connected
+    with pytest.raises(RuntimeError):
+        await pool.send_message(make_message(), recipients=["a@example.com"])
+
+
+async def test_batcher_sends_window_over_one_session(pool, fake_smtp):
+    """Test that emails submitted within the window share one SMTP session."""
+    batcher = EmailBatcher(pool, window=0.05, max_size=10)
+
+    await asyncio.gather(
+        *(
+            batcher.submit(make_message(f"m{i}"), recipients=["a@example.com"])
+            for i in range(5)
+        )
+    )
+
+    assert len(fake_smtp.instances) == 1
+    assert [s for s, _ in fake_smtp.instances[0].sent] == [f"m{i}" for i in range(5)]
+
+
+async def test_batcher_flushes_when_full(pool, fake_smtp):
+    """Test that reaching max_size flushes without waiting for the window."""
+    batcher = EmailBatcher(pool, window=60, max_size=2)
+
+    await asyncio.wait_for(
+        asyncio.gather(
+            batcher.submit(make_message("a"), recipients=["a@example.com"]),
+            batcher.submit(make_message("b"), recipients=["b@example.com"]),
+        ),
+        timeout=1,
+    )
+
+    assert len(fake_smtp.instances[0].sent) == 2
+
+
+async def test_batcher_reports_per_message_rejection(pool, fake_smtp, mocker):
+    """Test that a rejected message fails alone while the batch continues."""
+    batcher = EmailBatcher(pool, window=0.01, max_size=10)
+    original_send = FakeSMTP.send_message
+
+    async def reject_bad(self, message, recipients):
+        if "bad@example.com" in recipients:
+            raise aiosmtplib.SMTPRecipientsRefused([])
+        await original_send(self, message, recipients)
+
+    mocker.patch.object(FakeSMTP, "send_message", reject_bad)
+
+    results = await asyncio.gather(
+        batcher.submit(make_message("ok"), recipients=["a@example.com"]),
+        batcher.submit(make_message("bad"), recipients=["bad@example.com"]),
+        batcher.submit(make_message("ok2"), recipients=["c@example.com"]),
+        return_exceptions=True,
+    )
+
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], aiosmtplib.SMTPRecipientsRefused)
+    assert [s for s, _ in fake_smtp.instances[0].sent] == ["ok", "ok2"]
+
+
+async def test_batcher_close_flushes_pending(pool, fake_smtp):
+    """Test that close sends messages still waiting for their window."""
+    batcher = EmailBatcher(pool, window=60, max_size=10)
+    pending = asyncio.create_task(
+        batcher.submit(make_message("late"), recipients=["a@example.com"])
+    )
+    await asyncio.sleep(0)
+
+    await batcher.close()
+
+    await pending
+    assert fake_smtp.instances[0].sent == [("late", ["a@example.com"])]
+
+
+async def test_batcher_reconnects_when_session_drops(pool, fake_smtp, mocker):
+    """Test that the unsent rest of a batch is retried once on a new session."""
+    batcher = EmailBatcher(pool, window=0.01, max_size=10)
+    original_send = FakeSMTP.send_message
+
+    async def drop_on_second(self, message, recipients):
+        if self is fake_smtp.instances[0] and len(self.sent) == 1:
+            self.is_connected = False
+            raise aiosmtplib.SMTPServerDisconnected("reset")
+        await original_send(self, message, recipients)
+
+    mocker.patch.object(FakeSMTP, "send_message", drop_on_second)
+
+    await asyncio.gather(
+        *(batcher.submit(make_message(f"m{i}"), recipients=["a@example.com"]) for i in range(3))
+    )
+
+    assert [s for s, _ in fake_smtp.instances[0].sent] == ["m0"]
+    assert [s for s, _ in fake_smtp.instances[1].sent] == ["m1", "m2"]
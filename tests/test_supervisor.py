@@ -0,0 +1,89 @@
+import asyncio
+import os
+import signal
+import time
+from pathlib import Path
+
+import pytest
+
+from utils.supervisor import WorkerSupervisor
+
+# Worker targets are imported by name in the spawned processes
+
+
+def crash_once_worker(index: int) -> None:
+    state = Path(os.environ["SUPERVISOR_TEST_DIR"])
+    crashed = state / f"crashed-{index}"
+    if index == 0 and not crashed.exists():
+        crashed.touch()
+        os._exit(3)
+
+    def on_sigterm(signum, frame):
+        (state / f"stopped-{index}").touch()
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+    (state / f"started-{index}").touch()
+    while True:
+        time.sleep(0.05)
+
+
+def stubborn_worker(index: int) -> None:
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    (Path(os.environ["SUPERVISOR_TEST_DIR"]) / f"started-{index}").touch()
+    while True:
+        time.sleep(0.05)
+
+
+async def _wait_for(condition, timeout=20.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        await asyncio.sleep(0.05)
+
+
+def _supervisor(target, tmp_path, **kwargs):
+    return WorkerSupervisor(
+        target,
+        processes=2,
+        env=lambda index: {"SUPERVISOR_TEST_DIR": str(tmp_path)},
+        restart_backoff=0.05,
+        poll_interval=0.05,
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_supervisor_restarts_crashed_workers_and_stops_gracefully(tmp_path):
+    supervisor = _supervisor(crash_once_worker, tmp_path)
+    run = asyncio.create_task(supervisor.run())
+
+    await _wait_for(lambda: len(list(tmp_path.glob("started-*"))) == 2)
+    health = supervisor.health()
+    assert health["status"] == "ok"
+    assert health["restarts"] == 1
+    assert health["workers"][0]["last_exit_code"] == 3
+    assert "SUPERVISOR_TEST_DIR" not in os.environ
+
+    supervisor.stop()
+    await asyncio.wait_for(run, 20)
+
+    assert (tmp_path / "stopped-0").exists()
+    assert (tmp_path / "stopped-1").exists()
+    assert supervisor.health()["status"] == "down"
+    assert [w["last_exit_code"] for w in supervisor.health()["workers"]] == [0, 0]
+
+
+@pytest.mark.asyncio
+async def test_supervisor_kills_workers_that_ignore_sigterm(tmp_path):
+    supervisor = _supervisor(stubborn_worker, tmp_path, shutdown_timeout=0.2)
+    run = asyncio.create_task(supervisor.run())
+
+    await _wait_for(lambda: len(list(tmp_path.glob("started-*"))) == 2)
+    supervisor.stop()
+    await asyncio.wait_for(run, 20)
+
+    assert [w["last_exit_code"] for w in supervisor.health()["workers"]] == [
+        -signal.SIGKILL,
+        -signal.SIGKILL,
+    ]
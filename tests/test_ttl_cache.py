@@ -0,0 +1,27 @@
+import time
+from utils.ttl_cache import TTLCache
+
+
+def test_lru_eviction_and_counters():
+    cache = TTLCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats() == {"size": 2, "hits": 2, "misses": 1, "evictions": 1}
+
+
+def test_entries_expire_after_ttl(mocker):
+    now = time.monotonic()
+    clock = mocker.patch("utils.ttl_cache.time.monotonic", return_value=now)
+    cache = TTLCache(max_size=10, ttl=5)
+    cache.put("a", 1)
+
+    clock.return_value = now + 4
+    assert cache.get("a") == 1
+    clock.return_value = now + 6
+    assert cache.get("a", "expired") == "expired"
+    assert len(cache) == 0
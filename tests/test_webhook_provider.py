@@ -0,0 +1,158 @@
+import asyncio
+import time
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from core.payload import JsonPayload
+from core.providers.discord import DiscordProvider
+from core.providers.slack import SlackProvider
+from utils.metrics import SEND_SECONDS
+
+
+@pytest.fixture
+async def webhook_server():
+    """Local webhook stub that records every request body and peer port."""
+    received = []
+
+    async def handler(request):
+        received.append(
+            {"body": await request.json(), "peer": request.transport.get_extra_info("peername")}
+        )
+        return web.Response(status=204)
+
+    async def slow_handler(request):
+        await asyncio.sleep(0.3)
+        return await handler(request)
+
+    async def unavailable_handler(request):
+        return web.Response(status=503)
+
+    app = web.Application()
+    app.router.add_post("/hook", handler)
+    app.router.add_post("/slow/{n}", slow_handler)
+    app.router.add_post("/unavailable", unavailable_handler)
+    server = TestServer(app)
+    await server.start_server()
+    server.received = received
+    yield server
+    await server.close()
+
+
+@pytest.mark.parametrize("provider_cls", [DiscordProvider, SlackProvider])
+async def test_session_is_reused_across_sends(provider_cls, webhook_server):
+    """Test that consecutive sends share one pooled session and connection."""
+    provider = provider_cls()
+    await provider.start()
+    url = str(webhook_server.make_url("/hook"))
+    try:
+        session = provider.session
+        assert await provider.send(url, {"content": "first"})
+        assert await provider.send(url, {"content": "second"})
+        assert provider.session is session
+    finally:
+        await provider.stop()
+
+    assert [r["body"]["content"] for r in webhook_server.received] == ["first", "second"]
+    # Keep-alive: both requests arrive over the same TCP connection
+    assert webhook_server.received[0]["peer"] == webhook_server.received[1]["peer"]
+    assert session.closed
+
+
+async def test_session_opens_lazily_without_start(webhook_server):
+    """Test that send works even if start was never called."""
+    provider = DiscordProvider()
+    url = str(webhook_server.make_url("/hook"))
+    try:
+        assert await provider.send(url, {"content": "lazy"})
+    finally:
+        await provider.stop()
+    assert len(webhook_server.received) == 1
+
+
+async def test_send_returns_false_on_error_status(webhook_server):
+    """Test that a non-2xx status is reported as a failed send."""
+    provider = SlackProvider()
+    url = str(webhook_server.make_url("/missing"))
+    try:
+        assert not await provider.send(url, {"text": "nope"})
+    finally:
+        await provider.stop()
+
+
+async def test_rendered_json_body_is_posted_without_reserializing(mocker, webhook_server):
+    """Test that a JsonPayload from the renderer is posted as its cached body."""
+    dumps = mocker.patch("core.payload.json.dumps")
+    provider = DiscordProvider()
+    url = str(webhook_server.make_url("/hook"))
+    payload = JsonPayload({"content": "hi"}, body=b'{"content": "hi"}')
+    try:
+        assert await provider.send([url, url + "?copy"], payload)
+    finally:
+        await provider.stop()
+
+    dumps.assert_not_called()
+    assert [r["body"] for r in webhook_server.received] == [{"content": "hi"}] * 2
+
+
+async def test_server_errors_are_reported_as_transient(webhook_server):
+    """Test that 5xx failures are marked retryable and 4xx failures are not."""
+    provider = SlackProvider()
+    unavailable = str(webhook_server.make_url("/unavailable"))
+    missing = str(webhook_server.make_url("/missing"))
+    try:
+        report = await provider.send([unavailable, missing], {"text": "nope"})
+    finally:
+        await provider.stop()
+
+    assert report.failed == [unavailable, missing]
+    assert report.retryable == [unavailable]
+
+
+async def test_send_latency_is_recorded_per_host_and_status(webhook_server):
+    """Test that every request is observed under its provider, host and status."""
+    provider = SlackProvider()
+    host = webhook_server.make_url("/").host
+    observed = SEND_SECONDS.labels("slack", host, 503)
+    before = sum(observed.counts)
+    try:
+        await provider.send(str(webhook_server.make_url("/unavailable")), {"text": "x"})
+    finally:
+        await provider.stop()
+
+    assert sum(observed.counts) == before + 1
+
+
+async def test_fan_out_is_concurrent_with_per_destination_report(webhook_server):
+    """Test that destinations are posted in parallel and reported individually."""
+    provider = DiscordProvider()
+    slow = [str(webhook_server.make_url(f"/slow/{n}")) for n in range(3)]
+    broken = str(webhook_server.make_url("/missing"))
+    try:
+        started = time.perf_counter()
+        report = await provider.send(slow + [broken], {"content": "fan-out"})
+        elapsed = time.perf_counter() - started
+    finally:
+        await provider.stop()
+
+    assert elapsed < 0.6  # three 0.3s destinations overlap instead of adding up
+    assert not report
+    assert report.failed == [broken]
+    assert report.succeeded == slow
+
+
+async def test_fan_out_respects_concurrency_bound(mocker, webhook_server):
+    """Test that MAX_CONCURRENCY limits the number of in-flight posts."""
+    mocker.patch(
+        "core.providers.webhook.settings.WEBHOOK_CONFIG.MAX_CONCURRENCY", 1
+    )
+    provider = SlackProvider()
+    slow = [str(webhook_server.make_url(f"/slow/{n}")) for n in range(2)]
+    try:
+        started = time.perf_counter()
+        report = await provider.send(slow, {"text": "bounded"})
+        elapsed = time.perf_counter() - started
+    finally:
+        await provider.stop()
+
+    assert report
+    assert elapsed >= 0.6
@@ -0,0 +1,104 @@
+import json
+from typing import Any, Callable, Dict, Literal, Tuple, Type
+
+from utils.logger import LogManager
+
+logger = LogManager.get_logger(__name__)
+
+CodecName = Literal["auto", "orjson", "msgspec", "json"]
+
+
+class JsonCodec:
+    """
+    Encodes and decodes Kafka record values as JSON, straight from and to bytes.
+
+    `errors` holds the exception types `loads` raises for malformed input.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        loads: Callable[[bytes], Any],
+        dumps: Callable[[Any], bytes],
+        errors: Tuple[Type[BaseException], ...],
+    ) -> None:
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+        self.errors = errors
+
+    def __repr__(self) -> str:
+        return f"JsonCodec({self.name!r})"
+
+
+def _stdlib_codec() -> JsonCodec:
+    # json.loads detects the encoding of bytes itself, so no str copy is made here
+    return JsonCodec(
+        "json",
+        loads=json.loads,
+        dumps=lambda value: json.dumps(value).encode("utf-8"),
+        errors=(ValueError,),  # JSONDecodeError and UnicodeDecodeError
+    )
+
+
+def _orjson_codec() -> JsonCodec:
+    import orjson
+
+    return JsonCodec(
+        "orjson",
+        loads=orjson.loads,
+        dumps=orjson.dumps,
+        errors=(orjson.JSONDecodeError,),
+    )
+
+
+def _msgspec_codec() -> JsonCodec:
+    import msgspec
+
+    decoder = msgspec.json.Decoder()
+    encoder = msgspec.json.Encoder()
+    return JsonCodec(
+        "msgspec",
+        loads=decoder.decode,
+        dumps=encoder.encode,
+        # Invalid UTF-8 inside a string raises UnicodeDecodeError
+        errors=(msgspec.DecodeError, UnicodeDecodeError),
+    )
+
+
+_FACTORIES: Dict[str, Callable[[], JsonCodec]] = {
+    "orjson": _orjson_codec,
+    "msgspec": _msgspec_codec,
+    "json": _stdlib_codec,
+}
+
+
+def available_codecs() -> Dict[str, JsonCodec]:
+    """Returns every codec whose library is installed, fastest first."""
+    codecs = {}
+    for name, factory in _FACTORIES.items():
+        try:
+            codecs[name] = factory()
+        except ImportError:
+            continue
+    return codecs
+
+
+def get_codec(name: CodecName = "auto") -> JsonCodec:
+    """
+    Returns the named JSON codec.
+
+    "auto" picks orjson, then msgspec, then the standard library, by what
+    is installed. A named codec whose library is missing falls back to the
+    standard library with a warning.
+    """
+    if name == "auto":
+        return next(iter(available_codecs().values()))
+    factory = _FACTORIES.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown JSON codec '{name}'. Use one of {['auto', *_FACTORIES]}.")
+    try:
+        return factory()
+    except ImportError:
+        logger.warning(f"JSON codec '{name}' is not installed. Using the standard library.")
+        return _stdlib_codec()
@@ -0,0 +1,169 @@
+import threading
+import zlib
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Type
+
+from utils.codec import JsonCodec
+
+# Headers producers set to describe a record value; both are optional
+CONTENT_TYPE_HEADER = "content-type"
+CONTENT_ENCODING_HEADER = "content-encoding"
+
+_JSON_TYPES = frozenset({"", "application/json"})
+_MSGPACK_TYPES = frozenset({"application/msgpack", "application/x-msgpack", "application/vnd.msgpack"})
+_IDENTITY_ENCODINGS = frozenset({"", "identity"})
+
+Headers = Sequence[Tuple[str, bytes]]
+
+
+class PayloadError(ValueError):
+    """Raised when a record value cannot be decompressed or decoded."""
+
+
+# Decompression contexts are reused per thread, since values may be decoded
+# both on the event loop and in the decode thread pool
+_contexts = threading.local()
+
+
+def _check_size(out: bytes, limit: int, complete: bool, encoding: str) -> bytes:
+    if limit and len(out) > limit:
+        raise PayloadError(f"Decompressed value exceeds {limit} bytes")
+    if not complete:
+        raise PayloadError(f"Truncated {encoding} data")
+    return out
+
+
+def _gunzip(data: bytes, limit: int) -> bytes:
+    # wbits=47 accepts both gzip and zlib framing; the object is single-use
+    decompressor = zlib.decompressobj(wbits=47)
+    try:
+        out = decompressor.decompress(data, limit + 1 if limit else 0)
+    except zlib.error as e:
+        raise PayloadError(f"Invalid gzip data: {e}") from e
+    return _check_size(out, limit, decompressor.eof, "gzip")
+
+
+def _unzstd(data: bytes, limit: int) -> bytes:
+    import zstandard
+
+    dctx = getattr(_contexts, "zstd", None)
+    if dctx is None:
+        dctx = _contexts.zstd = zstandard.ZstdDecompressor()
+    try:
+        with dctx.stream_reader(data) as reader:
+            out = reader.read(limit + 1) if limit else reader.readall()
+    except zstandard.ZstdError as e:
+        raise PayloadError(f"Invalid zstd data: {e}") from e
+    return _check_size(out, limit, True, "zstd")
+
+
+def _unlz4(data: bytes, limit: int) -> bytes:
+    import lz4.frame
+
+    decompressor = getattr(_contexts, "lz4", None)
+    if decompressor is None:
+        decompressor = _contexts.lz4 = lz4.frame.LZ4FrameDecompressor()
+    decompressor.reset()
+    try:
+        out = decompressor.decompress(data, max_length=limit + 1 if limit else -1)
+    except RuntimeError as e:
+        raise PayloadError(f"Invalid lz4 data: {e}") from e
+    return _check_size(out, limit, decompressor.eof, "lz4")
+
+
+_DECOMPRESSORS: Dict[str, Tuple[Callable[[bytes, int], bytes], str]] = {
+    "gzip": (_gunzip, "zlib"),
+    "deflate": (_gunzip, "zlib"),
+    "zstd": (_unzstd, "zstandard"),
+    "lz4": (_unlz4, "lz4"),
+}
+
+
+def _msgpack_loader() -> Tuple[Callable[[bytes], Any], Tuple[Type[BaseException], ...]]:
+    """Returns the MessagePack decoder: msgspec if installed, else msgpack."""
+    try:
+        import msgspec
+
+        return msgspec.msgpack.Decoder().decode, (msgspec.DecodeError,)
+    except ImportError:
+        import msgpack
+
+        def unpack(data: bytes) -> Any:
+            return msgpack.unpackb(data, raw=False)
+
+        # Unhashable map keys raise TypeError
+        return unpack, (msgpack.UnpackException, ValueError, TypeError)
+
+
+def _header_value(value: bytes) -> str:
+    # Parameters such as "; charset=utf-8" do not change how a value is decoded
+    return value.decode("latin-1").split(";", 1)[0].strip().lower()
+
+
+class ContentDecoder:
+    """
+    Decodes Kafka record values by their content headers.
+
+    `content-encoding` may be gzip, deflate, zstd or lz4 (zstd and lz4 need
+    `pip install "kafka-alert[compression]"`). Decompressed values larger
+    than `max_bytes` are rejected (0 disables the cap). `content-type` may
+    be JSON, the default, or MessagePack. Values without headers go straight
+    to the JSON codec.
+    """
+
+    def __init__(self, codec: JsonCodec, max_bytes: int = 0) -> None:
+        self.codec = codec
+        self.max_bytes = max_bytes
+        self._msgpack: Optional[Tuple[Callable[[bytes], Any], Tuple[Type[BaseException], ...]]] = None
+
+    def decode(self, value: bytes, headers: Optional[Headers] = None) -> Any:
+        """
+        Returns the decoded value.
+
+        Raises:
+            PayloadError: If the value is malformed, too large once
+            decompressed, or uses an unsupported or uninstalled type or encoding.
+        """
+        content_type = content_encoding = ""
+        for key, header in headers or ():
+            if key == CONTENT_TYPE_HEADER:
+                content_type = _header_value(header)
+            elif key == CONTENT_ENCODING_HEADER:
+                content_encoding = _header_value(header)
+
+        if content_encoding not in _IDENTITY_ENCODINGS:
+            value = self._decompress(value, content_encoding)
+
+        if content_type in _JSON_TYPES:
+            loads, errors = self.codec.loads, self.codec.errors
+        elif content_type in _MSGPACK_TYPES:
+            loads, errors = self._msgpack_loader()
+        else:
+            raise PayloadError(f"Unsupported content-type '{content_type}'")
+        try:
+            return loads(value)
+        except errors as e:
+            raise PayloadError(f"Invalid {content_type or 'application/json'} value: {e}") from e
+
+    def _decompress(self, value: bytes, encoding: str) -> bytes:
+        entry = _DECOMPRESSORS.get(encoding)
+        if entry is None:
+            raise PayloadError(f"Unsupported content-encoding '{encoding}'")
+        decompress, package = entry
+        try:
+            return decompress(value, self.max_bytes)
+        except ImportError as e:
+            raise PayloadError(
+                f"content-encoding '{encoding}' needs the '{package}' package "
+                '(pip install "kafka-alert[compression]")'
+            ) from e
+
+    def _msgpack_loader(self) -> Tuple[Callable[[bytes], Any], Tuple[Type[BaseException], ...]]:
+        if self._msgpack is None:
+            try:
+                self._msgpack = _msgpack_loader()
+            except ImportError as e:
+                raise PayloadError(
+                    "MessagePack values need the 'msgspec' or 'msgpack' package "
+                    '(pip install "kafka-alert[compression]")'
+                ) from e
+        return self._msgpack
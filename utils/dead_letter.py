@@ -0,0 +1,134 @@
+import asyncio
+import time
+from typing import Optional
+
+from aiokafka import AIOKafkaProducer, ConsumerRecord
+
+from utils.logger import LogManager
+from utils.metrics import DEAD_LETTERS
+from core.config import KafkaProducerConfig
+
+logger = LogManager.get_logger("kafka")
+
+# Header names attached to every dead-lettered record
+DLQ_HEADER_TOPIC = "dlq.original.topic"
+DLQ_HEADER_PARTITION = "dlq.original.partition"
+DLQ_HEADER_OFFSET = "dlq.original.offset"
+DLQ_HEADER_TIMESTAMP = "dlq.original.timestamp"
+DLQ_HEADER_STAGE = "dlq.error.stage"
+DLQ_HEADER_ERROR_CLASS = "dlq.error.class"
+DLQ_HEADER_ERROR_MESSAGE = "dlq.error.message"
+DLQ_HEADER_FAILED_AT = "dlq.failed.at"
+
+_MAX_ERROR_MESSAGE_BYTES = 4096
+
+
+class DeadLetterPublisher:
+    """
+    Publishes records that could not be processed to the dead-letter topic.
+
+    The original value bytes and key are forwarded unchanged so records can
+    be replayed later. The original record headers are kept, and error
+    metadata is added as `dlq.*` headers. A dedicated producer with a high
+    `linger_ms` batches dead letters, and `publish` only waits for the
+    record to be enqueued, not for the broker to acknowledge it.
+    """
+
+    def __init__(
+        self,
+        bootstrap_servers: list[str],
+        topic: str,
+        producer_config: KafkaProducerConfig,
+    ):
+        self.topic = topic
+        self._bootstrap_servers = bootstrap_servers
+        self._producer_config = producer_config
+        self._producer: Optional[AIOKafkaProducer] = None
+
+    async def start(self):
+        """Starts the dead-letter producer."""
+        producer_kwargs = self._producer_config.model_dump(exclude_none=True)
+        self._producer = AIOKafkaProducer(
+            bootstrap_servers=self._bootstrap_servers, **producer_kwargs
+        )
+        await self._producer.start()
+        logger.info(f"Dead-letter producer connected (topic '{self.topic}').")
+
+    async def stop(self):
+        """Flushes pending dead letters and stops the producer."""
+        if self._producer:
+            await self._producer.stop()
+            self._producer = None
+            logger.info("Dead-letter producer disconnected.")
+
+    async def publish(
+        self,
+        msg: ConsumerRecord,
+        raw_value: Optional[bytes],
+        error: BaseException | str,
+        stage: str,
+    ) -> Optional[asyncio.Future]:
+        """
+        Enqueues a failed record for the dead-letter topic.
+
+        Args:
+            msg: The record that failed.
+            raw_value: The original, undecoded value bytes.
+            error: The exception (or description) that caused the failure.
+            stage: Where processing failed, e.g. "deserialize" or "callback".
+
+        Returns:
+            Optional[asyncio.Future]: Resolves when the broker acknowledges
+            the record, or None if the record could not be enqueued.
+        """
+        if not self._producer:
+            logger.error(
+                f"Dead-letter producer is not running. Dropping {msg.topic}[{msg.partition}]@{msg.offset}."
+            )
+            return None
+
+        if isinstance(error, BaseException):
+            error_class = type(error).__name__
+            error_message = str(error)
+        else:
+            error_class = "Error"
+            error_message = error
+
+        headers = list(msg.headers or [])
+        headers.extend(
+            [
+                (DLQ_HEADER_TOPIC, msg.topic.encode()),
+                (DLQ_HEADER_PARTITION, str(msg.partition).encode()),
+                (DLQ_HEADER_OFFSET, str(msg.offset).encode()),
+                (DLQ_HEADER_TIMESTAMP, str(msg.timestamp).encode()),
+                (DLQ_HEADER_STAGE, stage.encode()),
+                (DLQ_HEADER_ERROR_CLASS, error_class.encode()),
+                (
+                    DLQ_HEADER_ERROR_MESSAGE,
+                    error_message.encode("utf-8", "replace")[:_MAX_ERROR_MESSAGE_BYTES],
+                ),
+                (DLQ_HEADER_FAILED_AT, str(int(time.time() * 1000)).encode()),
+            ]
+        )
+
+        try:
+            future = await self._producer.send(
+                self.topic, value=raw_value, key=msg.key, headers=headers
+            )
+        except Exception as e:
+            logger.error(
+                f"Failed to enqueue dead letter for {msg.topic}[{msg.partition}]@{msg.offset}: {e}"
+            )
+            return None
+
+        future.add_done_callback(self._log_delivery_failure)
+        DEAD_LETTERS.labels(msg.topic, stage).inc()
+        logger.warning(
+            f"Dead-lettered {msg.topic}[{msg.partition}]@{msg.offset} ({stage}: {error_class})."
+        )
+        return future
+
+    @staticmethod
+    def _log_delivery_failure(future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Dead-letter delivery failed: {future.exception()}")
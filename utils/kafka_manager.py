@@ -1,11 +1,34 @@
 import asyncio
-import json
+import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from typing import Awaitable, Callable, Optional, Any
 
-from aiokafka import AIOKafkaConsumer, AIOKafkaProducer, ConsumerRecord
+from aiokafka import (
+    AIOKafkaConsumer,
+    AIOKafkaProducer,
+    ConsumerRebalanceListener,
+    ConsumerRecord,
+    TopicPartition,
+)
 
 from utils.logger import LogManager
+from utils.codec import get_codec
+from utils.content import ContentDecoder, Headers, PayloadError
+from utils.dead_letter import DeadLetterPublisher
+from utils.offset_tracker import OffsetTracker
+from utils.partition_worker import PartitionWorker
+from utils.priority import PriorityLanes, current_priority, priority_of_record
+from utils.routing import PreFilter, RoutingInfo
+from utils.metrics import (
+    CONSUMER_LAG,
+    MESSAGES_CONSUMED,
+    MESSAGES_FILTERED,
+    TASK_SLOTS_IN_USE,
+    TASK_SLOTS_WAITING,
+    registry,
+)
 from core.config import (
     settings,
     KafkaConsumerConfig,
@@ -16,20 +39,98 @@ logger = LogManager.get_logger("kafka")
 
 # Type hint for the callback function
 MessageHandler = Callable[[ConsumerRecord, Optional[Any]], Awaitable[None]]
+# Batch callbacks receive every record of a fetched partition batch at once
+BatchMessageHandler = Callable[[list[ConsumerRecord], Optional[Any]], Awaitable[None]]
+ShutdownHook = Callable[[], Awaitable[None]]
+# Validates a decoded value and returns what callbacks receive as msg.value
+ValueParser = Callable[[Any], Any]
 
+# Records carrying this header (epoch milliseconds) are not dispatched before then
+DELIVER_AT_HEADER = "x-deliver-at"
 
-def _safe_json_deserializer(value: bytes) -> Optional[dict]:
+
+def _safe_deserializer(
+    value: bytes, headers: Optional[Headers], decoder: ContentDecoder
+) -> Optional[Any]:
     """
-    Helper function to safely handle JSON deserialization errors.
+    Helper function to safely handle deserialization errors.
     Prevents the entire consumer from crashing due to malformed messages.
     """
     try:
-        return json.loads(value.decode("utf-8"))
-    except (json.JSONDecodeError, UnicodeDecodeError) as e:
-        logger.warning(f"Failed to deserialize message value: {value!r}. Error: {e}")
+        return decoder.decode(value, headers)
+    except PayloadError as e:
+        logger.warning(f"Failed to deserialize message value: {value[:200]!r}. Error: {e}")
         return None
 
 
+def _delivery_delay(msg: ConsumerRecord) -> float:
+    """Returns the seconds until a record is due, or 0 if it has no deliver-at header."""
+    for key, value in msg.headers or ():
+        if key == DELIVER_AT_HEADER:
+            try:
+                return max(0.0, int(value) / 1000 - time.time())
+            except (TypeError, ValueError):
+                logger.warning(f"Ignoring invalid {DELIVER_AT_HEADER} header: {value!r}")
+    return 0.0
+
+
+@dataclass
+class DecodedRecord(ConsumerRecord):
+    """A ConsumerRecord whose value has been decoded, keeping the original bytes."""
+
+    raw_value: Optional[bytes] = None
+
+    @classmethod
+    def from_record(cls, msg: ConsumerRecord, value: Any) -> "DecodedRecord":
+        return cls(
+            topic=msg.topic,
+            partition=msg.partition,
+            offset=msg.offset,
+            timestamp=msg.timestamp,
+            timestamp_type=msg.timestamp_type,
+            key=msg.key,
+            value=value,
+            checksum=msg.checksum,
+            serialized_key_size=msg.serialized_key_size,
+            serialized_value_size=msg.serialized_value_size,
+            headers=msg.headers,
+            raw_value=msg.value,
+        )
+
+
+class BatchCallbackError(Exception):
+    """
+    Raised by a batch callback when only some of its messages failed.
+
+    `failed` pairs each failed record, as passed to the callback, with its
+    error. Only those records are dead-lettered.
+    """
+
+    def __init__(self, message: str, failed: list[tuple[ConsumerRecord, BaseException]]):
+        super().__init__(message)
+        self.failed = failed
+
+
+class _RebalanceListener(ConsumerRebalanceListener):
+    """
+    Releases revoked partitions: stops their partition workers and commits
+    completed offsets before the partitions are handed to another consumer.
+    """
+
+    def __init__(self, manager: "KafkaManager"):
+        self._manager = manager
+
+    async def on_partitions_revoked(self, revoked):
+        self._manager._cancel_deferred(revoked)
+        await self._manager._drop_partition_workers(revoked)
+        await self._manager.commit_offsets()
+        self._manager._offsets.forget(revoked)
+        self._manager._forget_fetched(revoked)
+
+    async def on_partitions_assigned(self, assigned):
+        pass
+
+
 class KafkaManager:
     """
     Manages the application's Kafka producers and consumers.
@@ -43,20 +144,59 @@ class KafkaManager:
         consumer_config: KafkaConsumerConfig,
         producer_config: KafkaProducerConfig,
         callback_context: Optional[Any] = None,
+        value_parser: Optional[ValueParser] = None,
+        prefilter: Optional[PreFilter] = None,
     ):
         self._bootstrap_servers = bootstrap_servers
         self._consumer_group = consumer_group
         self._consumer_config = consumer_config
         self._producer_config = producer_config
         self.callback_context = callback_context
+        # Decodes record values from bytes and encodes produced values
+        self.codec = get_codec(settings.KAFKA_JSON_CODEC)
+        self._content_decoder = ContentDecoder(self.codec, settings.KAFKA_MAX_DECOMPRESSED_BYTES)
+        # Raising ValueError dead-letters the record before any task is scheduled.
+        # Topics registered with their own parser use it instead of the default.
+        self._value_parser = value_parser
+        self._value_parsers: dict[str, ValueParser] = {}
+        # Drops records by their headers before the value is decoded. Topics
+        # registered with their own pre-filter use it instead of the default.
+        self._prefilter = prefilter
+        self._prefilters: dict[str, PreFilter] = {}
+        # Decodes large values off the event loop (KAFKA_DECODE_OFFLOAD_BYTES)
+        self._decode_executor: Optional[ThreadPoolExecutor] = None
 
         self.producer: Optional[AIOKafkaProducer] = None
+        self.dead_letter: Optional[DeadLetterPublisher] = None
         self.consumer: Optional[AIOKafkaConsumer] = None
         self._consumer_task: Optional[asyncio.Task[None]] = None
         self._callbacks: dict[str, list[MessageHandler]] = defaultdict(list)
-
-        # Semaphore for concurrency control
-        self._semaphore = asyncio.Semaphore(settings.KAFKA_MAX_CONCURRENT_TASKS)
+        self._batch_callbacks: set[BatchMessageHandler] = set()
+
+        # Concurrency control: one slot pool split into priority lanes. With
+        # priorities disabled this is a single lane acting as a semaphore.
+        self._prioritized = settings.PRIORITY_CONFIG.ENABLED
+        self._lanes = PriorityLanes.from_config(settings.KAFKA_MAX_CONCURRENT_TASKS)
+        # Partitions paused because their lane's backlog is full
+        self._lane_held: dict[str, set[TopicPartition]] = defaultdict(set)
+        # Callbacks spawned per lane that are still waiting for a slot
+        self._lane_queued: dict[str, int] = defaultdict(int)
+        # Last fetched offset per partition, for the consumer lag metric
+        self._fetched: dict[TopicPartition, int] = {}
+
+        # In-order work queues used by the "partitioned" processing mode
+        self._partition_workers: dict[TopicPartition, PartitionWorker] = {}
+        self._inflight_tasks: set[asyncio.Task[None]] = set()
+
+        # Manual, watermark-based offset commits when auto commit is disabled
+        self._manual_commit = not consumer_config.enable_auto_commit
+        self._offsets = OffsetTracker()
+        self._commit_task: Optional[asyncio.Task[None]] = None
+        self._commit_wakeup = asyncio.Event()
+
+        # Partitions paused until their next record is due (see DELIVER_AT_HEADER)
+        self._deferred: dict[TopicPartition, asyncio.TimerHandle] = {}
+        self._shutdown_hooks: list[ShutdownHook] = []
 
     @property
     def subscribed_topics(self) -> list[str]:
@@ -68,10 +208,50 @@ class KafkaManager:
         """Returns the background consumer task if it is running."""
         return self._consumer_task
 
-    def register_callback(self, topic: str, callback: MessageHandler):
-        """Registers a message handling callback for a specific topic."""
-        logger.info(f"Registering callback for topic '{topic}': {callback.__name__}")
+    def register_callback(
+        self,
+        topic: str,
+        callback: MessageHandler,
+        batch: bool = False,
+        value_parser: Optional[ValueParser] = None,
+        prefilter: Optional[PreFilter] = None,
+    ):
+        """
+        Registers a message handling callback for a specific topic.
+
+        Batch callbacks receive a list of records: the whole partition batch
+        returned by getmany() in "batch" mode, or a single record otherwise.
+        A `value_parser` applies to every record of the topic, so every
+        callback of the topic receives its result as msg.value. Likewise a
+        `prefilter` drops records of the topic for all of its callbacks.
+        """
+        logger.info(
+            f"Registering {'batch ' if batch else ''}callback for topic '{topic}': {callback.__name__}"
+        )
         self._callbacks[topic].append(callback)
+        if batch:
+            self._batch_callbacks.add(callback)
+        if value_parser is not None:
+            current = self._value_parsers.setdefault(topic, value_parser)
+            if current is not value_parser:
+                logger.error(
+                    f"Topic '{topic}' already has value parser {current!r}. Ignoring {value_parser!r}."
+                )
+        if prefilter is not None:
+            current_filter = self._prefilters.setdefault(topic, prefilter)
+            if current_filter != prefilter:
+                logger.error(
+                    f"Topic '{topic}' already has pre-filter {current_filter!r}. Ignoring {prefilter!r}."
+                )
+
+    def add_shutdown_hook(self, hook: ShutdownHook):
+        """
+        Registers a coroutine function to run during `stop`.
+
+        Hooks run after in-flight callbacks have drained and before the
+        producer is closed, so they may still publish messages.
+        """
+        self._shutdown_hooks.append(hook)
 
     async def get_all_topics(self) -> set[str]:
         """Fetches all topics present in the Kafka cluster. This method should be called after the consumer has started."""
@@ -94,22 +274,17 @@ class KafkaManager:
             return
 
         try:
-            async for msg in self.consumer:
-                if msg.value is None:
-                    logger.debug(
-                        f"Skipping message with deserialization failure on topic '{msg.topic}'"
+            if settings.KAFKA_PROCESSING_MODE == "batch":
+                while True:
+                    batches = await self.consumer.getmany(
+                        timeout_ms=settings.KAFKA_BATCH_TIMEOUT_MS,
+                        max_records=settings.KAFKA_BATCH_MAX_RECORDS,
                     )
-                    continue
-
-                logger.debug(
-                    f"Message received: Topic={msg.topic}, Partition={msg.partition}, Offset={msg.offset}"
-                )
-
-                if msg.topic in self._callbacks:
-                    for cb in self._callbacks[msg.topic]:
-                        # Acquire semaphore before creating task
-                        await self._semaphore.acquire()
-                        asyncio.create_task(self._execute_callback_safe(cb, msg))
+                    for records in batches.values():
+                        await self._dispatch(records)
+            else:
+                async for msg in self.consumer:
+                    await self._dispatch([msg])
 
         except asyncio.CancelledError:
             logger.info("Consumer task cancelled.")
@@ -120,41 +295,457 @@ class KafkaManager:
         finally:
             logger.info("Consumer task finished.")
 
+    async def _dispatch(self, records: list[ConsumerRecord]):
+        """Schedules callbacks for records fetched from a single partition."""
+        if not records:
+            return
+        if not self._callbacks.get(records[0].topic):
+            # Nothing to dispatch to: skip the records without decoding them
+            for raw_msg in records:
+                self._track(raw_msg)
+                self._record_done(raw_msg)
+            return
+
+        value_parser = self._value_parsers.get(records[0].topic, self._value_parser)
+        prefilter = self._prefilters.get(records[0].topic, self._prefilter)
+        accepted = []
+        lane_counts: dict[str, int] = defaultdict(int)
+        for raw_msg in records:
+            delay = _delivery_delay(raw_msg)
+            if delay > 0:
+                # The rest of the batch is fetched again once this record is due
+                self._defer_partition(raw_msg, delay)
+                break
+
+            if raw_msg.value is None:
+                logger.debug(f"Skipping message with empty value on topic '{raw_msg.topic}'")
+                self._track(raw_msg)
+                self._record_done(raw_msg)
+                continue
+
+            if prefilter is not None and not prefilter(RoutingInfo.from_record(raw_msg)):
+                MESSAGES_FILTERED.labels(raw_msg.topic).inc()
+                self._track(raw_msg)
+                self._record_done(raw_msg)
+                continue
+
+            value = await self._decode(raw_msg)
+            if value is None:
+                logger.debug(
+                    f"Skipping message with deserialization failure on topic '{raw_msg.topic}'"
+                )
+                self._track(raw_msg)
+                await self._dead_letter(
+                    raw_msg, raw_msg.value, "Value could not be decoded", "deserialize"
+                )
+                self._record_done(raw_msg)
+                continue
+
+            if value_parser is not None:
+                try:
+                    value = value_parser(value)
+                except ValueError as e:
+                    logger.warning(
+                        f"Rejecting invalid message {raw_msg.topic}[{raw_msg.partition}]@{raw_msg.offset}: {e}"
+                    )
+                    self._track(raw_msg)
+                    await self._dead_letter(raw_msg, raw_msg.value, e, "validate")
+                    self._record_done(raw_msg)
+                    continue
+
+            msg = DecodedRecord.from_record(raw_msg, value)
+
+            if self._prioritized and settings.KAFKA_PROCESSING_MODE != "partitioned":
+                lane = self._lanes.resolve(priority_of_record(msg))
+                backlog = self._lane_queued[lane] + lane_counts[lane]
+                if backlog >= settings.PRIORITY_CONFIG.MAX_BACKLOG:
+                    # Stop fetching this partition until the lane catches up,
+                    # without blocking partitions that carry other lanes
+                    self._hold_partition(msg, lane)
+                    break
+                lane_counts[lane] += 1
+
+            self._track(msg)
+
+            logger.debug(
+                f"Message received: Topic={msg.topic}, Partition={msg.partition}, Offset={msg.offset}"
+            )
+            accepted.append(msg)
+
+        if not accepted:
+            return
+
+        callbacks = self._callbacks[accepted[0].topic]
+        if settings.KAFKA_PROCESSING_MODE == "partitioned":
+            for msg in accepted:
+                self._get_partition_worker(msg).submit(msg)
+            return
+
+        record_callbacks = [cb for cb in callbacks if cb not in self._batch_callbacks]
+        batch_callbacks = [cb for cb in callbacks if cb in self._batch_callbacks]
+        on_done_hooks = [
+            self._record_countdown(msg, len(callbacks)) for msg in accepted
+        ]
+
+        for msg, on_done in zip(accepted, on_done_hooks):
+            for cb in record_callbacks:
+                await self._spawn_callback(cb, msg, on_done, self._lane_of(msg))
+
+        if batch_callbacks:
+
+            def batch_done():
+                for on_done in on_done_hooks:
+                    on_done()
+
+            # A batch runs in the lane of its most urgent record
+            lane = self._lanes.most_urgent(self._lane_of(msg) for msg in accepted)
+            for cb in batch_callbacks:
+                await self._spawn_callback(cb, accepted, batch_done, lane)
+
+    async def _decode(self, msg: ConsumerRecord) -> Optional[Any]:
+        """Decodes a value, in a worker thread if it is larger than KAFKA_DECODE_OFFLOAD_BYTES."""
+        raw, threshold = msg.value, settings.KAFKA_DECODE_OFFLOAD_BYTES
+        if not threshold or len(raw) < threshold:
+            return _safe_deserializer(raw, msg.headers, self._content_decoder)
+        if self._decode_executor is None:
+            self._decode_executor = ThreadPoolExecutor(
+                max_workers=settings.KAFKA_DECODE_WORKERS, thread_name_prefix="kafka-decode"
+            )
+        return await asyncio.get_running_loop().run_in_executor(
+            self._decode_executor, _safe_deserializer, raw, msg.headers, self._content_decoder
+        )
+
+    def _track(self, msg: ConsumerRecord):
+        """
+        Counts a consumed record and registers it for watermark commits.
+
+        Call in fetch order, once it is settled that the record is not held
+        back or deferred (those are fetched again and counted then).
+        """
+        tp = TopicPartition(msg.topic, msg.partition)
+        MESSAGES_CONSUMED.labels(msg.topic, msg.partition).inc()
+        self._fetched[tp] = msg.offset
+        if self._manual_commit:
+            self._offsets.track(tp, msg.offset)
+
+    def _forget_fetched(self, partitions):
+        for tp in partitions:
+            if self._fetched.pop(tp, None) is not None:
+                CONSUMER_LAG.remove(tp.topic, tp.partition)
+
+    def _collect_metrics(self):
+        """Refreshes consumer lag and task slot gauges right before a scrape."""
+        if self.consumer is not None:
+            for tp, offset in list(self._fetched.items()):
+                highwater = self.consumer.highwater(tp)
+                if highwater is not None:
+                    lag = max(0, highwater - offset - 1)
+                    CONSUMER_LAG.labels(tp.topic, tp.partition).set(lag)
+        for lane in self._lanes.lanes:
+            TASK_SLOTS_IN_USE.labels(lane).set(self._lanes.in_use(lane))
+            TASK_SLOTS_WAITING.labels(lane).set(
+                self._lane_queued[lane] if self._prioritized else self._lanes.waiting(lane)
+            )
+
+    def _lane_of(self, msg: ConsumerRecord) -> str:
+        if not self._prioritized:
+            return self._lanes.default
+        return self._lanes.resolve(priority_of_record(msg))
+
+    async def _spawn_callback(
+        self,
+        callback: MessageHandler,
+        payload: ConsumerRecord | list[ConsumerRecord],
+        on_done: Callable[[], None],
+        lane: str,
+    ):
+        if self._prioritized:
+            # The task waits for its lane, so a saturated lane never blocks
+            # the consumer loop (its backlog is bounded in _dispatch)
+            self._lane_queued[lane] += 1
+            task = asyncio.create_task(
+                self._execute_callback_safe(callback, payload, on_done, lane, acquired=False)
+            )
+        else:
+            # Acquire a slot before creating the task
+            await self._lanes.acquire(lane)
+            task = asyncio.create_task(
+                self._execute_callback_safe(callback, payload, on_done, lane)
+            )
+        self._inflight_tasks.add(task)
+        task.add_done_callback(self._inflight_tasks.discard)
+
+    def _get_partition_worker(self, msg: ConsumerRecord) -> PartitionWorker:
+        tp = TopicPartition(msg.topic, msg.partition)
+        worker = self._partition_workers.get(tp)
+        if worker is None:
+            worker = PartitionWorker(
+                tp,
+                handler=self._process_record,
+                on_full=self._pause_partition,
+                on_drained=self._resume_partition,
+                max_queue_size=settings.KAFKA_PARTITION_QUEUE_SIZE,
+                concurrency=settings.KAFKA_PARTITION_CONCURRENCY,
+            )
+            self._partition_workers[tp] = worker
+        return worker
+
+    async def _drop_partition_workers(self, tps):
+        """
+        Stops the partition workers of revoked partitions.
+
+        With manual commits, records that have not finished are redelivered to
+        the new owner, so the workers stop right away. With auto commit their
+        offsets may already be committed, so queued records get up to
+        KAFKA_SHUTDOWN_TIMEOUT_MS to finish first.
+        """
+        for tp in tps:
+            worker = self._partition_workers.pop(tp, None)
+            if worker is None:
+                continue
+            if not self._manual_commit:
+                try:
+                    await asyncio.wait_for(
+                        worker.join(), timeout=settings.KAFKA_SHUTDOWN_TIMEOUT_MS / 1000
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning(
+                        f"Dropping {worker.backlog} queued records of revoked partition {tp}."
+                    )
+            await worker.stop()
+
+    def _pause_partition(self, tp: TopicPartition):
+        if self.consumer:
+            self.consumer.pause(tp)
+
+    def _resume_partition(self, tp: TopicPartition):
+        if self.consumer and tp not in self._deferred:
+            self.consumer.resume(tp)
+
+    def _hold_partition(self, msg: ConsumerRecord, lane: str):
+        """Pauses a partition and rewinds it to `msg` until `lane` has room."""
+        if not self.consumer:
+            return
+        tp = TopicPartition(msg.topic, msg.partition)
+        self.consumer.pause(tp)
+        self.consumer.seek(tp, msg.offset)
+        self._lane_held[lane].add(tp)
+        logger.debug(f"Lane '{lane}' backlog full. Holding {tp} at offset {msg.offset}.")
+
+    def _release_held_partitions(self, lane: str):
+        held = self._lane_held.get(lane)
+        if not held or self._lane_queued[lane] > settings.PRIORITY_CONFIG.MAX_BACKLOG // 2:
+            return
+        self._lane_held.pop(lane)
+        for tp in held:
+            try:
+                self._resume_partition(tp)
+            except Exception as e:
+                # The partition may have been revoked in the meantime
+                logger.debug(f"Could not resume held partition {tp}: {e}")
+
+    def _defer_partition(self, msg: ConsumerRecord, delay: float):
+        """Pauses a partition and rewinds it to `msg` until the record is due."""
+        if not self.consumer:
+            return
+        tp = TopicPartition(msg.topic, msg.partition)
+        self.consumer.pause(tp)
+        self.consumer.seek(tp, msg.offset)
+        previous = self._deferred.pop(tp, None)
+        if previous is not None:
+            previous.cancel()
+        self._deferred[tp] = asyncio.get_running_loop().call_later(
+            delay, self._resume_deferred, tp
+        )
+        logger.debug(f"Deferring {tp} at offset {msg.offset} for {delay:.1f}s.")
+
+    def _resume_deferred(self, tp: TopicPartition):
+        self._deferred.pop(tp, None)
+        worker = self._partition_workers.get(tp)
+        if worker is not None and worker.paused:
+            return  # The worker resumes the partition once its queue drains
+        try:
+            self._resume_partition(tp)
+        except Exception as e:
+            # The partition may have been revoked in the meantime
+            logger.debug(f"Could not resume deferred partition {tp}: {e}")
+
+    def _cancel_deferred(self, tps):
+        for tp in tps:
+            handle = self._deferred.pop(tp, None)
+            if handle is not None:
+                handle.cancel()
+
+    async def _process_record(self, msg: ConsumerRecord):
+        """Runs every callback for a record and waits until all of them finish."""
+        tasks = []
+        lane = self._lane_of(msg)
+        for cb in self._callbacks.get(msg.topic, []):
+            payload = [msg] if cb in self._batch_callbacks else msg
+            await self._lanes.acquire(lane)
+            tasks.append(
+                asyncio.create_task(self._execute_callback_safe(cb, payload, lane=lane))
+            )
+        if tasks:
+            await asyncio.gather(*tasks)
+        self._record_done(msg)
+
+    def _record_done(self, msg: ConsumerRecord):
+        """Marks a record as fully processed so its offset may be committed."""
+        if not self._manual_commit:
+            return
+        self._offsets.done(TopicPartition(msg.topic, msg.partition), msg.offset)
+        if self._offsets.completed_since_commit >= settings.KAFKA_COMMIT_BATCH_SIZE:
+            self._commit_wakeup.set()
+
+    def _record_countdown(self, msg: ConsumerRecord, pending: int) -> Callable[[], None]:
+        """Returns a hook that marks the record done once all its callbacks have run."""
+        remaining = pending
+
+        def callback_finished():
+            nonlocal remaining
+            remaining -= 1
+            if remaining == 0:
+                self._record_done(msg)
+
+        return callback_finished
+
+    async def _commit_loop(self):
+        """Commits the completed watermark on a timer or after enough completions."""
+        interval = settings.KAFKA_COMMIT_INTERVAL_MS / 1000
+        while True:
+            try:
+                await asyncio.wait_for(self._commit_wakeup.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._commit_wakeup.clear()
+            await self.commit_offsets()
+
+    async def commit_offsets(self):
+        """Commits the contiguous completed offset of every advanced partition."""
+        offsets = self._offsets.committable()
+        if not offsets or not self.consumer:
+            return
+        try:
+            await self.consumer.commit(offsets)
+            self._offsets.mark_committed(offsets)
+            logger.debug(f"Committed offsets: {offsets}")
+        except Exception as e:
+            logger.warning(f"Failed to commit offsets {offsets}: {e}")
+
+    async def _dead_letter(
+        self,
+        msg: ConsumerRecord,
+        raw_value: Optional[bytes],
+        error: BaseException | str,
+        stage: str,
+    ):
+        """Forwards a failed record to the dead-letter topic if one is configured."""
+        if self.dead_letter:
+            await self.dead_letter.publish(msg, raw_value, error, stage)
+
+    async def _drain(self):
+        """Waits for queued and in-flight callbacks to finish."""
+        for worker in list(self._partition_workers.values()):
+            await worker.join()
+        if self._inflight_tasks:
+            await asyncio.gather(*self._inflight_tasks, return_exceptions=True)
+
     async def _execute_callback_safe(
-        self, callback: MessageHandler, msg: ConsumerRecord
+        self,
+        callback: MessageHandler,
+        msg: ConsumerRecord | list[ConsumerRecord],
+        on_done: Optional[Callable[[], None]] = None,
+        lane: Optional[str] = None,
+        acquired: bool = True,
     ):
-        """Safely executes a callback within the semaphore context and logs exceptions."""
+        """
+        Safely executes a callback holding a slot of its priority lane and logs exceptions.
+
+        With `acquired=False` the slot is acquired here first. `on_done` is
+        skipped if the task is cancelled, so the record is not committed and
+        is delivered again.
+        """
+        lane = self._lanes.resolve(lane)
+        if not acquired:
+            try:
+                await self._lanes.acquire(lane)
+            finally:
+                self._lane_queued[lane] -= 1
+
+        records = msg if isinstance(msg, list) else [msg]
+        # Lets providers send in the same priority lane
+        token = current_priority.set(lane)
+        cancelled = False
         try:
             await callback(msg, self.callback_context)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        except BatchCallbackError as e:
+            logger.error(
+                f"Batch callback '{callback.__name__}' for topic '{records[0].topic}': {e}"
+            )
+            errors = {id(record): (record, error) for record, error in e.failed}
+            for record in records:
+                failure = errors.pop(id(record), None)
+                if failure is not None:
+                    await self._dead_letter(
+                        record, getattr(record, "raw_value", None), failure[1], "callback"
+                    )
+            for record, error in errors.values():
+                logger.warning(
+                    f"Batch callback '{callback.__name__}' reported a failure for a record "
+                    f"it was not given ({error!r}). Report the ConsumerRecord itself."
+                )
         except Exception as e:
             logger.error(
-                f"Error executing callback '{callback.__name__}' for topic '{msg.topic}': {e}",
+                f"Error executing callback '{callback.__name__}' for topic '{records[0].topic}': {e}",
                 exc_info=True,
             )
+            for record in records:
+                await self._dead_letter(
+                    record, getattr(record, "raw_value", None), e, "callback"
+                )
         finally:
-            # Always release the semaphore
-            self._semaphore.release()
+            current_priority.reset(token)
+            # Always release the slot
+            self._lanes.release(lane)
+            if on_done is not None and not cancelled:
+                on_done()
+            if self._lane_held:
+                self._release_held_partitions(lane)
 
     async def start(self):
         """Starts the Kafka producer and consumer, and runs the consumer task in the background."""
         logger.info(f"Connecting to Kafka at {self._bootstrap_servers}...")
+        registry.add_collector(self._collect_metrics)
         try:
             producer_kwargs = self._producer_config.model_dump(exclude_none=True)
             self.producer = AIOKafkaProducer(
                 bootstrap_servers=self._bootstrap_servers,
-                value_serializer=lambda v: json.dumps(v).encode("utf-8"),
+                value_serializer=self.codec.dumps,
                 **producer_kwargs,
             )
             await self.producer.start()
             logger.info("Kafka Producer connected successfully.")
 
+            if settings.KAFKA_DEAD_LETTER_TOPIC:
+                self.dead_letter = DeadLetterPublisher(
+                    bootstrap_servers=self._bootstrap_servers,
+                    topic=settings.KAFKA_DEAD_LETTER_TOPIC,
+                    producer_config=settings.KAFKA_DEAD_LETTER_PRODUCER_CONFIG,
+                )
+                await self.dead_letter.start()
+
             if self.subscribed_topics:
                 consumer_kwargs = self._consumer_config.model_dump(exclude_none=True)
 
+                # Values are decoded in _dispatch so the original bytes stay
+                # available for the dead-letter queue.
                 temp_consumer = AIOKafkaConsumer(
                     bootstrap_servers=self._bootstrap_servers,
                     group_id=self._consumer_group,
-                    value_deserializer=_safe_json_deserializer,
                     **consumer_kwargs,
                 )
                 await temp_consumer.start()
@@ -185,7 +776,9 @@ class KafkaManager:
                         return
 
                     self.consumer = temp_consumer
-                    self.consumer.subscribe(valid_topics)
+                    self.consumer.subscribe(valid_topics, listener=_RebalanceListener(self))
+                    if self._manual_commit:
+                        self._commit_task = asyncio.create_task(self._commit_loop())
                     logger.info(
                         f"Kafka Consumer connected and subscribed to topics: {valid_topics}"
                     )
@@ -205,6 +798,7 @@ class KafkaManager:
     async def stop(self):
         """Safely shuts down Kafka clients and background tasks."""
         logger.info("Disconnecting from Kafka...")
+        registry.remove_collector(self._collect_metrics)
         if self._consumer_task and not self._consumer_task.done():
             self._consumer_task.cancel()
             try:
@@ -212,21 +806,61 @@ class KafkaManager:
             except asyncio.CancelledError:
                 logger.info("Consumer task has been successfully cancelled.")
 
+        try:
+            await asyncio.wait_for(
+                self._drain(), timeout=settings.KAFKA_SHUTDOWN_TIMEOUT_MS / 1000
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Timed out waiting for in-flight callbacks to finish.")
+        self._cancel_deferred(list(self._deferred))
+
+        for hook in self._shutdown_hooks:
+            try:
+                await hook()
+            except Exception as e:
+                logger.error(f"Shutdown hook '{hook.__name__}' failed: {e}", exc_info=True)
+
+        for worker in self._partition_workers.values():
+            await worker.stop()
+        self._partition_workers.clear()
+
+        if self._decode_executor is not None:
+            self._decode_executor.shutdown(wait=False)
+            self._decode_executor = None
+
+        if self._commit_task:
+            self._commit_task.cancel()
+            try:
+                await self._commit_task
+            except asyncio.CancelledError:
+                pass
+            self._commit_task = None
+        if self._manual_commit:
+            await self.commit_offsets()
+
         if self.consumer:
             await self.consumer.stop()
             logger.info("Kafka Consumer disconnected.")
+        if self.dead_letter:
+            await self.dead_letter.stop()
+            self.dead_letter = None
         if self.producer:
             await self.producer.stop()
             logger.info("Kafka Producer disconnected.")
 
     async def send_message(
-        self, topic: str, message: dict
+        self,
+        topic: str,
+        message: dict,
+        headers: Optional[list[tuple[str, bytes]]] = None,
     ) -> Awaitable[ConsumerRecord]:
         """Sends a message to the specified topic and waits for a response."""
         if not self.producer:
             raise RuntimeError("Kafka Producer is not initialized or has been stopped.")
         try:
-            future = await self.producer.send_and_wait(topic, value=message)
+            future = await self.producer.send_and_wait(
+                topic, value=message, headers=headers
+            )
             logger.debug(f"Message sent and confirmed to topic '{topic}': {message}")
             return future
         except Exception as e:
@@ -255,6 +889,8 @@ def init_kafka_manager(
     consumer_config: KafkaConsumerConfig = KafkaConsumerConfig(),
     producer_config: KafkaProducerConfig = KafkaProducerConfig(),
     callback_context: Optional[Any] = None,
+    value_parser: Optional[ValueParser] = None,
+    prefilter: Optional[PreFilter] = None,
 ) -> KafkaManager:
     """Creates and initializes the KafkaManager instance at application startup."""
     global _kafka_manager_instance
@@ -268,6 +904,8 @@ def init_kafka_manager(
         consumer_config=consumer_config,
         producer_config=producer_config,
         callback_context=callback_context,
+        value_parser=value_parser,
+        prefilter=prefilter,
     )
     logger.info("KafkaManager initialized.")
     return _kafka_manager_instance
@@ -0,0 +1,165 @@
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional
+
+from loguru import logger
+
+# Notifier failures must not be sent through the notifier again
+_log = logger.bind(name="log_notifier", no_notify=True)
+
+_STOP = object()
+
+
+class BackgroundNotifier:
+    """
+    Sends ERROR log records to an Apprise notifier from a background thread.
+
+    The loguru sink only puts the formatted record on a bounded queue, so
+    logging an error never waits on the network. When the queue is full
+    the record is dropped and counted. The worker thread collects records
+    for `batch_window` seconds (at most `batch_max` of them), merges
+    identical messages into one line with a repeat count, and sends the
+    batch as a single notification. At most `rate_limit` notifications go
+    out per `rate_window` seconds. While it waits, repeats keep merging into
+    the pending batch and new distinct messages beyond `batch_max` are
+    dropped and counted.
+    """
+
+    def __init__(
+        self,
+        notifier: Any,
+        queue_size: int = 1000,
+        batch_window: float = 5.0,
+        batch_max: int = 50,
+        rate_limit: int = 10,
+        rate_window: float = 60.0,
+        max_body: int = 4000,
+    ) -> None:
+        self._notifier = notifier
+        self._queue: "queue.Queue[object]" = queue.Queue(maxsize=max(1, queue_size))
+        self.batch_window = batch_window
+        self.batch_max = max(1, batch_max)
+        self.rate_limit = max(1, rate_limit)
+        self.rate_window = rate_window
+        self.max_body = max_body
+        self._sent_at: List[float] = []
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self.dropped = 0
+        self._dropped_reported = 0
+        self.sent = 0
+
+    def __call__(self, message: Any) -> None:
+        """Loguru sink: enqueues a formatted record without blocking."""
+        if self._closed:
+            return
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(str(message).rstrip("\n"))
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self) -> None:
+        self._ensure_started()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flushes queued records and stops the worker thread."""
+        with self._lock:
+            self._closed = True
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        while True:
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+                break
+            except queue.Full:
+                # Make room for the stop marker rather than hang on shutdown
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+        thread.join(timeout)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(
+                    target=self._run, name="log-notifier", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            # Distinct messages in arrival order, with their repeat counts
+            batch: "OrderedDict[object, int]" = OrderedDict({first: 1})
+            deadline = time.monotonic() + self.batch_window
+            stopping = self._collect(batch, deadline, until_full=True)
+
+            # Wait for the rate limit while still merging new records
+            while not stopping and (wait := self._rate_limit_delay()) > 0:
+                stopping = self._collect(batch, time.monotonic() + wait, until_full=False)
+            self._send(batch)
+
+    def _collect(
+        self, batch: "OrderedDict[object, int]", deadline: float, until_full: bool
+    ) -> bool:
+        """Adds records to `batch` until the deadline. Returns True on stop."""
+        while not (until_full and len(batch) >= self.batch_max):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return True
+            if item in batch:
+                batch[item] += 1
+            elif len(batch) < self.batch_max:
+                batch[item] = 1
+            else:
+                self.dropped += 1
+        return False
+
+    def _rate_limit_delay(self) -> float:
+        now = time.monotonic()
+        self._sent_at = [t for t in self._sent_at if t > now - self.rate_window]
+        if len(self._sent_at) < self.rate_limit:
+            return 0.0
+        return self._sent_at[0] + self.rate_window - now
+
+    def _send(self, batch: "OrderedDict[object, int]") -> None:
+        lines = [
+            message if count == 1 else f"{message} (x{count})"
+            for message, count in batch.items()
+        ]
+        dropped = self.dropped - self._dropped_reported
+        self._dropped_reported += dropped
+        if dropped:
+            lines.append(f"... {dropped} more errors dropped")
+        body = "\n".join(lines)
+        if len(body) > self.max_body:
+            body = body[: self.max_body - 3] + "..."
+        total = sum(batch.values())
+        title = f"{total} errors" if total > 1 else ""
+
+        self._sent_at.append(time.monotonic())
+        try:
+            if not self._notifier.notify(body=body, title=title):
+                _log.warning(f"Error notification of {total} records was not delivered.")
+                return
+            self.sent += 1
+        except Exception as e:
+            _log.warning(f"Error notification failed: {e!r}")
@@ -0,0 +1,129 @@
+import json
+import os
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, TextIO
+
+# Text line layout of the per-name log files
+TEXT_FORMAT = (
+    "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {message}"
+)
+# In JSON mode the sink builds the line itself; loguru appends any traceback
+JSON_FORMAT = "{message}"
+
+
+class _RotatingFile:
+    """An append-only log file that is zipped away once it exceeds `max_bytes`."""
+
+    def __init__(self, path: Path, max_bytes: int, backup_count: int) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._file: Optional[TextIO] = None
+        self._size = 0
+
+    def write(self, line: str) -> None:
+        if self._file is None:
+            # Line buffered: every record reaches the file as it is written
+            self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+            self._size = self._file.tell()
+        self._file.write(line)
+        # max_bytes is a byte limit; non-ASCII text takes several bytes per character
+        self._size += len(line.encode("utf-8"))
+        if self.max_bytes and self._size >= self.max_bytes:
+            self._rotate()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _rotate(self) -> None:
+        self.close()
+        stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S_%f")
+        rotated = self.path.with_name(f"{self.path.stem}.{stamp}{self.path.suffix}")
+        os.replace(self.path, rotated)
+        with zipfile.ZipFile(f"{rotated}.zip", "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.write(rotated, rotated.name)
+        rotated.unlink()
+
+        backups = sorted(self.path.parent.glob(f"{self.path.stem}.*{self.path.suffix}.zip"))
+        for old in backups[: max(0, len(backups) - self.backup_count)]:
+            old.unlink(missing_ok=True)
+
+
+class RoutingFileSink:
+    """
+    One loguru sink that writes each record to the file of its logger name.
+
+    Records are routed by `extra["name"]` with a dict lookup, so the cost
+    per record does not grow with the number of named loggers. Only names
+    registered through `add_route` get a file. Added with `enqueue=True`,
+    the sink runs on loguru's single writer thread, which owns every file.
+    In JSON mode each line is an object with the time, level, logger name,
+    source location and message (including any traceback).
+    """
+
+    def __init__(
+        self,
+        log_dir: Path,
+        max_bytes: int = 0,
+        backup_count: int = 5,
+        serialize: bool = False,
+    ) -> None:
+        self.log_dir = Path(log_dir)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.serialize = serialize
+        self._routes: Dict[str, _RotatingFile] = {}
+
+    @property
+    def format(self) -> str:
+        """The loguru format string to add this sink with."""
+        return JSON_FORMAT if self.serialize else TEXT_FORMAT
+
+    def add_route(self, name: str) -> None:
+        """Sends records of logger `name` to `<log_dir>/<name>.log` (or `.jsonl`)."""
+        if name not in self._routes:
+            suffix = ".jsonl" if self.serialize else ".log"
+            self._routes[name] = _RotatingFile(
+                self.log_dir / f"{name}{suffix}", self.max_bytes, self.backup_count
+            )
+
+    def accepts(self, record: Dict[str, Any]) -> bool:
+        """Loguru filter: skips records of unrouted names before they are queued."""
+        return record["extra"].get("name") in self._routes
+
+    def __call__(self, message: Any) -> None:
+        record = message.record
+        route = self._routes.get(record["extra"].get("name"))
+        if route is None:
+            return
+        if self.serialize:
+            entry = self._to_json(message, record)
+            line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+        else:
+            line = str(message)
+        route.write(line)
+
+    def stop(self) -> None:
+        """Closes every open file. Files are line buffered, so nothing is lost without it."""
+        for route in self._routes.values():
+            route.close()
+
+    @staticmethod
+    def _to_json(message: Any, record: Dict[str, Any]) -> Dict[str, Any]:
+        extra = {k: v for k, v in record["extra"].items() if k not in ("name", "no_notify")}
+        entry = {
+            "time": record["time"].isoformat(),
+            "level": record["level"].name,
+            "logger": record["extra"].get("name"),
+            "module": record["name"],
+            "function": record["function"],
+            "line": record["line"],
+            "message": str(message).rstrip("\n"),
+        }
+        if extra:
+            entry["extra"] = extra
+        return entry
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import atexit
 import logging
 import sys
 from logging import LogRecord
@@ -10,6 +11,8 @@ import apprise
 from loguru import logger
 
 from core.config import settings
+from utils.log_notifier import BackgroundNotifier
+from utils.log_router import RoutingFileSink
 
 
 class InterceptHandler(logging.Handler):
@@ -50,25 +53,67 @@ class _LogManager:
 
         logger.patch(lambda record: record["extra"].setdefault("name", "unnamed"))
 
+        console_format = (
+            "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | "
+            "<level>{level: <8}</level> | "
+            "<cyan>{extra[name]:<15}</cyan> | "
+            "<cyan>{name}</cyan>:<cyan>{function}:{line}</cyan> - <level>{message}</level>"
+        )
+        self._file_sink: Optional[RoutingFileSink] = None
+        self.notifier: Optional[BackgroundNotifier] = None
+        if settings.APP_CONFIG.LOG_STDERR_ONLY:
+            # Child processes sharing LOG_DIR would rotate each other's files,
+            # and their errors are reported by the parent
+            logger.add(
+                sys.stderr,
+                level=settings.APP_CONFIG.LOG_LEVEL.upper(),
+                format=console_format,
+            )
+            return
+
+        # One enqueued file sink for every named logger: records are routed to
+        # their file by name instead of through a filtered sink per name.
+        self._file_sink = RoutingFileSink(
+            self.log_dir,
+            max_bytes=settings.APP_CONFIG.LOG_MAX_BYTES,
+            backup_count=settings.APP_CONFIG.LOG_BACKUP_COUNT,
+            serialize=settings.APP_CONFIG.LOG_JSON,
+        )
+        logger.add(
+            self._file_sink,
+            level=settings.APP_CONFIG.LOG_LEVEL.upper(),
+            filter=self._file_sink.accepts,
+            format=self._file_sink.format,
+            enqueue=True,
+            backtrace=settings.APP_CONFIG.ENV != "prod",
+            diagnose=settings.APP_CONFIG.ENV != "prod",
+        )
+
         # Default console logger
         logger.add(
             sys.stdout,
             level=settings.APP_CONFIG.LOG_LEVEL.upper(),
-            format=(
-                "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | "
-                "<level>{level: <8}</level> | "
-                "<cyan>{extra[name]:<15}</cyan> | "
-                "<cyan>{name}</cyan>:<cyan>{function}:{line}</cyan> - <level>{message}</level>"
-            ),
+            format=console_format,
             colorize=True,
         )
 
-        # Apprise notification logger for ERROR level
+        # Apprise notification logger for ERROR level. Notifications are sent
+        # from a background thread so that logging never blocks the event loop.
         if settings.APP_CONFIG.LOG_NOTIFIER_URL:
-            notifier = apprise.Apprise()
-            notifier.add(settings.APP_CONFIG.LOG_NOTIFIER_URL)
+            config = settings.APP_CONFIG
+            apprise_notifier = apprise.Apprise()
+            apprise_notifier.add(config.LOG_NOTIFIER_URL)
+            self.notifier = BackgroundNotifier(
+                apprise_notifier,
+                queue_size=config.LOG_NOTIFIER_QUEUE_SIZE,
+                batch_window=config.LOG_NOTIFIER_BATCH_WINDOW,
+                batch_max=config.LOG_NOTIFIER_BATCH_MAX,
+                rate_limit=config.LOG_NOTIFIER_RATE_LIMIT,
+                rate_window=config.LOG_NOTIFIER_RATE_WINDOW,
+            )
+            atexit.register(self.notifier.stop)
             logger.add(
-                lambda msg: notifier.notify(body=msg),
+                self.notifier,
                 level="ERROR",
                 filter=lambda record: not record["extra"].get("no_notify", False),
                 format="[{extra[name]}] {message}",
@@ -79,20 +124,8 @@ class _LogManager:
         Gets or creates a logger with the specified name.
         """
         if name not in self._configured_loggers:
-            log_file_path = self.log_dir / f"{name}.log"
-            logger.add(
-                log_file_path,
-                level=settings.APP_CONFIG.LOG_LEVEL.upper(),
-                filter=lambda record: record["extra"].get("name") == name,
-                format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {message}",
-                rotation=f"{settings.APP_CONFIG.LOG_MAX_BYTES} B",
-                retention=f"{settings.APP_CONFIG.LOG_BACKUP_COUNT} days",
-                compression="zip",
-                encoding="utf-8",
-                enqueue=True,
-                backtrace=settings.APP_CONFIG.ENV != "prod",
-                diagnose=settings.APP_CONFIG.ENV != "prod",
-            )
+            if self._file_sink is not None:
+                self._file_sink.add_route(name)
             self._configured_loggers.add(name)
 
         return logger.bind(name=name, no_notify=no_notify)
@@ -0,0 +1,330 @@
+import bisect
+import math
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+from utils.logger import LogManager
+
+logger = LogManager.get_logger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; covers in-memory renders up to slow webhook round trips
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric(ABC):
+    """A named metric family with a fixed set of label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, object] = {}
+
+    def labels(self, *values: object):
+        """Returns the child metric for one combination of label values."""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(
+                    f"Metric '{self.name}' expects labels {self.labelnames}, got {key}"
+                )
+            child = self._children[key] = self._new_child()
+        return child
+
+    def remove(self, *values: object) -> None:
+        """Drops the child of a label combination, e.g. for a revoked partition."""
+        self._children.pop(tuple(str(value) for value in values), None)
+
+    @abstractmethod
+    def _new_child(self):
+        """Returns the value holder of a new label combination."""
+
+    @abstractmethod
+    def _samples(self) -> Iterator[str]:
+        """Yields the exposition lines of every child."""
+
+    def expose(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    """A monotonically increasing count, e.g. of consumed messages."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1) -> None:
+        """Increments the counter of a metric without labels."""
+        self.labels().inc(amount)
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in list(self._children.items()):
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_total{labels} {_format_value(child.value)}"
+
+
+class Gauge(_Metric):
+    """A value that can go up and down, e.g. consumer lag."""
+
+    kind = "gauge"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def set(self, value: float) -> None:
+        """Sets the value of a metric without labels."""
+        self.labels().set(value)
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in list(self._children.items()):
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}{labels} {_format_value(child.value)}"
+
+
+class _HistogramValue:
+    __slots__ = ("upper_bounds", "counts", "sum")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]) -> None:
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observes the duration of the block in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric):
+    """Counts observations, e.g. latencies, into cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Records an observation of a metric without labels."""
+        self.labels().observe(value)
+
+    def _samples(self) -> Iterator[str]:
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        names = self.labelnames + ("le",)
+        for values, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, child.counts):
+                cumulative += count
+                labels = _format_labels(names, values + (bound,))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """
+    Holds metric families and renders them in the Prometheus text format.
+
+    Updating a metric is a dict lookup and an addition on the event loop,
+    with no locking. Values that are cheaper to read on demand, such as
+    consumer lag, are refreshed by collectors right before each scrape.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(f"Metric '{metric.name}' is already registered differently.")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Registers a function that updates gauges before every scrape."""
+        self._collectors.append(collector)
+
+    def remove_collector(self, collector: Callable[[], None]) -> None:
+        try:
+            self._collectors.remove(collector)
+        except ValueError:
+            pass
+
+    def expose(self) -> str:
+        """Runs the collectors and returns every metric in the Prometheus text format."""
+        for collector in list(self._collectors):
+            try:
+                collector()
+            except Exception as e:
+                logger.warning(f"Metrics collector {collector!r} failed: {e}")
+        return "\n".join(metric.expose() for metric in self._metrics.values()) + "\n"
+
+
+registry = MetricsRegistry()
+
+MESSAGES_CONSUMED = registry.counter(
+    "kafka_alert_messages_consumed",
+    "Records fetched from Kafka.",
+    ("topic", "partition"),
+)
+MESSAGES_FILTERED = registry.counter(
+    "kafka_alert_messages_filtered",
+    "Records dropped by their headers before decoding.",
+    ("topic",),
+)
+CONSUMER_LAG = registry.gauge(
+    "kafka_alert_consumer_lag",
+    "Records between the last fetched offset and the partition high watermark.",
+    ("topic", "partition"),
+)
+TASK_SLOTS_IN_USE = registry.gauge(
+    "kafka_alert_task_slots_in_use",
+    "Callback task slots held, out of KAFKA_MAX_CONCURRENT_TASKS, per priority lane.",
+    ("lane",),
+)
+TASK_SLOTS_WAITING = registry.gauge(
+    "kafka_alert_task_slots_waiting",
+    "Callback tasks waiting for a slot, per priority lane.",
+    ("lane",),
+)
+RENDER_SECONDS = registry.histogram(
+    "kafka_alert_render_seconds",
+    "Template render latency.",
+    ("template",),
+)
+SEND_SECONDS = registry.histogram(
+    "kafka_alert_send_seconds",
+    "Latency of a single provider request.",
+    ("provider", "host", "status"),
+)
+FALLBACKS = registry.counter(
+    "kafka_alert_fallbacks",
+    "Fallback notifications attempted after a failed delivery.",
+    ("provider", "outcome"),
+)
+DEAD_LETTERS = registry.counter(
+    "kafka_alert_dead_letters",
+    "Records sent to the dead-letter topic.",
+    ("topic", "stage"),
+)
+
+
+class MetricsServer:
+    """Serves a registry on a small aiohttp endpoint for Prometheus to scrape."""
+
+    def __init__(
+        self,
+        host: str = "0.0.0.0",
+        port: int = 9108,
+        path: str = "/metrics",
+        metrics: Optional[MetricsRegistry] = None,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.path = path
+        self.registry = metrics or registry
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get(self.path, self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Serving metrics on http://{self.host}:{self.port}{self.path}")
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(
+            text=self.registry.expose(),
+            content_type="text/plain",
+            charset="utf-8",
+        )
@@ -0,0 +1,92 @@
+from collections import deque
+from typing import Deque, Dict, Iterable, List
+
+from aiokafka import TopicPartition
+
+
+class _PartitionOffsets:
+    """Offsets of one partition in fetch order, with their completion flags."""
+
+    __slots__ = ("entries", "by_offset", "watermark", "committed")
+
+    def __init__(self) -> None:
+        self.entries: Deque[List] = deque()  # [offset, done] in fetch order
+        self.by_offset: Dict[int, List] = {}
+        self.watermark = -1  # Next offset to commit, -1 if nothing completed yet
+        self.committed = -1
+
+    def advance(self) -> None:
+        while self.entries and self.entries[0][1]:
+            offset = self.entries.popleft()[0]
+            del self.by_offset[offset]
+            self.watermark = offset + 1
+
+
+class OffsetTracker:
+    """
+    Tracks in-flight records per partition and computes commit watermarks.
+
+    Records may complete in any order. The commit offset of a partition is
+    the contiguous low watermark: one past the highest offset for which it
+    and every earlier tracked offset have completed. Committing it never
+    skips a record that is still being processed, which gives
+    at-least-once delivery.
+    """
+
+    def __init__(self) -> None:
+        self._partitions: Dict[TopicPartition, _PartitionOffsets] = {}
+        self._completed_since_commit = 0
+
+    @property
+    def completed_since_commit(self) -> int:
+        """Returns the number of completions since the last `mark_committed`."""
+        return self._completed_since_commit
+
+    def track(self, tp: TopicPartition, offset: int) -> None:
+        """Registers a fetched record as in-flight. Call in fetch order."""
+        partition = self._partitions.get(tp)
+        if partition is None:
+            partition = self._partitions[tp] = _PartitionOffsets()
+        if offset in partition.by_offset:
+            return
+        entry = [offset, False]
+        partition.entries.append(entry)
+        partition.by_offset[offset] = entry
+
+    def done(self, tp: TopicPartition, offset: int) -> None:
+        """Marks a tracked record as completed."""
+        partition = self._partitions.get(tp)
+        if partition is None:
+            return
+        entry = partition.by_offset.get(offset)
+        if entry is None or entry[1]:
+            return
+        entry[1] = True
+        self._completed_since_commit += 1
+        partition.advance()
+
+    def committable(self) -> Dict[TopicPartition, int]:
+        """Returns the watermark of every partition that advanced since its last commit."""
+        return {
+            tp: partition.watermark
+            for tp, partition in self._partitions.items()
+            if partition.watermark > partition.committed
+        }
+
+    def mark_committed(self, offsets: Dict[TopicPartition, int]) -> None:
+        """Records that `offsets` have been committed to Kafka."""
+        for tp, offset in offsets.items():
+            partition = self._partitions.get(tp)
+            if partition is not None:
+                partition.committed = max(partition.committed, offset)
+        self._completed_since_commit = 0
+
+    def pending(self, tp: TopicPartition) -> int:
+        """Returns the number of tracked records not yet below the watermark."""
+        partition = self._partitions.get(tp)
+        return len(partition.entries) if partition else 0
+
+    def forget(self, tps: Iterable[TopicPartition]) -> None:
+        """Drops state for partitions that are no longer assigned."""
+        for tp in tps:
+            self._partitions.pop(tp, None)
@@ -0,0 +1,97 @@
+import asyncio
+from typing import Awaitable, Callable, List
+
+from aiokafka import ConsumerRecord, TopicPartition
+
+from utils.logger import LogManager
+
+logger = LogManager.get_logger("kafka")
+
+RecordHandler = Callable[[ConsumerRecord], Awaitable[None]]
+PartitionHook = Callable[[TopicPartition], None]
+
+
+class PartitionWorker:
+    """
+    Processes the records of a single topic partition in fetch order.
+
+    Records are started strictly in order by `concurrency` worker tasks; with
+    the default concurrency of 1 each record finishes before the next one
+    starts. When the queue reaches `max_queue_size`, `on_full` is invoked so
+    the consumer can pause fetching for this partition, and `on_drained` is
+    invoked once the queue has fallen back to half of that size.
+    """
+
+    def __init__(
+        self,
+        tp: TopicPartition,
+        handler: RecordHandler,
+        on_full: PartitionHook,
+        on_drained: PartitionHook,
+        max_queue_size: int = 100,
+        concurrency: int = 1,
+    ) -> None:
+        self.tp = tp
+        self._handler = handler
+        self._on_full = on_full
+        self._on_drained = on_drained
+        self._max_queue_size = max(1, max_queue_size)
+        self._resume_threshold = self._max_queue_size // 2
+
+        self._queue: asyncio.Queue[ConsumerRecord] = asyncio.Queue()
+        self._paused = False
+        self._tasks: List[asyncio.Task[None]] = [
+            asyncio.create_task(self._run()) for _ in range(max(1, concurrency))
+        ]
+
+    @property
+    def paused(self) -> bool:
+        """Returns True while fetching for this partition is paused."""
+        return self._paused
+
+    @property
+    def backlog(self) -> int:
+        """Returns the number of records waiting to be started."""
+        return self._queue.qsize()
+
+    def submit(self, msg: ConsumerRecord) -> None:
+        """Queues a record without blocking the consumer loop."""
+        self._queue.put_nowait(msg)
+        if not self._paused and self._queue.qsize() >= self._max_queue_size:
+            self._paused = True
+            logger.debug(f"Partition queue full for {self.tp}. Pausing fetch.")
+            self._call_hook(self._on_full)
+
+    async def _run(self) -> None:
+        while True:
+            msg = await self._queue.get()
+            try:
+                await self._handler(msg)
+            except Exception as e:
+                logger.error(
+                    f"Unhandled error processing {self.tp} offset {msg.offset}: {e}",
+                    exc_info=True,
+                )
+            finally:
+                self._queue.task_done()
+                if self._paused and self._queue.qsize() <= self._resume_threshold:
+                    self._paused = False
+                    logger.debug(f"Partition queue drained for {self.tp}. Resuming fetch.")
+                    self._call_hook(self._on_drained)
+
+    def _call_hook(self, hook: PartitionHook) -> None:
+        try:
+            hook(self.tp)
+        except Exception as e:
+            # The partition may have been revoked in the meantime
+            logger.debug(f"Partition hook failed for {self.tp}: {e}")
+
+    async def join(self) -> None:
+        """Waits until every queued record has been processed."""
+        await self._queue.join()
+
+    async def stop(self) -> None:
+        """Cancels the worker tasks, dropping records that have not started."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,176 @@
+import asyncio
+from collections import deque
+from collections.abc import Mapping
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Deque, Dict, Iterable, Optional
+
+from aiokafka import ConsumerRecord
+
+from core.config import settings
+
+# Priority lane of the record being processed, set by KafkaManager around
+# each callback so providers can pick the matching send lane.
+current_priority: ContextVar[str] = ContextVar(
+    "current_priority", default=settings.PRIORITY_CONFIG.DEFAULT
+)
+
+_SINGLE_LANE = "default"
+
+
+class PriorityLanes:
+    """
+    A counting semaphore split into weighted priority lanes.
+
+    At most `total` slots are held at once, and each lane at most its own
+    budget (`share` of `total`). When a slot frees up and several lanes
+    have waiters, a smooth weighted round-robin picks the next lane, so
+    higher-weight lanes are served more often but no lane starves. Budgets
+    whose shares sum to less than 1 for the lower lanes keep slots free for
+    the top lane under saturation.
+    """
+
+    def __init__(
+        self,
+        total: int,
+        shares: Dict[str, float],
+        weights: Optional[Dict[str, int]] = None,
+        default: Optional[str] = None,
+    ) -> None:
+        if not shares:
+            raise ValueError("At least one priority lane is required.")
+        weights = weights or {}
+        self.total = max(1, total)
+        self.default = default if default in shares else next(iter(shares))
+        self._budgets = {
+            lane: max(1, min(self.total, round(self.total * share)))
+            for lane, share in shares.items()
+        }
+        self._weights = {lane: max(1, weights.get(lane, 1)) for lane in shares}
+        self._in_use = {lane: 0 for lane in shares}
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {lane: deque() for lane in shares}
+        self._current_weight = {lane: 0 for lane in shares}
+        self._total_in_use = 0
+
+    @classmethod
+    def from_config(cls, total: int) -> "PriorityLanes":
+        """Creates the lanes of PRIORITY_CONFIG, or a single lane if priorities are disabled."""
+        config = settings.PRIORITY_CONFIG
+        if not config.ENABLED:
+            return cls(total, {_SINGLE_LANE: 1.0})
+        return cls(total, config.LANES, config.WEIGHTS, config.DEFAULT)
+
+    @property
+    def lanes(self) -> list[str]:
+        """Returns the lane names, highest weight first."""
+        return sorted(self._budgets, key=lambda lane: -self._weights[lane])
+
+    def resolve(self, lane: Optional[str]) -> str:
+        """Maps unknown or missing lane names to the default lane."""
+        return lane if lane in self._budgets else self.default
+
+    def budget(self, lane: str) -> int:
+        return self._budgets[self.resolve(lane)]
+
+    def in_use(self, lane: str) -> int:
+        return self._in_use[self.resolve(lane)]
+
+    def waiting(self, lane: str) -> int:
+        """Returns the number of tasks waiting for a slot in a lane."""
+        return len(self._waiters[self.resolve(lane)])
+
+    def most_urgent(self, lanes: Iterable[str]) -> str:
+        """Returns the highest-weight lane among `lanes`."""
+        resolved = [self.resolve(lane) for lane in lanes] or [self.default]
+        return max(resolved, key=lambda lane: self._weights[lane])
+
+    async def acquire(self, lane: Optional[str] = None) -> None:
+        """Waits for a slot in a lane."""
+        lane = self.resolve(lane)
+        if not self._waiters[lane] and self._has_room(lane):
+            self._grant(lane)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just before the waiter was cancelled
+                self.release(lane)
+            else:
+                try:
+                    self._waiters[lane].remove(future)
+                except ValueError:
+                    pass
+            raise
+
+    def release(self, lane: Optional[str] = None) -> None:
+        """Returns a slot to its lane and hands free slots to waiters."""
+        lane = self.resolve(lane)
+        self._in_use[lane] -= 1
+        self._total_in_use -= 1
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self, lane: Optional[str] = None) -> AsyncIterator[None]:
+        """Holds a slot in a lane for the duration of the block."""
+        await self.acquire(lane)
+        try:
+            yield
+        finally:
+            self.release(lane)
+
+    def _has_room(self, lane: str) -> bool:
+        return (
+            self._total_in_use < self.total and self._in_use[lane] < self._budgets[lane]
+        )
+
+    def _grant(self, lane: str) -> None:
+        self._in_use[lane] += 1
+        self._total_in_use += 1
+
+    def _wake(self) -> None:
+        while self._total_in_use < self.total:
+            lane = self._pick()
+            if lane is None:
+                return
+            future = self._waiters[lane].popleft()
+            if future.done():
+                continue
+            self._grant(lane)
+            future.set_result(None)
+
+    def _pick(self) -> Optional[str]:
+        """Smooth weighted round-robin over lanes that have waiters and room."""
+        best = None
+        total_weight = 0
+        for lane, waiters in self._waiters.items():
+            if not waiters or self._in_use[lane] >= self._budgets[lane]:
+                continue
+            self._current_weight[lane] += self._weights[lane]
+            total_weight += self._weights[lane]
+            if best is None or self._current_weight[lane] > self._current_weight[best]:
+                best = lane
+        if best is not None:
+            self._current_weight[best] -= total_weight
+        return best
+
+
+def priority_of_record(msg: ConsumerRecord) -> str:
+    """
+    Returns the priority lane of a decoded record.
+
+    Checked in order: the PRIORITY_CONFIG.HEADER header, the FIELD field of
+    the message value, then TOPIC_PRIORITIES. Falls back to DEFAULT.
+    """
+    config = settings.PRIORITY_CONFIG
+    for key, value in msg.headers or ():
+        if key == config.HEADER and value:
+            return value.decode("utf-8", "replace")
+    if isinstance(msg.value, Mapping):
+        priority = msg.value.get(config.FIELD)
+        if isinstance(priority, str):
+            return priority
+    return config.TOPIC_PRIORITIES.get(msg.topic, config.DEFAULT)
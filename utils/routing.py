@@ -0,0 +1,42 @@
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from aiokafka import ConsumerRecord
+
+from core.config import settings
+
+# Headers producers may set so records can be routed without decoding the body
+PROVIDER_HEADER = "provider"
+TEMPLATE_HEADER = "template"
+
+
+@dataclass(frozen=True, slots=True)
+class RoutingInfo:
+    """
+    Routing metadata of a record, read from its headers only.
+
+    Fields are None when the producer did not set the header; the value
+    then has to be decoded to know them.
+    """
+
+    topic: str
+    provider: Optional[str] = None
+    template: Optional[str] = None
+    priority: Optional[str] = None
+
+    @classmethod
+    def from_record(cls, msg: ConsumerRecord) -> "RoutingInfo":
+        provider = template = priority = None
+        priority_header = settings.PRIORITY_CONFIG.HEADER
+        for key, value in msg.headers or ():
+            if key == PROVIDER_HEADER:
+                provider = value.decode("utf-8", "replace")
+            elif key == TEMPLATE_HEADER:
+                template = value.decode("utf-8", "replace")
+            elif key == priority_header:
+                priority = value.decode("utf-8", "replace")
+        return cls(msg.topic, provider, template, priority)
+
+
+# Returns False to drop a record before its value is decoded
+PreFilter = Callable[[RoutingInfo], bool]
@@ -0,0 +1,257 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+from multiprocessing.process import BaseProcess
+from typing import Any, Callable, Dict, List, Optional
+
+from aiohttp import web
+
+from core.config import settings
+from utils.logger import LogManager
+
+logger = LogManager.get_logger(__name__)
+
+WorkerTarget = Callable[[int], None]
+# Returns environment overrides for the worker with the given index
+WorkerEnv = Callable[[int], Dict[str, str]]
+
+
+def available_cpus() -> int:
+    """Returns the number of CPUs this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _run_worker(target: WorkerTarget, index: int) -> None:
+    # The supervisor decides when workers stop: a terminal Ctrl-C reaches
+    # the whole process group, so workers wait for its SIGTERM instead
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    target(index)
+
+
+class _Worker:
+    """A worker slot. Its process is replaced on every restart."""
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.process: Optional[BaseProcess] = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.backoff = 0.0
+        self.restart_at: Optional[float] = None
+        self.last_exit_code: Optional[int] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+
+class WorkerSupervisor:
+    """
+    Runs `target(index)` in `processes` worker processes and keeps them running.
+
+    Workers are started with the spawn method, so each one builds its own
+    event loop, Kafka clients and log sinks. A worker that exits is
+    restarted after `restart_backoff` seconds, doubled up to
+    `max_restart_backoff` each time it dies within `stable_after` seconds
+    of starting. SIGTERM or SIGINT stop the workers with SIGTERM, and
+    workers still running after `shutdown_timeout` are killed.
+    """
+
+    def __init__(
+        self,
+        target: WorkerTarget,
+        processes: int,
+        env: Optional[WorkerEnv] = None,
+        restart_backoff: float = 1.0,
+        max_restart_backoff: float = 60.0,
+        stable_after: float = 30.0,
+        shutdown_timeout: float = 30.0,
+        health_host: str = "0.0.0.0",  # nosec B104
+        health_port: Optional[int] = None,
+        health_path: str = "/health",
+        poll_interval: float = 0.5,
+    ) -> None:
+        self._target = target
+        self._env = env
+        self.restart_backoff = restart_backoff
+        self.max_restart_backoff = max_restart_backoff
+        self.stable_after = stable_after
+        self.shutdown_timeout = shutdown_timeout
+        self.health_host = health_host
+        self.health_port = health_port
+        self.health_path = health_path
+        self.poll_interval = poll_interval
+        self._context = multiprocessing.get_context("spawn")
+        self._workers = [_Worker(index) for index in range(processes)]
+        self._stop_event: Optional[asyncio.Event] = None
+        self._runner: Optional[web.AppRunner] = None
+
+    @classmethod
+    def from_config(cls, target: WorkerTarget, env: Optional[WorkerEnv] = None) -> "WorkerSupervisor":
+        """Builds a supervisor from WORKER_CONFIG."""
+        config = settings.WORKER_CONFIG
+        return cls(
+            target,
+            processes=config.PROCESSES or available_cpus(),
+            env=env,
+            restart_backoff=config.RESTART_BACKOFF,
+            max_restart_backoff=config.MAX_RESTART_BACKOFF,
+            stable_after=config.STABLE_AFTER,
+            shutdown_timeout=config.SHUTDOWN_TIMEOUT,
+            health_host=config.HEALTH_HOST,
+            health_port=config.HEALTH_PORT if config.HEALTH_ENABLED else None,
+            health_path=config.HEALTH_PATH,
+        )
+
+    async def run(self) -> None:
+        """Starts the workers and supervises them until `stop` or SIGTERM/SIGINT."""
+        loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self.stop)
+        try:
+            if self.health_port is not None:
+                await self._start_health_server()
+            logger.info(f"Starting {len(self._workers)} worker processes...")
+            for worker in self._workers:
+                self._start(worker)
+            while not self._stop_event.is_set():
+                self._check()
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await self._stop_workers()
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                loop.remove_signal_handler(sig)
+            if self._runner is not None:
+                await self._runner.cleanup()
+                self._runner = None
+            logger.info("All workers stopped.")
+
+    def stop(self) -> None:
+        """Requests a graceful shutdown of every worker."""
+        if self._stop_event is not None and not self._stop_event.is_set():
+            logger.info("Shutdown signal received. Stopping workers...")
+            self._stop_event.set()
+
+    def health(self) -> Dict[str, Any]:
+        """Returns the state of every worker; status is ok, degraded or down."""
+        now = time.monotonic()
+        workers: List[Dict[str, Any]] = []
+        for worker in self._workers:
+            alive = worker.alive
+            workers.append(
+                {
+                    "index": worker.index,
+                    "pid": worker.process.pid if alive else None,
+                    "alive": alive,
+                    "uptime": round(now - worker.started_at, 1) if alive else 0.0,
+                    "restarts": worker.restarts,
+                    "last_exit_code": worker.last_exit_code,
+                }
+            )
+        alive_count = sum(1 for worker in workers if worker["alive"])
+        if alive_count == len(workers):
+            status = "ok"
+        elif alive_count:
+            status = "degraded"
+        else:
+            status = "down"
+        return {
+            "status": status,
+            "alive": alive_count,
+            "processes": len(workers),
+            "restarts": sum(worker.restarts for worker in self._workers),
+            "workers": workers,
+        }
+
+    def _start(self, worker: _Worker) -> None:
+        overrides = self._env(worker.index) if self._env else {}
+        saved = {key: os.environ.get(key) for key in overrides}
+        # Spawned processes copy the environment as they start, so the
+        # overrides are applied before settings are imported in the worker
+        os.environ.update(overrides)
+        try:
+            process = self._context.Process(
+                target=_run_worker,
+                args=(self._target, worker.index),
+                name=f"worker-{worker.index}",
+            )
+            process.start()
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+        worker.process = process
+        worker.started_at = time.monotonic()
+        worker.restart_at = None
+        logger.info(f"Worker {worker.index} started (pid {process.pid}).")
+
+    def _check(self) -> None:
+        """Restarts workers that exited, once their backoff has passed."""
+        now = time.monotonic()
+        for worker in self._workers:
+            if worker.process is not None and not worker.process.is_alive():
+                worker.process.join()
+                worker.last_exit_code = worker.process.exitcode
+                if now - worker.started_at >= self.stable_after:
+                    worker.backoff = self.restart_backoff
+                else:
+                    worker.backoff = min(
+                        self.max_restart_backoff, worker.backoff * 2 or self.restart_backoff
+                    )
+                logger.error(
+                    f"Worker {worker.index} (pid {worker.process.pid}) exited with code "
+                    f"{worker.last_exit_code}. Restarting in {worker.backoff:.1f}s."
+                )
+                worker.process.close()
+                worker.process = None
+                worker.restart_at = now + worker.backoff
+            if worker.process is None and worker.restart_at is not None and now >= worker.restart_at:
+                worker.restarts += 1
+                self._start(worker)
+
+    async def _stop_workers(self) -> None:
+        running = [worker.process for worker in self._workers if worker.alive]
+        for process in running:
+            process.terminate()
+        deadline = time.monotonic() + self.shutdown_timeout
+        while any(process.is_alive() for process in running) and time.monotonic() < deadline:
+            await asyncio.sleep(min(self.poll_interval, 0.1))
+        for process in running:
+            if process.is_alive():
+                logger.warning(
+                    f"Worker {process.name} (pid {process.pid}) did not stop within "
+                    f"{self.shutdown_timeout}s. Killing it."
+                )
+                process.kill()
+            process.join()
+        for worker in self._workers:
+            if worker.process is not None:
+                worker.last_exit_code = worker.process.exitcode
+                worker.process.close()
+                worker.process = None
+            worker.restart_at = None
+
+    async def _start_health_server(self) -> None:
+        app = web.Application()
+        app.router.add_get(self.health_path, self._handle_health)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.health_host, self.health_port).start()
+        logger.info(
+            f"Serving worker health on http://{self.health_host}:{self.health_port}{self.health_path}"
+        )
+
+    async def _handle_health(self, request: web.Request) -> web.Response:
+        health = self.health()
+        return web.json_response(health, status=200 if health["status"] == "ok" else 503)